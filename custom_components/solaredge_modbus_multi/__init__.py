@@ -1,23 +1,44 @@
 """The SolarEdge Modbus Integration."""
 import logging
+import math
+import time
 from datetime import timedelta
-from typing import Any
+from typing import Any, Optional
 
 import async_timeout
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    ATTR_DEVICE_ID,
     CONF_HOST,
     CONF_NAME,
     CONF_PORT,
     CONF_SCAN_INTERVAL,
     Platform,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN, ConfDefaultFlag, ConfDefaultInt, ConfName
+from .const import (
+    CYCLE_OVERRUN_WARNING,
+    DEFAULT_DEVICE_LIST,
+    DEFAULT_PROXY_HOST,
+    DOMAIN,
+    SERVICE_WRITE_STORAGE_COMMAND,
+    STORAGE_MODE,
+    ConfDefaultFlag,
+    ConfDefaultInt,
+    ConfName,
+    PollTier,
+)
+from .helpers import CycleMonitor, format_device_list
 from .hub import DataUpdateFailed, HubInitFailed, SolarEdgeModbusMultiHub
+from .proxy import SolarEdgeModbusProxy
+from .sunspec import STORAGE_CONTROL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,6 +50,18 @@ PLATFORMS: list[str] = [
     Platform.SWITCH,
 ]
 
+WRITE_STORAGE_COMMAND_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Required("command_mode"): vol.All(vol.Coerce(int), vol.In(STORAGE_MODE)),
+        vol.Optional("command_timeout"): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=86400)
+        ),
+        vol.Optional("charge_limit"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional("discharge_limit"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up SolarEdge Modbus from a config entry."""
@@ -41,6 +74,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             **entry.options,
             CONF_SCAN_INTERVAL: data.pop(CONF_SCAN_INTERVAL),
         }
+    if ConfName.TOPOLOGY in entry.data:
+        data = {**entry_updates.get("data", entry.data)}
+        await SolarEdgeModbusMultiHub.discovery_store(hass, entry.entry_id).async_save(
+            data.pop(ConfName.TOPOLOGY)
+        )
+        entry_updates["data"] = data
+    if ConfName.KEEP_MODBUS_OPEN in entry.options:
+        options = {**entry_updates.get("options", entry.options)}
+        entry_updates["options"] = options
+        if options.pop(ConfName.KEEP_MODBUS_OPEN):
+            options[ConfName.IDLE_TIMEOUT] = 0
     if entry_updates:
         hass.config_entries.async_update_entry(entry, **entry_updates)
 
@@ -49,8 +93,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry.data[CONF_NAME],
         entry.data[CONF_HOST],
         entry.data[CONF_PORT],
-        entry.data.get(ConfName.NUMBER_INVERTERS, ConfDefaultInt.NUMBER_INVERTERS),
-        entry.data.get(ConfName.DEVICE_ID, ConfDefaultInt.DEVICE_ID),
+        entry.data.get(ConfName.DEVICE_LIST, DEFAULT_DEVICE_LIST),
         entry.options.get(ConfName.DETECT_METERS, bool(ConfDefaultFlag.DETECT_METERS)),
         entry.options.get(
             ConfName.DETECT_BATTERIES, bool(ConfDefaultFlag.DETECT_BATTERIES)
@@ -58,9 +101,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry.options.get(
             ConfName.SINGLE_DEVICE_ENTITY, bool(ConfDefaultFlag.SINGLE_DEVICE_ENTITY)
         ),
-        entry.options.get(
-            ConfName.KEEP_MODBUS_OPEN, bool(ConfDefaultFlag.KEEP_MODBUS_OPEN)
-        ),
+        entry.options.get(ConfName.IDLE_TIMEOUT, ConfDefaultInt.IDLE_TIMEOUT),
         entry.options.get(
             ConfName.ADV_PWR_CONTROL, bool(ConfDefaultFlag.ADV_PWR_CONTROL)
         ),
@@ -76,41 +117,160 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             bool(ConfDefaultFlag.ALLOW_BATTERY_ENERGY_RESET),
         ),
         entry.options.get(ConfName.SLEEP_AFTER_WRITE, ConfDefaultInt.SLEEP_AFTER_WRITE),
+        entry.options.get(ConfName.MAX_READ_GAP, ConfDefaultInt.MAX_READ_GAP),
+        entry.options.get(ConfName.PENDING_REQUESTS, ConfDefaultInt.PENDING_REQUESTS),
+        entry_id=entry.entry_id,
     )
 
-    coordinator = SolarEdgeCoordinator(
-        hass,
-        solaredge_hub,
-        entry.options.get(CONF_SCAN_INTERVAL, ConfDefaultInt.SCAN_INTERVAL),
-    )
+    scan_interval = entry.options.get(CONF_SCAN_INTERVAL, ConfDefaultInt.SCAN_INTERVAL)
+    tier_intervals = {
+        PollTier.FAST: entry.options.get(ConfName.FAST_SCAN_INTERVAL, scan_interval),
+        PollTier.MEDIUM: scan_interval,
+        PollTier.SLOW: entry.options.get(ConfName.SLOW_SCAN_INTERVAL, scan_interval),
+        PollTier.CONFIG: entry.options.get(
+            ConfName.CONFIG_SCAN_INTERVAL,
+            max(scan_interval, ConfDefaultInt.CONFIG_SCAN_INTERVAL),
+        ),
+    }
+
+    cycle_budget = entry.options.get(ConfName.CYCLE_BUDGET, ConfDefaultInt.CYCLE_BUDGET)
+    coordinators = {
+        tier: SolarEdgeCoordinator(
+            hass, solaredge_hub, tier_intervals[tier], tier, cycle_budget
+        )
+        for tier in PollTier
+    }
+    for faster, slower in zip(PollTier, list(PollTier)[1:]):
+        coordinators[faster].slower = coordinators[slower]
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "hub": solaredge_hub,
-        "coordinator": coordinator,
+        "coordinators": coordinators,
+        "proxy": None,
     }
 
-    await coordinator.async_config_entry_first_refresh()
+    for coordinator in coordinators.values():
+        await coordinator.async_config_entry_first_refresh()
+
+    proxy_port = entry.options.get(ConfName.PROXY_PORT, ConfDefaultInt.PROXY_PORT)
+    if proxy_port > 0:
+        proxy = SolarEdgeModbusProxy(
+            solaredge_hub,
+            proxy_port,
+            host=entry.options.get(ConfName.PROXY_HOST, DEFAULT_PROXY_HOST),
+            default_ttl=tier_intervals[PollTier.CONFIG],
+        )
+        try:
+            await proxy.start(
+                [
+                    (unit, address, count, tier_intervals[tier])
+                    for unit, address, count, tier in solaredge_hub.polled_blocks()
+                ]
+            )
+            hass.data[DOMAIN][entry.entry_id]["proxy"] = proxy
+
+        except OSError as e:
+            await proxy.stop()
+            _LOGGER.error(f"Could not start Modbus proxy on port {proxy_port}: {e}")
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if not hass.services.has_service(DOMAIN, SERVICE_WRITE_STORAGE_COMMAND):
+
+        async def async_write_storage_command(call: ServiceCall) -> None:
+            await _async_write_storage_command(hass, call)
+
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_WRITE_STORAGE_COMMAND,
+            async_write_storage_command,
+            schema=WRITE_STORAGE_COMMAND_SCHEMA,
+        )
+
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
 
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an old config entry."""
+    if entry.version == 1:
+        data = {**entry.data}
+        start_device_id = data.pop(ConfName.DEVICE_ID, ConfDefaultInt.DEVICE_ID)
+        number_of_inverters = data.pop(
+            ConfName.NUMBER_INVERTERS, ConfDefaultInt.NUMBER_INVERTERS
+        )
+        data[ConfName.DEVICE_LIST] = format_device_list(
+            dict.fromkeys(range(start_device_id, start_device_id + number_of_inverters))
+        )
+
+        entry.version = 2
+        hass.config_entries.async_update_entry(entry, data=data)
+        _LOGGER.debug(f"Migrated config entry to device list {data}")
+
+    return True
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     solaredge_hub = hass.data[DOMAIN][entry.entry_id]["hub"]
+    proxy = hass.data[DOMAIN][entry.entry_id]["proxy"]
+
+    if proxy is not None:
+        await proxy.stop()
+
     await solaredge_hub.shutdown()
 
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
 
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_WRITE_STORAGE_COMMAND)
+
     return unload_ok
 
 
+async def _async_write_storage_command(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Write a storage remote control command to the inverter of a device.
+
+    Values left out of the call keep their current setting, and the whole
+    command is written in a single request.
+    """
+    device = dr.async_get(hass).async_get(call.data[ATTR_DEVICE_ID])
+
+    if device is None:
+        raise HomeAssistantError(f"Unknown device {call.data[ATTR_DEVICE_ID]}")
+
+    for entry_data in hass.data[DOMAIN].values():
+        for inverter in entry_data["hub"].inverters:
+            if not inverter.device_info["identifiers"] & device.identifiers:
+                continue
+
+            if not isinstance(inverter.decoded_storage, dict):
+                raise HomeAssistantError(
+                    f"Storage control is not available on {inverter.name}"
+                )
+
+            storage = inverter.decoded_storage
+            await inverter.write_storage_command(
+                call.data["command_mode"],
+                call.data.get("command_timeout", storage["command_timeout"]),
+                call.data.get("charge_limit", storage["charge_limit"]),
+                call.data.get("discharge_limit", storage["discharge_limit"]),
+            )
+            entry_data["coordinators"][STORAGE_CONTROL.tier].async_update_listeners()
+            return
+
+    raise HomeAssistantError(f"{device.name} is not a SolarEdge inverter")
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted discovery results with the config entry."""
+    await SolarEdgeModbusMultiHub.discovery_store(hass, entry.entry_id).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle an options update."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -164,23 +324,117 @@ async def async_remove_config_entry_device(
 
 
 class SolarEdgeCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, hub, scan_interval):
+    """Coordinator of one poll tier.
+
+    Home Assistant schedules the next refresh an interval after the last
+    one finished, so ticks missed by a refresh that overran are skipped.
+    With a cycle budget, a percentage of the interval, devices of the tier
+    are degraded to the interval of the slower tier while the refresh
+    takes longer than the budget, and restored once it takes under half.
+    """
+
+    def __init__(self, hass, hub, scan_interval, tier, cycle_budget=0):
         super().__init__(
             hass,
             _LOGGER,
-            name="SolarEdge Coordinator",
+            name=f"SolarEdge {tier} Coordinator",
             update_interval=timedelta(seconds=scan_interval),
         )
         self._hub = hub
+        self._tier = tier
+        self._cycle_budget = cycle_budget
+        self._cycles = CycleMonitor(scan_interval)
+        self._overrun_warned = False
+        self._settle = 1
+        self.slower = None
+
+    @property
+    def tier(self) -> PollTier:
+        return self._tier
+
+    @property
+    def overrun_ratio(self) -> float:
+        return self._cycles.overrun_ratio
 
-        if scan_interval < 10 and not self._hub.keep_modbus_open:
-            _LOGGER.warning("Polling frequency < 10, requiring keep modbus open.")
-            self._hub.keep_modbus_open = True
+    @property
+    def cycle_time(self) -> Optional[float]:
+        return self._cycles.cycle_time
 
     async def _async_update_data(self):
+        if not self._hub.initalized:
+            return await self._async_refresh_tier()
+
+        start = time.monotonic()
+        try:
+            return await self._async_refresh_tier()
+
+        finally:
+            self._record_cycle(time.monotonic() - start)
+
+    def _record_cycle(self, duration: float) -> None:
+        cycles = self._cycles
+        skipped = cycles.record(duration)
+
+        if skipped:
+            _LOGGER.debug(
+                f"{self.name}: refresh took {duration:.1f}s, skipped {skipped} ticks"
+            )
+
+        if cycles.overrun_ratio >= CYCLE_OVERRUN_WARNING and not self._overrun_warned:
+            self._overrun_warned = True
+            _LOGGER.warning(
+                (
+                    f"{self.name}: {cycles.overrun_ratio:.0%} of refreshes take "
+                    f"longer than the {cycles.interval}s polling interval."
+                ),
+            )
+        elif cycles.overrun_ratio == 0:
+            self._overrun_warned = False
+
+        if self._cycle_budget == 0 or self.slower is None:
+            return
+
+        if self._settle > 0:
+            self._settle -= 1
+            return
+
+        budget = cycles.interval * self._cycle_budget / 100
+        divisor = max(
+            math.ceil(self.slower.update_interval.total_seconds() / cycles.interval),
+            2,
+        )
+
+        if cycles.cycle_time > budget:
+            device = self._hub.degrade_polling(self._tier, divisor)
+            if device is None:
+                return
+
+            _LOGGER.warning(
+                (
+                    f"{self.name}: refresh takes {cycles.cycle_time:.1f}s of "
+                    f"its {budget:.1f}s budget, reading {device} "
+                    f"every {divisor} refreshes."
+                ),
+            )
+
+        elif cycles.cycle_time < budget / 2:
+            device = self._hub.restore_polling(self._tier)
+            if device is None:
+                return
+
+            _LOGGER.info(f"{self.name}: reading {device} every refresh again.")
+
+        else:
+            return
+
+        # measure the new polling over a full round of the degraded devices
+        cycles.cycle_time = None
+        self._settle = divisor
+
+    async def _async_refresh_tier(self):
         try:
-            async with async_timeout.timeout(self._hub.coordinator_timeout):
-                return await self._hub.async_refresh_modbus_data()
+            async with async_timeout.timeout(self._hub.refresh_timeout([self._tier])):
+                return await self._hub.async_refresh_modbus_data(tiers=[self._tier])
 
         except HubInitFailed as e:
             raise UpdateFailed(f"{e}")
@@ -8,6 +8,8 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
+from .helpers import reads_changed, record_reads
+from .sunspec import ADVANCED_POWER_CONTROL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,7 +21,8 @@ async def async_setup_entry(
 ) -> None:
 
     hub = hass.data[DOMAIN][config_entry.entry_id]["hub"]
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    coordinators = hass.data[DOMAIN][config_entry.entry_id]["coordinators"]
+    coordinator = coordinators[ADVANCED_POWER_CONTROL.tier]
 
     entities = []
 
@@ -33,6 +36,8 @@ async def async_setup_entry(
 class SolarEdgeBinarySensorBase(CoordinatorEntity, BinarySensorEntity):
     should_poll = False
     _attr_has_entity_name = True
+    _reads = None
+    _written_available = None
 
     def __init__(self, platform, config_entry, coordinator):
         """Pass coordinator to CoordinatorEntity."""
@@ -59,7 +64,11 @@ class SolarEdgeBinarySensorBase(CoordinatorEntity, BinarySensorEntity):
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        self.async_write_ha_state()
+        if self.available is self._written_available and not reads_changed(self._reads):
+            return
+
+        self._written_available = self.available
+        self._reads = record_reads(self.async_write_ha_state)
 
 
 class AdvPowerControlEnabled(SolarEdgeBinarySensorBase):
@@ -9,7 +9,21 @@ from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, CONF_SCAN_INTER
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DEFAULT_NAME, DOMAIN, ConfDefaultFlag, ConfDefaultInt, ConfName
+from .const import (
+    DEFAULT_DEVICE_LIST,
+    DEFAULT_NAME,
+    DEFAULT_PROXY_HOST,
+    DEFAULT_SCAN_RANGE,
+    DEFAULT_SCAN_TIMEOUT,
+    DOMAIN,
+    MAX_INVERTERS,
+    MAX_PENDING_REQUESTS,
+    ConfDefaultFlag,
+    ConfDefaultInt,
+    ConfName,
+)
+from .helpers import format_device_list, parse_device_list
+from .hub import SolarEdgeModbusMultiHub
 
 
 def host_valid(host):
@@ -22,6 +36,24 @@ def host_valid(host):
         return all(x and not disallowed.search(x) for x in host.split("."))
 
 
+def ip_address_valid(address):
+    """Return True if the address is an IPv4 or IPv6 address."""
+    try:
+        ipaddress.ip_address(address)
+        return True
+    except ValueError:
+        return False
+
+
+def device_list_valid(device_list):
+    """Return True if the list of unit IDs can be parsed."""
+    try:
+        parse_device_list(device_list)
+        return True
+    except ValueError:
+        return False
+
+
 @callback
 def solaredge_modbus_multi_entries(hass: HomeAssistant):
     """Return the hosts already configured."""
@@ -33,7 +65,7 @@ def solaredge_modbus_multi_entries(hass: HomeAssistant):
 class SolaredgeModbusMultiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Solaredge Modbus configflow."""
 
-    VERSION = 1
+    VERSION = 2
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_POLL
 
     @staticmethod
@@ -47,6 +79,11 @@ class SolaredgeModbusMultiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return True
         return False
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._user_input = None
+        self._topology = None
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         errors = {}
@@ -61,32 +98,40 @@ class SolaredgeModbusMultiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors[CONF_PORT] = "invalid_tcp_port"
             elif user_input[CONF_PORT] > 65535:
                 errors[CONF_PORT] = "invalid_tcp_port"
-            elif user_input[ConfName.DEVICE_ID] > 247:
-                errors[ConfName.DEVICE_ID] = "max_device_id"
-            elif user_input[ConfName.DEVICE_ID] < 1:
-                errors[ConfName.DEVICE_ID] = "min_device_id"
-            elif user_input[ConfName.NUMBER_INVERTERS] > 32:
-                errors[ConfName.NUMBER_INVERTERS] = "max_inverters"
-            elif user_input[ConfName.NUMBER_INVERTERS] < 1:
-                errors[ConfName.NUMBER_INVERTERS] = "min_inverters"
+            elif not device_list_valid(user_input[ConfName.DEVICE_LIST]):
+                errors[ConfName.DEVICE_LIST] = "invalid_device_list"
             elif (
-                user_input[ConfName.NUMBER_INVERTERS] + user_input[ConfName.DEVICE_ID]
-                > 247
+                len(parse_device_list(user_input[ConfName.DEVICE_LIST])) > MAX_INVERTERS
             ):
-                errors[ConfName.NUMBER_INVERTERS] = "too_many_inverters"
+                errors[ConfName.DEVICE_LIST] = "max_inverters"
+            elif user_input.pop(ConfName.SCAN_DEVICES, False) is True:
+                self._user_input = user_input
+                return await self.async_step_scan()
             else:
+                user_input[ConfName.DEVICE_LIST] = format_device_list(
+                    parse_device_list(user_input[ConfName.DEVICE_LIST])
+                )
+
+                if (
+                    self._topology is not None
+                    and self._topology["config"]["device_list"]
+                    == user_input[ConfName.DEVICE_LIST]
+                ):
+                    user_input[ConfName.TOPOLOGY] = self._topology
+
                 await self.async_set_unique_id(user_input[CONF_HOST])
                 self._abort_if_unique_id_configured()
                 return self.async_create_entry(
                     title=user_input[CONF_NAME], data=user_input
                 )
+        elif self._user_input is not None:
+            user_input = self._user_input
         else:
             user_input = {
                 CONF_NAME: DEFAULT_NAME,
                 CONF_HOST: "",
                 CONF_PORT: ConfDefaultInt.PORT,
-                ConfName.NUMBER_INVERTERS: ConfDefaultInt.NUMBER_INVERTERS,
-                ConfName.DEVICE_ID: ConfDefaultInt.DEVICE_ID,
+                ConfName.DEVICE_LIST: DEFAULT_DEVICE_LIST,
             }
 
         return self.async_show_form(
@@ -99,13 +144,87 @@ class SolaredgeModbusMultiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         int
                     ),
                     vol.Required(
-                        f"{ConfName.NUMBER_INVERTERS}",
-                        default=user_input[ConfName.NUMBER_INVERTERS],
-                    ): vol.Coerce(int),
+                        f"{ConfName.DEVICE_LIST}",
+                        default=user_input[ConfName.DEVICE_LIST],
+                    ): cv.string,
+                    vol.Optional(f"{ConfName.SCAN_DEVICES}", default=False): cv.boolean,
+                },
+            ),
+            errors=errors,
+        )
+
+    async def async_step_scan(self, user_input=None) -> FlowResult:
+        """Scan a range of device IDs for inverters, meters and batteries."""
+        errors = {}
+
+        if user_input is not None:
+            if not device_list_valid(user_input[ConfName.SCAN_RANGE]):
+                errors[ConfName.SCAN_RANGE] = "invalid_device_list"
+            elif not 0.1 <= user_input[ConfName.SCAN_TIMEOUT] <= 10:
+                errors[ConfName.SCAN_TIMEOUT] = "invalid_scan_timeout"
+            elif not 1 <= user_input[ConfName.PENDING_REQUESTS] <= MAX_PENDING_REQUESTS:
+                errors[ConfName.PENDING_REQUESTS] = "invalid_pending_requests"
+            else:
+                hub = SolarEdgeModbusMultiHub(
+                    self.hass,
+                    self._user_input[CONF_NAME],
+                    self._user_input[CONF_HOST],
+                    self._user_input[CONF_PORT],
+                    format_device_list(
+                        dict.fromkeys(
+                            parse_device_list(user_input[ConfName.SCAN_RANGE])
+                        )
+                    ),
+                    detect_meters=True,
+                    detect_batteries=True,
+                    pending_requests=user_input[ConfName.PENDING_REQUESTS],
+                    request_timeout=user_input[ConfName.SCAN_TIMEOUT],
+                )
+                found = None
+
+                try:
+                    await hub.connect()
+                    if hub.is_socket_open():
+                        found = await hub.async_scan_devices()
+
+                finally:
+                    await hub.shutdown()
+
+                if found is None:
+                    errors["base"] = "cannot_connect"
+                elif not found:
+                    errors["base"] = "no_devices_found"
+                elif len(found) > MAX_INVERTERS:
+                    errors["base"] = "max_inverters"
+                else:
+                    self._topology = hub.topology
+                    self._user_input[ConfName.DEVICE_LIST] = format_device_list(found)
+                    return await self.async_step_user()
+
+        else:
+            user_input = {
+                ConfName.SCAN_RANGE: DEFAULT_SCAN_RANGE,
+                ConfName.SCAN_TIMEOUT: DEFAULT_SCAN_TIMEOUT,
+                ConfName.PENDING_REQUESTS: ConfDefaultInt.PENDING_REQUESTS,
+            }
+
+        return self.async_show_form(
+            step_id="scan",
+            data_schema=vol.Schema(
+                {
                     vol.Required(
-                        f"{ConfName.DEVICE_ID}", default=user_input[ConfName.DEVICE_ID]
+                        f"{ConfName.SCAN_RANGE}",
+                        default=user_input[ConfName.SCAN_RANGE],
+                    ): cv.string,
+                    vol.Required(
+                        f"{ConfName.SCAN_TIMEOUT}",
+                        default=user_input[ConfName.SCAN_TIMEOUT],
+                    ): vol.Coerce(float),
+                    vol.Required(
+                        f"{ConfName.PENDING_REQUESTS}",
+                        default=user_input[ConfName.PENDING_REQUESTS],
                     ): vol.Coerce(int),
-                },
+                }
             ),
             errors=errors,
         )
@@ -126,6 +245,40 @@ class SolaredgeModbusMultiOptionsFlowHandler(config_entries.OptionsFlow):
                 errors[CONF_SCAN_INTERVAL] = "invalid_scan_interval"
             elif user_input[CONF_SCAN_INTERVAL] > 86400:
                 errors[CONF_SCAN_INTERVAL] = "invalid_scan_interval"
+            elif user_input[ConfName.FAST_SCAN_INTERVAL] < 1:
+                errors[ConfName.FAST_SCAN_INTERVAL] = "invalid_scan_interval"
+            elif user_input[ConfName.FAST_SCAN_INTERVAL] > 86400:
+                errors[ConfName.FAST_SCAN_INTERVAL] = "invalid_scan_interval"
+            elif user_input[ConfName.SLOW_SCAN_INTERVAL] < 1:
+                errors[ConfName.SLOW_SCAN_INTERVAL] = "invalid_scan_interval"
+            elif user_input[ConfName.SLOW_SCAN_INTERVAL] > 86400:
+                errors[ConfName.SLOW_SCAN_INTERVAL] = "invalid_scan_interval"
+            elif user_input[ConfName.CONFIG_SCAN_INTERVAL] < 1:
+                errors[ConfName.CONFIG_SCAN_INTERVAL] = "invalid_scan_interval"
+            elif user_input[ConfName.CONFIG_SCAN_INTERVAL] > 86400:
+                errors[ConfName.CONFIG_SCAN_INTERVAL] = "invalid_scan_interval"
+            elif user_input[ConfName.IDLE_TIMEOUT] < 0:
+                errors[ConfName.IDLE_TIMEOUT] = "invalid_idle_timeout"
+            elif user_input[ConfName.IDLE_TIMEOUT] > 3600:
+                errors[ConfName.IDLE_TIMEOUT] = "invalid_idle_timeout"
+            elif user_input[ConfName.CYCLE_BUDGET] < 0:
+                errors[ConfName.CYCLE_BUDGET] = "invalid_cycle_budget"
+            elif user_input[ConfName.CYCLE_BUDGET] > 100:
+                errors[ConfName.CYCLE_BUDGET] = "invalid_cycle_budget"
+            elif user_input[ConfName.MAX_READ_GAP] < 0:
+                errors[ConfName.MAX_READ_GAP] = "invalid_read_gap"
+            elif user_input[ConfName.MAX_READ_GAP] > 124:
+                errors[ConfName.MAX_READ_GAP] = "invalid_read_gap"
+            elif user_input[ConfName.PENDING_REQUESTS] < 1:
+                errors[ConfName.PENDING_REQUESTS] = "invalid_pending_requests"
+            elif user_input[ConfName.PENDING_REQUESTS] > MAX_PENDING_REQUESTS:
+                errors[ConfName.PENDING_REQUESTS] = "invalid_pending_requests"
+            elif user_input[ConfName.PROXY_PORT] < 0:
+                errors[ConfName.PROXY_PORT] = "invalid_proxy_port"
+            elif user_input[ConfName.PROXY_PORT] > 65535:
+                errors[ConfName.PROXY_PORT] = "invalid_proxy_port"
+            elif not ip_address_valid(user_input[ConfName.PROXY_HOST]):
+                errors[ConfName.PROXY_HOST] = "invalid_proxy_host"
             else:
                 if user_input[ConfName.ADV_PWR_CONTROL] is True:
                     self.init_info = user_input
@@ -134,16 +287,27 @@ class SolaredgeModbusMultiOptionsFlowHandler(config_entries.OptionsFlow):
                     return self.async_create_entry(title="", data=user_input)
 
         else:
+            scan_interval = self.config_entry.options.get(
+                CONF_SCAN_INTERVAL, ConfDefaultInt.SCAN_INTERVAL
+            )
             user_input = {
-                CONF_SCAN_INTERVAL: self.config_entry.options.get(
-                    CONF_SCAN_INTERVAL, ConfDefaultInt.SCAN_INTERVAL
+                CONF_SCAN_INTERVAL: scan_interval,
+                ConfName.FAST_SCAN_INTERVAL: self.config_entry.options.get(
+                    ConfName.FAST_SCAN_INTERVAL, scan_interval
+                ),
+                ConfName.SLOW_SCAN_INTERVAL: self.config_entry.options.get(
+                    ConfName.SLOW_SCAN_INTERVAL, scan_interval
+                ),
+                ConfName.CONFIG_SCAN_INTERVAL: self.config_entry.options.get(
+                    ConfName.CONFIG_SCAN_INTERVAL,
+                    max(scan_interval, ConfDefaultInt.CONFIG_SCAN_INTERVAL),
                 ),
                 ConfName.SINGLE_DEVICE_ENTITY: self.config_entry.options.get(
                     ConfName.SINGLE_DEVICE_ENTITY,
                     bool(ConfDefaultFlag.SINGLE_DEVICE_ENTITY),
                 ),
-                ConfName.KEEP_MODBUS_OPEN: self.config_entry.options.get(
-                    ConfName.KEEP_MODBUS_OPEN, bool(ConfDefaultFlag.KEEP_MODBUS_OPEN)
+                ConfName.IDLE_TIMEOUT: self.config_entry.options.get(
+                    ConfName.IDLE_TIMEOUT, ConfDefaultInt.IDLE_TIMEOUT
                 ),
                 ConfName.DETECT_METERS: self.config_entry.options.get(
                     ConfName.DETECT_METERS, bool(ConfDefaultFlag.DETECT_METERS)
@@ -158,6 +322,21 @@ class SolaredgeModbusMultiOptionsFlowHandler(config_entries.OptionsFlow):
                     ConfName.ALLOW_BATTERY_ENERGY_RESET,
                     bool(ConfDefaultFlag.ALLOW_BATTERY_ENERGY_RESET),
                 ),
+                ConfName.CYCLE_BUDGET: self.config_entry.options.get(
+                    ConfName.CYCLE_BUDGET, ConfDefaultInt.CYCLE_BUDGET
+                ),
+                ConfName.MAX_READ_GAP: self.config_entry.options.get(
+                    ConfName.MAX_READ_GAP, ConfDefaultInt.MAX_READ_GAP
+                ),
+                ConfName.PENDING_REQUESTS: self.config_entry.options.get(
+                    ConfName.PENDING_REQUESTS, ConfDefaultInt.PENDING_REQUESTS
+                ),
+                ConfName.PROXY_PORT: self.config_entry.options.get(
+                    ConfName.PROXY_PORT, ConfDefaultInt.PROXY_PORT
+                ),
+                ConfName.PROXY_HOST: self.config_entry.options.get(
+                    ConfName.PROXY_HOST, DEFAULT_PROXY_HOST
+                ),
             }
 
         return self.async_show_form(
@@ -168,14 +347,26 @@ class SolaredgeModbusMultiOptionsFlowHandler(config_entries.OptionsFlow):
                         CONF_SCAN_INTERVAL,
                         default=user_input[CONF_SCAN_INTERVAL],
                     ): vol.Coerce(int),
+                    vol.Optional(
+                        f"{ConfName.FAST_SCAN_INTERVAL}",
+                        default=user_input[ConfName.FAST_SCAN_INTERVAL],
+                    ): vol.Coerce(int),
+                    vol.Optional(
+                        f"{ConfName.SLOW_SCAN_INTERVAL}",
+                        default=user_input[ConfName.SLOW_SCAN_INTERVAL],
+                    ): vol.Coerce(int),
+                    vol.Optional(
+                        f"{ConfName.CONFIG_SCAN_INTERVAL}",
+                        default=user_input[ConfName.CONFIG_SCAN_INTERVAL],
+                    ): vol.Coerce(int),
                     vol.Optional(
                         f"{ConfName.SINGLE_DEVICE_ENTITY}",
                         default=user_input[ConfName.SINGLE_DEVICE_ENTITY],
                     ): cv.boolean,
                     vol.Optional(
-                        f"{ConfName.KEEP_MODBUS_OPEN}",
-                        default=user_input[ConfName.KEEP_MODBUS_OPEN],
-                    ): cv.boolean,
+                        f"{ConfName.IDLE_TIMEOUT}",
+                        default=user_input[ConfName.IDLE_TIMEOUT],
+                    ): vol.Coerce(int),
                     vol.Optional(
                         f"{ConfName.DETECT_METERS}",
                         default=user_input[ConfName.DETECT_METERS],
@@ -192,6 +383,26 @@ class SolaredgeModbusMultiOptionsFlowHandler(config_entries.OptionsFlow):
                         f"{ConfName.ALLOW_BATTERY_ENERGY_RESET}",
                         default=user_input[ConfName.ALLOW_BATTERY_ENERGY_RESET],
                     ): cv.boolean,
+                    vol.Optional(
+                        f"{ConfName.CYCLE_BUDGET}",
+                        default=user_input[ConfName.CYCLE_BUDGET],
+                    ): vol.Coerce(int),
+                    vol.Optional(
+                        f"{ConfName.MAX_READ_GAP}",
+                        default=user_input[ConfName.MAX_READ_GAP],
+                    ): vol.Coerce(int),
+                    vol.Optional(
+                        f"{ConfName.PENDING_REQUESTS}",
+                        default=user_input[ConfName.PENDING_REQUESTS],
+                    ): vol.Coerce(int),
+                    vol.Optional(
+                        f"{ConfName.PROXY_PORT}",
+                        default=user_input[ConfName.PROXY_PORT],
+                    ): vol.Coerce(int),
+                    vol.Optional(
+                        f"{ConfName.PROXY_HOST}",
+                        default=user_input[ConfName.PROXY_HOST],
+                    ): cv.string,
                 },
             ),
             errors=errors,
@@ -0,0 +1,197 @@
+"""Lifecycle of the Modbus/TCP connection to the inverter.
+
+The hub, writes and the Modbus proxy share a single connection. It is
+opened on demand and closed once it has been idle for the idle timeout, so
+other clients can connect between polls, while polls more frequent than
+the timeout reuse it. An idle connection that stays open is checked with a
+read from the hub, and TCP keepalive is enabled, so a half-open socket is
+noticed before a poll runs into it. Failed connection attempts are retried
+with a growing backoff.
+"""
+import asyncio
+import contextlib
+import logging
+import socket
+import time
+from typing import Awaitable, Callable, Optional
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from .const import (
+    CONNECTION_LIVENESS_INTERVAL,
+    CONNECTION_RETRY_BACKOFF,
+    CONNECTION_RETRY_MAX_BACKOFF,
+    TCP_KEEPALIVE_COUNT,
+    TCP_KEEPALIVE_IDLE,
+    TCP_KEEPALIVE_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ModbusTcpClient(AsyncModbusTcpClient):
+    """Async client that leaves reconnecting to the ConnectionManager."""
+
+    async def _reconnect(self):
+        return None
+
+
+class ConnectionManager:
+    """Open, reuse, check and close the Modbus/TCP connection.
+
+    With an idle_timeout of 0 the connection is never closed for being
+    idle. The probe is the read used for liveness checks, which the hub
+    sends through its own read path so it takes a request slot and a
+    round trip sample like any other read. Without a probe, idle
+    connections are not checked.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        idle_timeout: float,
+        request_timeout: Optional[float] = None,
+        probe: Optional[Callable[[], Awaitable]] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+        self.probe = probe
+        self.client = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._active = 0
+        self._last_used = 0.0
+        self._watchdog = None
+
+    @property
+    def connected(self) -> bool:
+        return self.client is not None and self.client.connected
+
+    async def connect(self) -> None:
+        """Open the connection unless it is open or a retry isn't due."""
+        async with self._lock:
+            if self.connected or time.monotonic() < self.retry_at:
+                return
+
+            await self._async_close_client()
+
+            kwargs = {}
+            if self.request_timeout is not None:
+                kwargs["timeout"] = self.request_timeout
+
+            client = ModbusTcpClient(host=self.host, port=self.port, **kwargs)
+            await client.connect()
+
+            if not client.connected:
+                self.failures += 1
+                delay = min(
+                    CONNECTION_RETRY_BACKOFF * 2 ** (self.failures - 1),
+                    CONNECTION_RETRY_MAX_BACKOFF,
+                )
+                self.retry_at = time.monotonic() + delay
+                await client.close()
+                _LOGGER.debug(
+                    f"Connection to {self.host}:{self.port} failed, retry in {delay}s"
+                )
+                return
+
+            self.client = client
+            self.failures = 0
+            self.retry_at = 0.0
+            self._last_used = time.monotonic()
+            self._enable_keepalive()
+            self._watchdog = asyncio.create_task(self._async_watchdog())
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._async_close_client()
+
+    async def _async_close_client(self) -> None:
+        if self._watchdog is not None:
+            if self._watchdog is not asyncio.current_task():
+                self._watchdog.cancel()
+            self._watchdog = None
+
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    @contextlib.asynccontextmanager
+    async def request(self):
+        """Use the client for a request, keeping the connection from idling."""
+        if self.client is None:
+            raise ConnectionException(f"Not connected to {self.host}:{self.port}")
+
+        self._active += 1
+        try:
+            yield self.client
+
+        finally:
+            self._active -= 1
+            self._last_used = time.monotonic()
+
+    def _enable_keepalive(self) -> None:
+        sock = self.client.protocol.transport.get_extra_info("socket")
+
+        if sock is None:
+            return
+
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        for option, value in (
+            ("TCP_KEEPIDLE", TCP_KEEPALIVE_IDLE),
+            ("TCP_KEEPINTVL", TCP_KEEPALIVE_INTERVAL),
+            ("TCP_KEEPCNT", TCP_KEEPALIVE_COUNT),
+        ):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+    async def _async_probe(self) -> bool:
+        """Check that the inverter still answers on the connection."""
+        try:
+            result = await self.probe()
+
+        except (ConnectionException, asyncio.TimeoutError) as e:
+            _LOGGER.debug(f"Liveness check failed: {e}")
+            return False
+
+        # any response, even an exception, shows the connection is alive
+        return type(result) is not ModbusIOException
+
+    async def _async_watchdog(self) -> None:
+        """Close the connection when idle or found dead."""
+        while self.connected:
+            now = time.monotonic()
+            idle = now - self._last_used
+
+            if self._active == 0:
+                if 0 < self.idle_timeout <= idle:
+                    _LOGGER.debug(f"Closing connection idle for {idle:.0f}s")
+                    await self.close()
+                    return
+
+                if (
+                    self.probe is not None
+                    and idle >= CONNECTION_LIVENESS_INTERVAL
+                    and not await self._async_probe()
+                ):
+                    _LOGGER.warning(
+                        f"Connection to {self.host}:{self.port} is not responding."
+                    )
+                    await self.close()
+                    return
+
+            deadlines = [self._last_used + CONNECTION_LIVENESS_INTERVAL]
+            if self.idle_timeout > 0:
+                deadlines.append(self._last_used + self.idle_timeout)
+
+            await asyncio.sleep(max(min(deadlines) - time.monotonic(), 0.1))
+
+        async with self._lock:
+            if self._watchdog is asyncio.current_task():
+                self._watchdog = None
@@ -18,6 +18,64 @@ else:
 
 DOMAIN = "solaredge_modbus_multi"
 DEFAULT_NAME = "SolarEdge"
+DEFAULT_DEVICE_LIST = "1"
+DEFAULT_SCAN_RANGE = "1-32"
+DEFAULT_SCAN_TIMEOUT = 0.5
+DEFAULT_PROXY_HOST = "127.0.0.1"
+MAX_INVERTERS = 32
+TOPOLOGY_STORAGE_VERSION = 1
+SERVICE_WRITE_STORAGE_COMMAND = "write_storage_command"
+
+# requests in flight on the Modbus/TCP connection, matched by transaction id,
+# when pipelining is enabled; not every gateway answers pipelined requests
+MAX_PENDING_REQUESTS = 8
+
+# unit IDs probed at a time during discovery, their requests still take turns
+# on the connection
+DISCOVERY_PROBES = 4
+
+# bounds of the request timeout in seconds, which adapts to the round-trip
+# times of each unit ID in between, and the requests per unit ID budgeted
+# for the refresh that discovers the devices
+REQUEST_TIMEOUT = 3
+REQUEST_MIN_TIMEOUT = 0.3
+DISCOVERY_REQUESTS = 16
+
+# seconds between read-backs of written registers until they hold the value
+WRITE_VERIFY_INTERVAL = 0.2
+
+# seconds to collect writes to a unit ID before sending them, merging ranges
+WRITE_COALESCE_WINDOW = 0.05
+
+# seconds a number slider has to settle before its last value is written
+NUMBER_DEBOUNCE_WINDOW = 0.5
+
+# seconds before reconnecting after a failed attempt, doubled for each further one
+CONNECTION_RETRY_BACKOFF = 1
+CONNECTION_RETRY_MAX_BACKOFF = 60
+
+# seconds an open connection may be idle before it is checked with a read
+CONNECTION_LIVENESS_INTERVAL = 60
+
+# TCP keepalive idle time and probe interval in seconds, and probe count
+TCP_KEEPALIVE_IDLE = 30
+TCP_KEEPALIVE_INTERVAL = 10
+TCP_KEEPALIVE_COUNT = 3
+
+# seconds before retrying a failed device, doubled for each further failure
+DEVICE_RETRY_BACKOFF = 10
+DEVICE_RETRY_MAX_BACKOFF = 600
+
+# refreshes of a poll tier over which the overrun ratio is measured, and the
+# ratio at which overruns are warned about
+CYCLE_WINDOW = 20
+CYCLE_OVERRUN_WARNING = 0.5
+
+# consecutive timeouts that open the circuit breaker of a unit ID, and the
+# seconds before probing it again, doubled for each failed probe
+UNIT_BREAKER_THRESHOLD = 2
+UNIT_PROBE_BACKOFF = 10
+UNIT_PROBE_MAX_BACKOFF = 600
 
 # units missing in homeassistant core
 ENERGY_VOLT_AMPERE_HOUR: Final = "VAh"
@@ -35,16 +93,21 @@ class BatteryLimit(IntEnum):
 
 class ConfDefaultInt(IntEnum):
     SCAN_INTERVAL = 300
+    CONFIG_SCAN_INTERVAL = 300
     PORT = 1502
     NUMBER_INVERTERS = 1
     DEVICE_ID = 1
     SLEEP_AFTER_WRITE = 3
+    MAX_READ_GAP = 16
+    PENDING_REQUESTS = 1
+    PROXY_PORT = 0
+    IDLE_TIMEOUT = 10
+    CYCLE_BUDGET = 0
 
 
 class ConfDefaultFlag(IntEnum):
     DETECT_METERS = 1
     DETECT_BATTERIES = 0
-    KEEP_MODBUS_OPEN = 0
     SINGLE_DEVICE_ENTITY = 1
     ADV_PWR_CONTROL = 0
     ADV_STORAGE_CONTROL = 0
@@ -55,15 +118,41 @@ class ConfDefaultFlag(IntEnum):
 class ConfName(StrEnum):
     NUMBER_INVERTERS = "number_of_inverters"
     DEVICE_ID = "device_id"
+    DEVICE_LIST = "device_list"
+    SCAN_DEVICES = "scan_devices"
+    SCAN_RANGE = "scan_range"
+    SCAN_TIMEOUT = "scan_timeout"
+    TOPOLOGY = "topology"
     DETECT_METERS = "detect_meters"
     DETECT_BATTERIES = "detect_batteries"
     SINGLE_DEVICE_ENTITY = "single_device_entity"
     KEEP_MODBUS_OPEN = "keep_modbus_open"
+    IDLE_TIMEOUT = "idle_timeout"
+    CYCLE_BUDGET = "cycle_budget"
     ADV_PWR_CONTROL = "advanced_power_control"
     ADV_STORAGE_CONTROL = "adv_storage_control"
     ADV_SITE_LIMIT_CONTROL = "adv_site_limit_control"
     ALLOW_BATTERY_ENERGY_RESET = "allow_battery_energy_reset"
     SLEEP_AFTER_WRITE = "sleep_after_write"
+    MAX_READ_GAP = "max_read_gap"
+    PENDING_REQUESTS = "pending_requests"
+    FAST_SCAN_INTERVAL = "fast_scan_interval"
+    SLOW_SCAN_INTERVAL = "slow_scan_interval"
+    CONFIG_SCAN_INTERVAL = "config_scan_interval"
+    PROXY_PORT = "proxy_port"
+    PROXY_HOST = "proxy_host"
+
+
+class ModbusLimit(IntEnum):
+    MAX_READ_COUNT = 125
+    MAX_WRITE_COUNT = 123
+
+
+class PollTier(StrEnum):
+    FAST = "fast"  # site meters
+    MEDIUM = "medium"  # inverter AC/DC and MMPPT units
+    SLOW = "slow"  # batteries, global power control status
+    CONFIG = "config"  # export limits, storage and power control settings
 
 
 class SunSpecAccum(IntEnum):
@@ -131,6 +220,14 @@ DEVICE_STATUS = {
     8: "Maintenance",
 }
 
+# I_Status values of an inverter that is asleep for the night, which is then
+# only polled for its status, and of one that is producing again
+INVERTER_SLEEP_STATUS = [2, 8]
+INVERTER_PRODUCTION_STATUS = [4, 5]
+
+# inverter poll tiers replaced by the status read while asleep
+INVERTER_SLEEP_TIERS = [PollTier.MEDIUM, PollTier.SLOW]
+
 VENDOR_STATUS = {
     SunSpecNotImpl.INT16: None,
     0: "No Error",
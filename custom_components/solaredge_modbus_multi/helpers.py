@@ -1,4 +1,24 @@
+import asyncio
+import contextlib
+import contextvars
+import re
 import struct
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+from .const import (
+    CYCLE_WINDOW,
+    DEVICE_RETRY_BACKOFF,
+    DEVICE_RETRY_MAX_BACKOFF,
+    REQUEST_MIN_TIMEOUT,
+    REQUEST_TIMEOUT,
+    UNIT_BREAKER_THRESHOLD,
+    UNIT_PROBE_BACKOFF,
+    UNIT_PROBE_MAX_BACKOFF,
+    ModbusLimit,
+    SunSpecNotImpl,
+)
 
 
 def scale_factor(value: int, sf: int):
@@ -22,6 +42,97 @@ def parse_modbus_string(s: str) -> str:
     return str(s)
 
 
+SUNSPEC_NOT_IMPL = {
+    "H": SunSpecNotImpl.UINT16,
+    "h": SunSpecNotImpl.INT16,
+    "I": SunSpecNotImpl.UINT32,
+    "i": SunSpecNotImpl.INT32,
+    "f": SunSpecNotImpl.FLOAT32,
+}
+
+
+class RegisterBlock:
+    """Register block layout compiled into a single struct format.
+
+    Fields are (name, format) pairs with struct format characters: "H", "h",
+    "I", "i", "f" and "Q" for numbers, "<n>s" for strings and "<n>x" for
+    padding, which has no value. Strings are cleaned with
+    parse_modbus_string. With word_swap the registers of multi-register
+    numbers are in reverse order, like the pymodbus Endian.Little wordorder.
+
+    The address is where the block starts, relative to the device base
+    address for blocks of devices without a fixed location, and tier is the
+    poll tier the block is read in.
+    """
+
+    def __init__(
+        self, fields, word_swap: bool = False, address: int = 0, tier=None
+    ) -> None:
+        self.fields = []
+        self.address = address
+        self.tier = tier
+        self.word_swap = word_swap
+        self._strings = []
+        self._offsets = {}
+        self._formats = {}
+        order = []
+
+        for name, code in fields:
+            words = struct.calcsize(f">{code}") // 2
+            registers = list(range(len(order), len(order) + words))
+
+            if word_swap and code[-1] in "IifQ":
+                registers.reverse()
+
+            if not code.endswith("x"):
+                self.fields.append(name)
+                self._strings.append(code.endswith("s"))
+                self._offsets[name] = len(order)
+                self._formats[name] = code
+
+            order.extend(registers)
+
+        self.count = len(order)
+        self._order = order if order != sorted(order) else None
+        self._words = struct.Struct(f">{self.count}H")
+        self._struct = struct.Struct(">" + "".join(code for _, code in fields))
+
+    def decode(self, registers) -> list:
+        """Decode registers into a list of (name, value) pairs."""
+        if self._order is not None:
+            registers = [registers[i] for i in self._order]
+
+        values = self._struct.unpack(self._words.pack(*registers))
+
+        return [
+            (name, parse_modbus_string(value) if is_string else value)
+            for name, is_string, value in zip(self.fields, self._strings, values)
+        ]
+
+    def encode(self, name: str, value) -> list:
+        """Encode a field value into the registers to write at its address."""
+        code = self._formats[name]
+        data = struct.pack(f">{code}", value)
+        registers = list(struct.unpack(f">{len(data) // 2}H", data))
+
+        if self.word_swap and code[-1] in "IifQ":
+            registers.reverse()
+
+        return registers
+
+    def span(self, base: int = 0) -> tuple:
+        """Return the (address, count) range of the block."""
+        return (base + self.address, self.count)
+
+    def address_of(self, name: str, base: int = 0) -> int:
+        """Return the register address of a field."""
+        return base + self.address + self._offsets[name]
+
+    def not_implemented(self, name: str):
+        """Return the SunSpec not implemented value of a field, if it has one."""
+        return SUNSPEC_NOT_IMPL.get(self._formats[name])
+
+
 def update_accum(self, accum_value: int) -> None:
 
     if self.last is None:
@@ -37,3 +148,524 @@ def update_accum(self, accum_value: int) -> None:
         return accum_value
     else:
         raise ValueError("update_accum must be an increasing value.")
+
+
+def compile_read_plan(
+    ranges, max_gap: int = 0, max_count: int = ModbusLimit.MAX_READ_COUNT
+) -> list:
+    """Merge (address, count) ranges into the fewest holding register reads.
+
+    Ranges closer than max_gap registers are merged as long as the merged
+    read stays within max_count registers. Returns a list of
+    (address, count, members) tuples, where members are the original ranges
+    served by that read.
+    """
+    plan = []
+
+    for address, count in sorted(set(ranges)):
+        if plan:
+            start, length, members = plan[-1]
+            end = max(start + length, address + count)
+
+            if address - (start + length) <= max_gap and end - start <= max_count:
+                plan[-1] = (start, end - start, members + [(address, count)])
+                continue
+
+        plan.append((address, count, [(address, count)]))
+
+    return plan
+
+
+_DEVICE_LIST_ENTRY = re.compile(r"(\d+)(?:-(\d+))?(?::(-|(?:[mb]\d)+))?")
+
+
+def coalesce_writes(requests, max_count: int = ModbusLimit.MAX_WRITE_COUNT) -> list:
+    """Merge write requests to one unit ID into contiguous register runs.
+
+    Ranges that are adjacent or overlap are written together, with later
+    requests taking precedence where they overlap. Returns a list of
+    (address, payload, members) tuples, where members are the indexes of
+    the requests written by the run.
+    """
+    registers = {}
+
+    for request in requests:
+        for offset, value in enumerate(request.payload):
+            registers[request.address + offset] = value
+
+    runs = []
+
+    for register in sorted(registers):
+        if (
+            runs
+            and register == runs[-1][0] + len(runs[-1][1])
+            and len(runs[-1][1]) < max_count
+        ):
+            runs[-1][1].append(registers[register])
+        else:
+            runs.append((register, [registers[register]], []))
+
+    for index, request in enumerate(requests):
+        for address, payload, members in runs:
+            if address < request.address + len(
+                request.payload
+            ) and request.address < address + len(payload):
+                members.append(index)
+
+    return runs
+
+
+def parse_device_list(text: str) -> OrderedDict:
+    """Parse a list of inverter unit IDs with optional device hints.
+
+    Entries are separated by commas and are a unit ID or an inclusive
+    "first-last" range, optionally followed by ":" and the meters and
+    batteries behind it, like "1:m1b1, 3, 5-7:-". A "-" declares that
+    there are none. Returns the units in order, each with None when its
+    devices should be detected, or a dict of "meters" and "batteries" IDs.
+    """
+    units = OrderedDict()
+
+    for entry in text.replace(" ", "").lower().split(","):
+        if not entry:
+            continue
+
+        match = _DEVICE_LIST_ENTRY.fullmatch(entry)
+        if match is None:
+            raise ValueError(f"Invalid entry {entry}")
+
+        first, last, hints = match.groups()
+        first = int(first)
+        last = first if last is None else int(last)
+
+        if not 1 <= first <= last <= 247:
+            raise ValueError(f"Invalid unit ID range {entry}")
+
+        if hints is not None:
+            devices = re.findall(r"([mb])(\d)", hints)
+            hints = {
+                "meters": [int(n) for kind, n in devices if kind == "m"],
+                "batteries": [int(n) for kind, n in devices if kind == "b"],
+            }
+
+            if not set(hints["meters"]) <= {1, 2, 3}:
+                raise ValueError(f"Invalid meter ID in {entry}")
+
+            if not set(hints["batteries"]) <= {1, 2}:
+                raise ValueError(f"Invalid battery ID in {entry}")
+
+        for unit in range(first, last + 1):
+            if unit in units:
+                raise ValueError(f"Duplicate unit ID {unit}")
+
+            units[unit] = hints
+
+    if not units:
+        raise ValueError("No unit IDs")
+
+    return units
+
+
+def format_device_list(units) -> str:
+    """Format units as parsed by parse_device_list, merging ranges."""
+    entries = []
+
+    for unit, hints in units.items():
+        if hints is None:
+            suffix = ""
+        elif not hints["meters"] and not hints["batteries"]:
+            suffix = ":-"
+        else:
+            suffix = ":" + "".join(
+                [f"m{meter_id}" for meter_id in sorted(hints["meters"])]
+                + [f"b{battery_id}" for battery_id in sorted(hints["batteries"])]
+            )
+
+        if entries and entries[-1][1] == unit - 1 and entries[-1][2] == suffix:
+            entries[-1][1] = unit
+        else:
+            entries.append([unit, unit, suffix])
+
+    return ", ".join(
+        f"{first}{suffix}" if first == last else f"{first}-{last}{suffix}"
+        for first, last, suffix in entries
+    )
+
+
+# decoded values read by the entity state being written, see record_reads
+_read_capture = contextvars.ContextVar("read_capture", default=None)
+
+
+class ChangeTracker:
+    """Track which register blocks and decoded values of a device changed.
+
+    Blocks whose raw registers match the last successful read don't need to
+    be decoded again. Decoded values are compared once a refresh completes,
+    and each changed value is stamped with the serial of that refresh.
+    """
+
+    def __init__(self) -> None:
+        self._blocks = {}
+        self._pending = {}
+        self._changed_at = {}
+        self.serial = 0
+
+    def begin(self) -> None:
+        """Start a refresh, dropping raw blocks from a failed one."""
+        self._pending = {}
+
+    def blocks_changed(self, responses: dict, *blocks) -> bool:
+        """Check if any of the blocks was read and differs from the last read."""
+        changed = False
+
+        for block in blocks:
+            response = responses.get(block)
+
+            if response is None:
+                continue
+
+            if response.isError():
+                changed = True
+
+            elif self._blocks.get(block) != response.registers:
+                self._pending[block] = response.registers
+                changed = True
+
+        return changed
+
+    def invalidate(self, block) -> None:
+        """Forget the last read of a block, so its next read is decoded."""
+        self._blocks.pop(block, None)
+        self._pending.pop(block, None)
+
+    def commit(self, before: dict, after: dict) -> None:
+        """Finish a refresh by comparing decoded values before and after."""
+        self.serial += 1
+
+        self._blocks.update(self._pending)
+        self._pending = {}
+
+        for key in before.keys() | after.keys():
+            if (
+                key not in before
+                or key not in after
+                or not same_value(before[key], after[key])
+            ):
+                self._changed_at[key] = self.serial
+
+    def changed_since(self, key, serial: int) -> bool:
+        return self._changed_at.get(key, 0) > serial
+
+
+class DecodedValues(OrderedDict):
+    """Decoded register values that report reads to their ChangeTracker."""
+
+    def __init__(self, tracker: ChangeTracker, *args) -> None:
+        super().__init__(*args)
+        self.tracker = tracker
+
+    def _record(self, key) -> None:
+        reads = _read_capture.get()
+        if reads is not None:
+            reads.setdefault(self.tracker, set()).add(key)
+
+    def __getitem__(self, key):
+        self._record(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key) -> bool:
+        self._record(key)
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        self._record(key)
+        return super().get(key, default)
+
+
+class DeviceHealth:
+    """Read failures of a single device and when to retry it.
+
+    A device that fails a refresh is skipped until its retry time, which
+    doubles with each consecutive failure up to max_backoff seconds, while
+    the other devices on the connection keep updating. no_response tells if
+    the last failure was a request that got no response at all.
+    """
+
+    def __init__(
+        self,
+        backoff: float = DEVICE_RETRY_BACKOFF,
+        max_backoff: float = DEVICE_RETRY_MAX_BACKOFF,
+    ) -> None:
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error = None
+        self.no_response = False
+
+    @property
+    def healthy(self) -> bool:
+        return self.failures == 0
+
+    def retry_due(self) -> bool:
+        return time.monotonic() >= self.retry_at
+
+    def failed(self, error, no_response: bool = False) -> float:
+        """Record a failure and return the seconds until the next retry."""
+        self.failures += 1
+        self.last_error = str(error)
+        self.no_response = no_response
+        delay = min(self.backoff * 2 ** (self.failures - 1), self.max_backoff)
+        self.retry_at = time.monotonic() + delay
+        return delay
+
+    def succeeded(self) -> None:
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error = None
+        self.no_response = False
+
+
+class RoundTripTimer:
+    """Request timeout of one Modbus unit ID from its round-trip times.
+
+    Like the TCP retransmission timer (RFC 6298), it keeps a smoothed
+    round-trip time and its mean deviation, and times out requests after
+    the smoothed time plus four deviations, between min_timeout and
+    max_timeout. Until the first response the timeout is max_timeout, and
+    each request without a response doubles it until the next one.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(
+        self,
+        max_timeout: float = REQUEST_TIMEOUT,
+        min_timeout: float = REQUEST_MIN_TIMEOUT,
+    ) -> None:
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.srtt = None
+        self.rttvar = None
+        self.timeout = max_timeout
+
+    def sample(self, rtt: float) -> None:
+        """Record the round-trip time of a request that got a response."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += self.BETA * (abs(self.srtt - rtt) - self.rttvar)
+            self.srtt += self.ALPHA * (rtt - self.srtt)
+
+        self.timeout = min(
+            max(self.srtt + 4 * self.rttvar, self.min_timeout), self.max_timeout
+        )
+
+    def timed_out(self) -> None:
+        self.timeout = min(self.timeout * 2, self.max_timeout)
+
+
+class CycleMonitor:
+    """Refresh durations of one poll tier against its interval.
+
+    A refresh overruns when it takes longer than the interval, and the
+    ticks that passed meanwhile are skipped instead of caught up on. The
+    overrun ratio is the fraction of the last window refreshes that
+    overran, and cycle_time the smoothed refresh duration.
+    """
+
+    ALPHA = 1 / 4
+
+    def __init__(self, interval: float, window: int = CYCLE_WINDOW) -> None:
+        self.interval = interval
+        self.cycle_time = None
+        self.skipped = 0
+        self._overruns = deque(maxlen=window)
+
+    @property
+    def overrun_ratio(self) -> float:
+        if not self._overruns:
+            return 0.0
+
+        return sum(self._overruns) / len(self._overruns)
+
+    def record(self, duration: float) -> int:
+        """Record a refresh and return the number of ticks it skipped."""
+        skipped = int(duration // self.interval) if self.interval > 0 else 0
+        self.skipped += skipped
+        self._overruns.append(skipped > 0)
+
+        if self.cycle_time is None:
+            self.cycle_time = duration
+        else:
+            self.cycle_time += self.ALPHA * (duration - self.cycle_time)
+
+        return skipped
+
+
+class CircuitBreaker:
+    """Circuit breaker for the requests to one Modbus unit ID.
+
+    The breaker opens after threshold consecutive requests without a
+    response, and requests then fail at once instead of waiting for the
+    timeout. Once the backoff has passed, a single request is let through
+    as a probe (half-open): a response closes the breaker, no response
+    opens it again for twice as long, up to max_backoff seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        threshold: int = UNIT_BREAKER_THRESHOLD,
+        backoff: float = UNIT_PROBE_BACKOFF,
+        max_backoff: float = UNIT_PROBE_MAX_BACKOFF,
+    ) -> None:
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = 0.0
+
+    @property
+    def closed(self) -> bool:
+        return self.state == self.CLOSED
+
+    def probe_due(self) -> bool:
+        return self.state == self.OPEN and time.monotonic() >= self.retry_at
+
+    def allow(self) -> bool:
+        """Check if a request may be sent, letting the probe through."""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.probe_due():
+            self.state = self.HALF_OPEN
+            return True
+
+        return False
+
+    def succeeded(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+
+    def failed(self) -> bool:
+        """Record a request without response, returning True if it opened."""
+        self.failures += 1
+
+        if self.state == self.OPEN:
+            return False
+
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.state = self.OPEN
+            self.trips += 1
+            self.retry_at = time.monotonic() + min(
+                self.backoff * 2 ** (self.trips - 1), self.max_backoff
+            )
+            return True
+
+        return False
+
+
+def same_value(a, b) -> bool:
+    """Equality that treats two NaN floats as the same register value."""
+    return a == b or (a != a and b != b)
+
+
+def record_reads(func) -> dict:
+    """Call func and return the decoded values it read.
+
+    The keys read are returned per ChangeTracker, with the serial of its
+    last refresh. Used around async_write_ha_state so an entity can skip
+    later updates when none of the values it read have changed.
+    """
+    reads = {}
+    token = _read_capture.set(reads)
+
+    try:
+        func()
+
+    finally:
+        _read_capture.reset(token)
+
+    return {tracker: (tracker.serial, keys) for tracker, keys in reads.items()}
+
+
+def reads_changed(reads) -> bool:
+    """Check if any decoded value in reads has changed since it was read."""
+    if reads is None:
+        return True
+
+    return any(
+        tracker.changed_since(key, serial)
+        for tracker, (serial, keys) in reads.items()
+        for key in keys
+    )
+
+
+class WriteRequest(NamedTuple):
+    """Holding registers to write to a unit ID."""
+
+    unit: int
+    address: int
+    payload: tuple
+
+
+class RequestSlots:
+    """Limit on requests in flight that queues writes ahead of reads.
+
+    Requests waiting for a slot are admitted in order, except that a freed
+    slot goes to a waiting write before any waiting read. A write issued
+    during a poll cycle then only waits for the reads already sent.
+    """
+
+    def __init__(self, count: int) -> None:
+        self._free = count
+        self._writes = deque()
+        self._reads = deque()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, write: bool = False):
+        await self.acquire(write)
+        try:
+            yield
+
+        finally:
+            self.release()
+
+    async def acquire(self, write: bool = False) -> None:
+        if self._free > 0:
+            self._free -= 1
+            return
+
+        queue = self._writes if write else self._reads
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+
+        try:
+            await waiter
+
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                # the slot was handed over before the cancellation
+                self.release()
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        for queue in (self._writes, self._reads):
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+
+        self._free += 1
@@ -1,18 +1,77 @@
 import asyncio
 import logging
-import threading
+import time
 from collections import OrderedDict
 from typing import Any, Dict, Optional
 
 from homeassistant.core import HomeAssistant
-from pymodbus.client import ModbusTcpClient
-from pymodbus.constants import Endian
+from homeassistant.helpers.storage import Store
 from pymodbus.exceptions import ConnectionException, ModbusIOException
-from pymodbus.payload import BinaryPayloadDecoder
 from pymodbus.pdu import ExceptionResponse, ModbusExceptions
-
-from .const import DOMAIN, SunSpecNotImpl
-from .helpers import float_to_hex, parse_modbus_string
+from pymodbus.register_read_message import ReadHoldingRegistersResponse
+
+from .connection import ConnectionManager
+from .const import (
+    DISCOVERY_PROBES,
+    DISCOVERY_REQUESTS,
+    DOMAIN,
+    INVERTER_PRODUCTION_STATUS,
+    INVERTER_SLEEP_STATUS,
+    INVERTER_SLEEP_TIERS,
+    REQUEST_TIMEOUT,
+    TOPOLOGY_STORAGE_VERSION,
+    WRITE_COALESCE_WINDOW,
+    WRITE_VERIFY_INTERVAL,
+    PollTier,
+    SunSpecNotImpl,
+)
+from .helpers import (
+    ChangeTracker,
+    CircuitBreaker,
+    DecodedValues,
+    DeviceHealth,
+    RequestSlots,
+    RoundTripTimer,
+    WriteRequest,
+    coalesce_writes,
+    compile_read_plan,
+    float_to_hex,
+    format_device_list,
+    parse_device_list,
+)
+from .sunspec import (
+    ADVANCED_POWER_CONTROL,
+    BATTERY_ADDRESSES,
+    BATTERY_COMMON,
+    BATTERY_IDENTITY,
+    BATTERY_MODEL,
+    COMMON_DID,
+    COMMON_LENGTH,
+    EXPORT_CONTROL,
+    EXTERNAL_PRODUCTION,
+    GLOBAL_POWER_CONTROL,
+    INVERTER_COMMON,
+    INVERTER_DIDS,
+    INVERTER_IDENT,
+    INVERTER_IDENTITY,
+    INVERTER_LENGTH,
+    INVERTER_MODEL,
+    INVERTER_STATUS,
+    METER_ADDRESSES,
+    METER_COMMON,
+    METER_COMMON_IDENT,
+    METER_DIDS,
+    METER_IDENT,
+    METER_IDENTITY,
+    METER_MODEL,
+    MMPPT_COMMON,
+    MMPPT_DIDS,
+    MMPPT_MODEL,
+    STORAGE_CONTROL,
+    SUNSPEC_HEADER,
+    SUNSPEC_ID,
+    meter_address,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -59,6 +118,15 @@ class DeviceInvalid(SolarEdgeException):
     pass
 
 
+def no_response(error) -> bool:
+    """Check if a read error is a request that got no response."""
+    return (
+        isinstance(error, ModbusReadError)
+        and bool(error.args)
+        and type(error.args[0]) is ModbusIOException
+    )
+
+
 class SolarEdgeModbusMultiHub:
     def __init__(
         self,
@@ -66,49 +134,66 @@ class SolarEdgeModbusMultiHub:
         name: str,
         host: str,
         port: int,
-        number_of_inverters: int = 1,
-        start_device_id: int = 1,
+        device_list: str = "1",
         detect_meters: bool = True,
         detect_batteries: bool = False,
         single_device_entity: bool = True,
-        keep_modbus_open: bool = False,
+        idle_timeout: float = 10,
         advanced_power_control: bool = False,
         adv_storage_control: bool = False,
         adv_site_limit_control: bool = False,
         allow_battery_energy_reset: bool = False,
-        sleep_after_write: int = 3,
+        write_verify_timeout: float = 3,
+        max_read_gap: int = 16,
+        pending_requests: int = 1,
+        entry_id: Optional[str] = None,
+        request_timeout: float = REQUEST_TIMEOUT,
     ):
         """Initialize the Modbus hub."""
         self._hass = hass
         self._name = name
         self._host = host
         self._port = port
-        self._number_of_inverters = number_of_inverters
-        self._start_device_id = start_device_id
+        self._units = parse_device_list(device_list)
         self._detect_meters = detect_meters
         self._detect_batteries = detect_batteries
         self._single_device_entity = single_device_entity
-        self._keep_modbus_open = keep_modbus_open
         self._advanced_power_control = advanced_power_control
         self._adv_storage_control = adv_storage_control
         self._adv_site_limit_control = adv_site_limit_control
         self._allow_battery_energy_reset = allow_battery_energy_reset
-        self._sleep_after_write = sleep_after_write
-        self._lock = threading.Lock()
+        self._write_verify_timeout = write_verify_timeout
+        self._max_read_gap = max_read_gap
+        self._init_lock = asyncio.Lock()
+        self._request_slots = RequestSlots(pending_requests)
+        self._write_locks = {}
+        self._write_batches = {}
+        self._write_flushes = {}
+        self._breakers = {}
+        self._round_trips = {}
+        self._degraded = {}
+        self._tier_cycles = dict.fromkeys(PollTier, 0)
         self._id = name.lower()
-        self._coordinator_timeout = 30
-        self._client = None
-        self._id = name.lower()
-        self._lock = threading.Lock()
+        self._entry_id = entry_id
+        self._request_timeout = request_timeout
+        self._store = None
+        self._connection = ConnectionManager(
+            host,
+            port,
+            idle_timeout,
+            request_timeout=request_timeout,
+            probe=self._async_probe_connection,
+        )
+        self._topology_restored = False
+        self._topology_validated = True
+        self._topology_cache = None
+        self._validate_task = None
         self.inverters = []
         self.meters = []
         self.batteries = []
         self.inverter_common = {}
         self.mmppt_common = {}
-
-        self._wr_unit = None
-        self._wr_address = None
-        self._wr_payload = None
+        self.register_cache = None
 
         self.initalized = False
         self.online = False
@@ -116,20 +201,24 @@ class SolarEdgeModbusMultiHub:
         _LOGGER.debug(
             (
                 f"{DOMAIN} configuration: "
-                f"number_of_inverters={self._number_of_inverters}, "
-                f"start_device_id={self._start_device_id}, "
+                f"device_list={format_device_list(self._units)}, "
                 f"detect_meters={self._detect_meters}, "
                 f"detect_batteries={self._detect_batteries}, "
                 f"single_device_entity={self._single_device_entity}, "
-                f"keep_modbus_open={self._keep_modbus_open}, "
+                f"idle_timeout={idle_timeout}, "
                 f"advanced_power_control={self._advanced_power_control}, "
                 f"adv_storage_control={self._adv_storage_control}, "
                 f"adv_site_limit_control={self._adv_site_limit_control}, "
                 f"allow_battery_energy_reset={self._allow_battery_energy_reset}, "
-                f"sleep_after_write={self._sleep_after_write}, "
+                f"write_verify_timeout={self._write_verify_timeout}, "
+                f"max_read_gap={self._max_read_gap}, "
+                f"pending_requests={pending_requests}, "
             ),
         )
 
+        if self._entry_id is not None:
+            self._store = self.discovery_store(hass, self._entry_id)
+
     async def _async_init_solaredge(self) -> None:
         if not self.is_socket_open():
             raise HubInitFailed(f"Could not open Modbus/TCP connection to {self._host}")
@@ -159,190 +248,367 @@ class SolarEdgeModbusMultiHub:
                 ),
             )
 
-        for inverter_index in range(self._number_of_inverters):
-            inverter_unit_id = inverter_index + self._start_device_id
+        self.inverters = []
+        self.meters = []
+        self.batteries = []
 
-            try:
-                new_inverter = SolarEdgeInverter(inverter_unit_id, self)
-                await self._hass.async_add_executor_job(new_inverter.init_device)
-                self.inverters.append(new_inverter)
+        restored = await self._async_restore_topology()
 
-            except ModbusReadError as e:
+        if not restored:
+            await self._async_discover_devices()
+
+        try:
+            for inverter in self.inverters:
+                await inverter.read_modbus_data()
+
+            for meter in self.meters:
+                await meter.read_modbus_data()
+
+            for battery in self.batteries:
+                await battery.read_modbus_data()
+
+        except ModbusReadError as e:
+            await self.disconnect()
+            await self._async_discard_restored_topology()
+            raise HubInitFailed(f"Read error: {e}")
+
+        except DeviceInvalid as e:
+            await self.disconnect()
+            await self._async_discard_restored_topology()
+            raise HubInitFailed(f"Invalid device: {e}")
+
+        except ConnectionException as e:
+            await self.disconnect()
+            raise HubInitFailed(f"Connection failed: {e}")
+
+        # Also saves a restored topology once its capability flags are probed
+        if self.topology != self._topology_cache:
+            await self._async_save_topology()
+
+        self.initalized = True
+
+    async def _async_discover_devices(self) -> None:
+        """Detect inverters, meters and batteries as a bounded task group.
+
+        Each inverter is probed first, then its meters and batteries. Probes
+        for different inverters run concurrently, so discovery takes about
+        as long as the slowest inverter instead of the sum of all of them.
+        Duplicate serial numbers are resolved after the group completes, in
+        the same order a sequential scan would have used.
+        """
+        probe_slots = asyncio.Semaphore(DISCOVERY_PROBES)
+
+        inverter_unit_ids = list(self._units)
+
+        results = await asyncio.gather(
+            *[
+                self._async_discover_unit(inverter_unit_id, probe_slots)
+                for inverter_unit_id in inverter_unit_ids
+            ],
+            return_exceptions=True,
+        )
+
+        for inverter_unit_id, result in zip(inverter_unit_ids, results):
+            if isinstance(result, ModbusReadError):
                 await self.disconnect()
-                raise HubInitFailed(f"{e}")
+                raise HubInitFailed(f"{result}")
 
-            except DeviceInvalid as e:
+            elif isinstance(result, DeviceInvalid):
                 """Inverters are required"""
-                _LOGGER.error(f"Inverter device ID {inverter_unit_id}: {e}")
-                raise HubInitFailed(f"{e}")
+                _LOGGER.error(f"Inverter device ID {inverter_unit_id}: {result}")
+                raise HubInitFailed(f"{result}")
 
-            if self._detect_meters:
-                try:
-                    new_meter_1 = SolarEdgeMeter(inverter_unit_id, 1, self)
-                    await self._hass.async_add_executor_job(new_meter_1.init_device)
-
-                    for meter in self.meters:
-                        if new_meter_1.serial == meter.serial:
-                            _LOGGER.warning(
-                                (
-                                    f"Duplicate serial {new_meter_1.serial} "
-                                    f"on meter 1 inverter {inverter_unit_id}"
-                                ),
-                            )
-                            raise DeviceInvalid(
-                                f"Duplicate m1 serial {new_meter_1.serial}"
-                            )
+            elif isinstance(result, BaseException):
+                raise result
 
-                    self.meters.append(new_meter_1)
-                    _LOGGER.debug(f"Found meter 1 on inverter ID {inverter_unit_id}")
+        for inverter_unit_id, (new_inverter, new_meters, new_batteries) in zip(
+            inverter_unit_ids, results
+        ):
+            self.inverters.append(new_inverter)
+
+            for new_meter in new_meters:
+                if new_meter.serial in [meter.serial for meter in self.meters]:
+                    _LOGGER.warning(
+                        (
+                            f"Duplicate serial {new_meter.serial} "
+                            f"on meter {new_meter.meter_id} "
+                            f"inverter {inverter_unit_id}"
+                        ),
+                    )
+                    continue
 
-                except ModbusReadError as e:
-                    await self.disconnect()
-                    raise HubInitFailed(f"{e}")
+                self.meters.append(new_meter)
+                _LOGGER.debug(
+                    (
+                        f"Found meter {new_meter.meter_id} "
+                        f"on inverter ID {inverter_unit_id}"
+                    ),
+                )
 
-                except DeviceInvalid:
-                    pass
+            for new_battery in new_batteries:
+                if new_battery.serial in [battery.serial for battery in self.batteries]:
+                    _LOGGER.warning(
+                        (
+                            f"Duplicate serial {new_battery.serial} "
+                            f"on battery {new_battery.battery_id} "
+                            f"inverter {inverter_unit_id}"
+                        ),
+                    )
+                    continue
 
-                try:
-                    new_meter_2 = SolarEdgeMeter(inverter_unit_id, 2, self)
-                    await self._hass.async_add_executor_job(new_meter_2.init_device)
-
-                    for meter in self.meters:
-                        if new_meter_2.serial == meter.serial:
-                            _LOGGER.warning(
-                                (
-                                    f"Duplicate serial {new_meter_2.serial} "
-                                    f"on meter 2 inverter {inverter_unit_id}"
-                                ),
-                            )
-                            raise DeviceInvalid(
-                                f"Duplicate m2 serial {new_meter_2.serial}"
-                            )
+                self.batteries.append(new_battery)
+                _LOGGER.debug(
+                    (
+                        f"Found battery {new_battery.battery_id} "
+                        f"inverter {inverter_unit_id}"
+                    ),
+                )
 
-                    self.meters.append(new_meter_2)
-                    _LOGGER.debug(f"Found meter 2 on inverter ID {inverter_unit_id}")
+    async def _async_discover_unit(
+        self, inverter_unit_id: int, probe_slots: asyncio.Semaphore
+    ) -> tuple:
+        """Probe one inverter unit and the meters and batteries behind it.
 
-                except ModbusReadError as e:
-                    await self.disconnect()
-                    raise HubInitFailed(f"{e}")
+        Only the meters and batteries given as hints in the device list are
+        probed, otherwise the ones enabled by the detect options.
+        """
+        hints = self._units[inverter_unit_id]
 
-                except DeviceInvalid:
-                    pass
+        if hints is None:
+            meter_ids = (1, 2, 3) if self._detect_meters else ()
+            battery_ids = (1, 2) if self._detect_batteries else ()
+        else:
+            meter_ids = hints["meters"]
+            battery_ids = hints["batteries"]
 
-                try:
-                    new_meter_3 = SolarEdgeMeter(inverter_unit_id, 3, self)
-                    await self._hass.async_add_executor_job(new_meter_3.init_device)
-
-                    for meter in self.meters:
-                        if new_meter_3.serial == meter.serial:
-                            _LOGGER.warning(
-                                (
-                                    f"Duplicate serial {new_meter_3.serial} "
-                                    f"on meter 3 inverter {inverter_unit_id}"
-                                ),
-                            )
-                            raise DeviceInvalid(
-                                f"Duplicate m3 serial {new_meter_3.serial}"
-                            )
+        async with probe_slots:
+            new_inverter = SolarEdgeInverter(inverter_unit_id, self)
+            await new_inverter.init_device()
 
-                    self.meters.append(new_meter_3)
-                    _LOGGER.debug(f"Found meter 3 on inverter ID {inverter_unit_id}")
+        async def probe(device_class, device_id):
+            try:
+                async with probe_slots:
+                    new_device = device_class(inverter_unit_id, device_id, self)
+                    await new_device.init_device()
+                    return new_device
 
-                except ModbusReadError as e:
-                    await self.disconnect()
-                    raise HubInitFailed(f"{e}")
+            except DeviceInvalid as e:
+                if hints is not None:
+                    _LOGGER.warning(
+                        f"Inverter {inverter_unit_id}: declared device not found: {e}"
+                    )
+                return None
+
+        probes = [probe(SolarEdgeMeter, meter_id) for meter_id in meter_ids]
+        probes += [probe(SolarEdgeBattery, battery_id) for battery_id in battery_ids]
+
+        results = await asyncio.gather(*probes, return_exceptions=True)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        new_meters = [
+            device for device in results if isinstance(device, SolarEdgeMeter)
+        ]
+        new_batteries = [
+            device for device in results if isinstance(device, SolarEdgeBattery)
+        ]
+
+        return new_inverter, new_meters, new_batteries
+
+    async def async_scan_devices(self) -> OrderedDict:
+        """Find the SunSpec inverters among the configured unit IDs.
+
+        Unlike discovery at startup, unit IDs that don't answer as an
+        inverter are left out instead of failing. The devices found become
+        the hub topology, and the units are returned with the meters and
+        batteries found behind each as hints, like parse_device_list.
+        """
+        probe_slots = asyncio.Semaphore(DISCOVERY_PROBES)
+        inverter_unit_ids = list(self._units)
+
+        results = await asyncio.gather(
+            *[
+                self._async_discover_unit(inverter_unit_id, probe_slots)
+                for inverter_unit_id in inverter_unit_ids
+            ],
+            return_exceptions=True,
+        )
 
-                except DeviceInvalid:
-                    pass
+        found = OrderedDict()
 
-            if self._detect_batteries:
-                try:
-                    new_battery_1 = SolarEdgeBattery(inverter_unit_id, 1, self)
-                    await self._hass.async_add_executor_job(new_battery_1.init_device)
-
-                    for battery in self.batteries:
-                        if new_battery_1.serial == battery.serial:
-                            _LOGGER.warning(
-                                (
-                                    f"Duplicate serial {new_battery_1.serial} "
-                                    f"on battery 1 inverter {inverter_unit_id}"
-                                ),
-                            )
-                            raise DeviceInvalid(
-                                f"Duplicate b1 serial {new_battery_1.serial}"
-                            )
+        for inverter_unit_id, result in zip(inverter_unit_ids, results):
+            if isinstance(result, (DeviceInvalid, ModbusReadError)):
+                _LOGGER.debug(f"Scan ID {inverter_unit_id}: {result}")
+                continue
 
-                    self.batteries.append(new_battery_1)
-                    _LOGGER.debug(f"Found battery 1 inverter {inverter_unit_id}")
+            elif isinstance(result, BaseException):
+                raise result
 
-                except ModbusReadError as e:
-                    await self.disconnect()
-                    raise HubInitFailed(f"{e}")
+            new_inverter, new_meters, new_batteries = result
+            self.inverters.append(new_inverter)
+            self.meters.extend(new_meters)
+            self.batteries.extend(new_batteries)
 
-                except DeviceInvalid:
-                    pass
+            found[inverter_unit_id] = {
+                "meters": [meter.meter_id for meter in new_meters],
+                "batteries": [battery.battery_id for battery in new_batteries],
+            }
 
-                try:
-                    new_battery_2 = SolarEdgeBattery(inverter_unit_id, 2, self)
-                    await self._hass.async_add_executor_job(new_battery_2.init_device)
-
-                    for battery in self.batteries:
-                        if new_battery_2.serial == battery.serial:
-                            _LOGGER.warning(
-                                (
-                                    f"Duplicate serial {new_battery_2.serial} "
-                                    f"on battery 2 inverter {inverter_unit_id}"
-                                ),
-                            )
-                            raise DeviceInvalid(
-                                f"Duplicate b2 serial {new_battery_1.serial}"
-                            )
+        self._units = found
 
-                    self.batteries.append(new_battery_2)
-                    _LOGGER.debug(f"Found battery 2 inverter {inverter_unit_id}")
+        return found
 
-                except ModbusReadError as e:
-                    await self.disconnect()
-                    raise HubInitFailed(f"{e}")
+    @property
+    def _topology_config(self) -> dict:
+        config = {"device_list": format_device_list(self._units)}
+
+        # detect options only apply to unit IDs without device hints
+        if None in self._units.values():
+            config["detect_meters"] = self._detect_meters
+            config["detect_batteries"] = self._detect_batteries
+
+        return config
+
+    @property
+    def topology(self) -> dict:
+        """Discovered devices as saved in the discovery cache."""
+        return {
+            "config": self._topology_config,
+            "inverters": [inverter.cache_data for inverter in self.inverters],
+            "meters": [meter.cache_data for meter in self.meters],
+            "batteries": [battery.cache_data for battery in self.batteries],
+        }
+
+    async def _async_restore_topology(self) -> bool:
+        """Restore discovered devices from the persistent discovery cache."""
+        if self._store is None:
+            return False
+
+        topology = await self._store.async_load()
 
-                except DeviceInvalid:
-                    pass
+        if topology is None:
+            return False
+
+        if topology.get("config") != self._topology_config:
+            _LOGGER.debug("Discovery cache does not match configuration.")
+            return False
 
         try:
-            for inverter in self.inverters:
-                await self._hass.async_add_executor_job(inverter.read_modbus_data)
+            for data in topology["inverters"]:
+                new_inverter = SolarEdgeInverter(data["unit_id"], self)
+                new_inverter.restore_device(data)
+                self.inverters.append(new_inverter)
 
-            for meter in self.meters:
-                await self._hass.async_add_executor_job(meter.read_modbus_data)
+            for data in topology["meters"]:
+                new_meter = SolarEdgeMeter(
+                    data["inverter_unit_id"], data["meter_id"], self
+                )
+                new_meter.restore_device(data)
+                self.meters.append(new_meter)
 
-            for battery in self.batteries:
-                await self._hass.async_add_executor_job(battery.read_modbus_data)
+            for data in topology["batteries"]:
+                new_battery = SolarEdgeBattery(
+                    data["inverter_unit_id"], data["battery_id"], self
+                )
+                new_battery.restore_device(data)
+                self.batteries.append(new_battery)
 
-        except ModbusReadError as e:
-            await self.disconnect()
-            raise HubInitFailed(f"Read error: {e}")
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.warning(f"Discovery cache is invalid: {e}")
+            self.inverters = []
+            self.meters = []
+            self.batteries = []
+            return False
 
-        except DeviceInvalid as e:
-            await self.disconnect()
-            raise HubInitFailed(f"Invalid device: {e}")
+        _LOGGER.debug(
+            (
+                f"Restored {len(self.inverters)} inverters, {len(self.meters)} "
+                f"meters, {len(self.batteries)} batteries from discovery cache."
+            ),
+        )
 
-        except ConnectionException as e:
-            await self.disconnect()
-            raise HubInitFailed(f"Connection failed: {e}")
+        self._topology_restored = True
+        self._topology_validated = False
+        self._topology_cache = topology
+        return True
 
-        self.initalized = True
+    async def _async_save_topology(self) -> None:
+        """Persist discovered devices for the next startup."""
+        if self._store is None:
+            return
+
+        self._topology_cache = self.topology
+        await self._store.async_save(self._topology_cache)
+
+    async def _async_discard_restored_topology(self) -> None:
+        """Drop a restored discovery cache that no longer works."""
+        if self._topology_restored:
+            _LOGGER.warning("Discarding discovery cache, devices will be re-detected.")
+            self._topology_restored = False
+            self._topology_cache = None
+            await self._store.async_remove()
+
+    async def _async_validate_topology(self) -> None:
+        """Confirm restored devices with one identity read per device.
+
+        Runs in the background, so polling is not held up. A validation that
+        fails to read is retried with the next medium tier refresh.
+        """
+        try:
+            for device in [*self.inverters, *self.meters, *self.batteries]:
+                if not await device.validate_device():
+                    _LOGGER.warning(
+                        f"{device.name} does not match discovery cache, reloading."
+                    )
+                    await self._store.async_remove()
+                    self._hass.async_create_task(
+                        self._hass.config_entries.async_reload(self._entry_id)
+                    )
+                    break
+
+        except (ModbusReadError, ConnectionException) as e:
+            _LOGGER.debug(f"Discovery cache validation failed: {e}")
+            return
+
+        self._topology_validated = True
+
+    @staticmethod
+    def discovery_store(hass: HomeAssistant, entry_id: str) -> Store:
+        """Return the discovery cache store for a config entry."""
+        return Store(hass, TOPOLOGY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
 
-    async def async_refresh_modbus_data(self, _now: Optional[int] = None) -> bool:
+    async def async_refresh_modbus_data(
+        self, _now: Optional[int] = None, tiers=tuple(PollTier)
+    ) -> bool:
+        """Refresh the register groups in the given polling tiers.
+
+        Each tier is refreshed by its own coordinator, so refreshes can
+        overlap. They share the connection, which is closed by the
+        connection manager once it has been idle for the idle timeout.
+        """
+        return await self._async_refresh_tiers(tiers)
+
+    async def _async_refresh_tiers(self, tiers) -> bool:
         if not self.is_socket_open():
             await self.connect()
 
-        if not self.initalized:
-            try:
-                await self._async_init_solaredge()
+        validate_topology = (
+            self.initalized
+            and not self._topology_validated
+            and PollTier.MEDIUM in tiers
+            and (self._validate_task is None or self._validate_task.done())
+        )
 
-            except ConnectionException as e:
-                await self.disconnect()
-                raise HubInitFailed(f"Setup failed: {e}")
+        async with self._init_lock:
+            if not self.initalized:
+                try:
+                    await self._async_init_solaredge()
+
+                except ConnectionException as e:
+                    await self.disconnect()
+                    raise HubInitFailed(f"Setup failed: {e}")
 
         if not self.is_socket_open():
             self.online = False
@@ -352,13 +618,14 @@ class SolarEdgeModbusMultiHub:
 
         else:
             self.online = True
+
+            if validate_topology:
+                self._validate_task = asyncio.create_task(
+                    self._async_validate_topology()
+                )
+
             try:
-                for inverter in self.inverters:
-                    await self._hass.async_add_executor_job(inverter.read_modbus_data)
-                for meter in self.meters:
-                    await self._hass.async_add_executor_job(meter.read_modbus_data)
-                for battery in self.batteries:
-                    await self._hass.async_add_executor_job(battery.read_modbus_data)
+                await self._async_read_devices(tiers)
 
             except ModbusReadError as e:
                 self.online = False
@@ -367,8 +634,6 @@ class SolarEdgeModbusMultiHub:
 
             except DeviceInvalid as e:
                 self.online = False
-                if not self._keep_modbus_open:
-                    await self.disconnect()
                 raise DataUpdateFailed(f"Invalid device: {e}")
 
             except ConnectionException as e:
@@ -376,11 +641,127 @@ class SolarEdgeModbusMultiHub:
                 await self.disconnect()
                 raise DataUpdateFailed(f"Connection failed: {e}")
 
-        if not self._keep_modbus_open:
-            await self.disconnect()
-
         return True
 
+    async def _async_read_devices(self, tiers) -> None:
+        """Read the devices polled in the given tiers, isolating failures.
+
+        A device that fails is marked unavailable and retried on its own
+        backoff schedule while the others keep updating. When no unit ID
+        responds, because every read timed out or every device is skipped
+        after timing out before, the refresh fails as a whole instead, since
+        the connection is the more likely cause then. Connection errors are
+        always raised.
+
+        Devices on a unit ID whose circuit breaker is open are skipped, and
+        the unit is probed with a single SunSpec header read when due.
+        Degraded devices are only read in every few refreshes of a tier.
+        """
+        devices = [
+            device
+            for device in [*self.inverters, *self.meters, *self.batteries]
+            if device.polls(tiers)
+        ]
+        responding_units = set()
+        silent_units = set()
+        failures = []
+
+        for tier in tiers:
+            self._tier_cycles[tier] += 1
+
+        for unit in dict.fromkeys(device.inverter_unit_id for device in devices):
+            if self.breaker(unit).probe_due():
+                _LOGGER.debug(f"Unit {unit}: probing circuit breaker.")
+                await self.read_holding_registers(unit, *SUNSPEC_HEADER.span())
+
+        for device in devices:
+            if not self.unit_online(device.inverter_unit_id):
+                silent_units.add(device.inverter_unit_id)
+                continue
+
+            if not device.health.retry_due():
+                if device.health.no_response:
+                    silent_units.add(device.inverter_unit_id)
+                continue
+
+            device_tiers = [tier for tier in tiers if self._poll_due(device, tier)]
+            if not device.polls(device_tiers):
+                continue
+
+            try:
+                await device.read_modbus_data(device_tiers)
+
+            except (ModbusReadError, DeviceInvalid) as e:
+                failures.append((device, e))
+
+                if no_response(e):
+                    silent_units.add(device.inverter_unit_id)
+                else:
+                    responding_units.add(device.inverter_unit_id)
+                continue
+
+            responding_units.add(device.inverter_unit_id)
+
+            if not device.health.healthy:
+                _LOGGER.info(
+                    f"{device.name} recovered after {device.health.failures} failures."
+                )
+            device.health.succeeded()
+
+        for device, e in failures:
+            if not self.unit_online(device.inverter_unit_id):
+                continue
+
+            delay = device.health.failed(e, no_response(e))
+            _LOGGER.warning(f"{device.name} read failed, retry in {delay:.0f}s: {e}")
+
+        if silent_units and not responding_units:
+            raise ModbusReadError(f"No response from unit IDs {sorted(silent_units)}")
+
+    def _poll_due(self, device, tier) -> bool:
+        divisor, phase = self._degraded.get((device, tier), (1, 0))
+        return (self._tier_cycles[tier] + phase) % divisor == 0
+
+    def degrade_polling(self, tier, divisor: int) -> Optional[str]:
+        """Read the lowest priority device of a tier every divisor refreshes.
+
+        Devices later in the device list have lower priority, batteries and
+        meters lower than inverters, and the first device is never degraded.
+        Degraded devices are read in turns rather than in the same refresh.
+        Returns the name of the degraded device, or None if there is none.
+        """
+        devices = [
+            device
+            for device in [*self.inverters, *self.meters, *self.batteries]
+            if device.polls([tier])
+        ]
+
+        phase = sum(degraded_tier == tier for _, degraded_tier in self._degraded)
+
+        for device in reversed(devices[1:]):
+            if (device, tier) not in self._degraded:
+                self._degraded[(device, tier)] = (divisor, phase)
+                return device.name
+
+        return None
+
+    def degraded_devices(self, tier) -> list:
+        """Return the names of the devices of a tier read less often."""
+        return [
+            device.name
+            for device, degraded_tier in self._degraded
+            if degraded_tier == tier
+        ]
+
+    def restore_polling(self, tier) -> Optional[str]:
+        """Undo the last degrade_polling of a tier, returning the device name."""
+        for device, degraded_tier in reversed(self._degraded):
+            if degraded_tier == tier:
+                del self._degraded[(device, tier)]
+                return device.name
+
+        return None
+
     @property
     def name(self):
         """Return the name of this hub."""
@@ -398,79 +779,297 @@ class SolarEdgeModbusMultiHub:
     def option_export_control(self) -> bool:
         return self._adv_site_limit_control
 
-    @property
-    def keep_modbus_open(self) -> bool:
-        return self._keep_modbus_open
-
     @property
     def allow_battery_energy_reset(self) -> bool:
         return self._allow_battery_energy_reset
 
-    @keep_modbus_open.setter
-    def keep_modbus_open(self, value: bool) -> None:
-        if value is True:
-            self._keep_modbus_open = True
+    def refresh_timeout(self, tiers) -> float:
+        """Return the deadline in seconds for refreshing the given tiers.
+
+        It allows every request of the read plan to time out in turn, at
+        the current timeout of its unit ID, after connecting. Until the
+        devices are discovered, a number of requests per unit ID is
+        allowed for discovery instead.
+        """
+        if self.initalized:
+            ranges = {}
+            for unit, address, count, tier in self.polled_blocks():
+                if tier in tiers:
+                    ranges.setdefault(unit, []).append((address, count))
+
+            # one more per unit ID for a wake-up check or breaker probe
+            requests = {
+                unit: len(self.compile_read_plan(unit_ranges)) + 1
+                for unit, unit_ranges in ranges.items()
+            }
         else:
-            self._keep_modbus_open = False
-
-        _LOGGER.debug(f"keep_modbus_open={self._keep_modbus_open}")
+            requests = {unit: DISCOVERY_REQUESTS for unit in self._units}
 
-    @property
-    def coordinator_timeout(self) -> int:
-        _LOGGER.debug(f"coordinator timeout is {self._coordinator_timeout}")
-        return self._coordinator_timeout
+        timeout = self._request_timeout + sum(
+            self.round_trip(unit).timeout * count for unit, count in requests.items()
+        )
+        _LOGGER.debug(f"refresh timeout for {list(tiers)} is {timeout:.1f}s")
+        return timeout
 
     async def disconnect(self) -> None:
         """Disconnect modbus client."""
-        if self._client is not None:
-            await self._hass.async_add_executor_job(self._client.close)
+        await self._connection.close()
 
     async def connect(self) -> None:
-        """Connect modbus client."""
-        with self._lock:
-            if self._client is None:
-                self._client = ModbusTcpClient(host=self._host, port=self._port)
-
-            await self._hass.async_add_executor_job(self._client.connect)
+        """Connect modbus client, unless a reconnect isn't due yet."""
+        await self._connection.connect()
 
     def is_socket_open(self) -> bool:
         """Check modbus client connection status."""
-        with self._lock:
-            if self._client is None:
-                return False
-
-            return self._client.is_socket_open()
+        return self._connection.connected
 
     async def shutdown(self) -> None:
         """Shut down the hub."""
         self.online = False
+
+        if self._validate_task is not None:
+            self._validate_task.cancel()
+
         await self.disconnect()
-        self._client = None
-
-    def read_holding_registers(self, unit, address, count):
-        """Read holding registers."""
-        with self._lock:
-            kwargs = {"slave": unit} if unit else {}
-            return self._client.read_holding_registers(address, count, **kwargs)
-
-    def _write_registers(self):
-        """Write registers."""
-        with self._lock:
-            kwargs = {"slave": self._wr_unit} if self._wr_unit else {}
-            return self._client.write_registers(
-                self._wr_address, self._wr_payload, **kwargs
+
+    def breaker(self, unit) -> CircuitBreaker:
+        """Return the circuit breaker of a unit ID."""
+        if unit not in self._breakers:
+            self._breakers[unit] = CircuitBreaker()
+
+        return self._breakers[unit]
+
+    def round_trip(self, unit) -> RoundTripTimer:
+        """Return the round-trip timer of a unit ID."""
+        if unit not in self._round_trips:
+            self._round_trips[unit] = RoundTripTimer(self._request_timeout)
+
+        return self._round_trips[unit]
+
+    def unit_online(self, unit) -> bool:
+        """Unit ID is responding, as far as its circuit breaker knows."""
+        return unit not in self._breakers or self._breakers[unit].closed
+
+    async def _async_probe_connection(self):
+        """Read the SunSpec header of a responding unit to check the link.
+
+        Units whose circuit breaker is open are skipped, as their reads
+        fail without a request. With none responding there is nothing to
+        learn, so the connection is left to the breakers.
+        """
+        for unit in self._units:
+            if self.unit_online(unit):
+                return await self.read_holding_registers(unit, *SUNSPEC_HEADER.span())
+
+        return None
+
+    async def read_holding_registers(self, unit, address, count):
+        """Read holding registers.
+
+        Reads from a unit whose circuit breaker is open fail immediately,
+        and reads time out after the current timeout of their unit.
+        """
+        breaker = self.breaker(unit)
+        round_trip = self.round_trip(unit)
+
+        if not breaker.allow():
+            return ModbusIOException(
+                f"Unit {unit} is not responding, skipped reading {hex(address)}"
+            )
+
+        async with self._request_slots.slot():
+            async with self._connection.request() as client:
+                kwargs = {"slave": unit} if unit else {}
+                start = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(
+                        client.read_holding_registers(address, count, **kwargs),
+                        round_trip.timeout,
+                    )
+
+                except asyncio.TimeoutError:
+                    round_trip.timed_out()
+                    result = ModbusIOException(
+                        f"No response from unit {unit} reading {hex(address)}"
+                    )
+
+                else:
+                    round_trip.sample(time.monotonic() - start)
+
+        if type(result) is ModbusIOException:
+            if breaker.failed():
+                _LOGGER.warning(
+                    (
+                        f"Unit {unit} is not responding, next probe in "
+                        f"{breaker.retry_at - time.monotonic():.0f}s."
+                    ),
+                )
+            return result
+
+        if not breaker.closed:
+            _LOGGER.info(f"Unit {unit} is responding again.")
+        breaker.succeeded()
+
+        if self.register_cache is not None and not result.isError():
+            self.register_cache.update(unit, address, result.registers)
+
+        return result
+
+    async def write_holding_registers(self, unit, address, payload):
+        """Write holding registers.
+
+        Writes are sent ahead of queued reads, and writes to the same unit
+        ID are sent in the order they were requested.
+        """
+        request = WriteRequest(unit, address, tuple(payload))
+
+        if request.unit not in self._write_locks:
+            self._write_locks[request.unit] = asyncio.Lock()
+
+        async with self._write_locks[request.unit]:
+            if self.register_cache is not None:
+                self.register_cache.invalidate(
+                    request.unit, request.address, len(request.payload)
+                )
+
+            async with self._request_slots.slot(write=True):
+                async with self._connection.request() as client:
+                    kwargs = {"slave": request.unit} if request.unit else {}
+                    try:
+                        return await client.write_registers(
+                            request.address, list(request.payload), **kwargs
+                        )
+
+                    except asyncio.TimeoutError:
+                        return ModbusIOException(
+                            f"No response from unit {request.unit} "
+                            f"writing {hex(request.address)}"
+                        )
+
+    def polled_blocks(self) -> list:
+        """Return the (unit, address, count, tier) blocks read by polling."""
+        return [
+            (device.inverter_unit_id, address, count, tier)
+            for device in [*self.inverters, *self.meters, *self.batteries]
+            for address, count, tier in device.polled_spans
+        ]
+
+    def compile_read_plan(self, ranges) -> list:
+        """Merge register ranges into a read plan using the configured gap."""
+        return compile_read_plan(ranges, max_gap=self._max_read_gap)
+
+    async def read_holding_plan(self, unit, plan) -> dict:
+        """Execute a read plan and return a response for each member range.
+
+        A merged read that fails with an illegal address is split in the plan
+        itself, since the gap between its members may not be implemented by
+        the device: first into gap-free reads, then into the member ranges.
+        """
+        responses = {}
+        index = 0
+
+        while index < len(plan):
+            address, count, members = plan[index]
+            result = await self.read_holding_registers(
+                unit=unit, address=address, count=count
             )
 
+            if (
+                len(members) > 1
+                and type(result) is ExceptionResponse
+                and result.exception_code == ModbusExceptions.IllegalAddress
+            ):
+                _LOGGER.debug(
+                    f"Unit {unit}: splitting merged read {hex(address)} count {count}"
+                )
+                split_plan = compile_read_plan(members)
+                if len(split_plan) == 1:
+                    split_plan = [
+                        (m_address, m_count, [(m_address, m_count)])
+                        for m_address, m_count in members
+                    ]
+
+                plan[index : index + 1] = split_plan
+                continue
+
+            for m_address, m_count in members:
+                if result.isError():
+                    responses[(m_address, m_count)] = result
+                else:
+                    offset = m_address - address
+                    responses[(m_address, m_count)] = ReadHoldingRegistersResponse(
+                        result.registers[offset : offset + m_count]
+                    )
+
+            index += 1
+
+        return responses
+
     async def write_registers(self, unit, address, payload):
-        self._wr_unit = unit
-        self._wr_address = address
-        self._wr_payload = payload
+        """Write holding registers and return the response.
+
+        Writes to the same unit ID within WRITE_COALESCE_WINDOW seconds are
+        collected into a batch, and adjacent ranges in the batch are sent as
+        a single write. Each caller gets the response of the write that
+        carried its registers.
+        """
+        request = WriteRequest(unit, address, tuple(payload))
+        future = asyncio.get_running_loop().create_future()
+        batch = self._write_batches.setdefault(unit, [])
+        batch.append((request, future))
+
+        if len(batch) == 1:
+            self._write_flushes[unit] = asyncio.create_task(
+                self._async_flush_writes(unit, self._write_flushes.get(unit))
+            )
+
+        return await future
+
+    async def _async_flush_writes(self, unit, previous) -> None:
+        """Send a batch of writes once the previous batch has been sent."""
+        await asyncio.sleep(WRITE_COALESCE_WINDOW)
+
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        batch = self._write_batches.pop(unit)
+
+        for address, payload, members in coalesce_writes(
+            [request for request, _ in batch]
+        ):
+            if len(members) > 1:
+                _LOGGER.debug(
+                    f"Unit {unit}: coalesced {len(members)} writes at {hex(address)}"
+                )
+
+            try:
+                result = await self._async_write(unit, address, payload)
+
+            except Exception as e:
+                for index in members:
+                    if not batch[index][1].done():
+                        batch[index][1].set_exception(e)
+                continue
+
+            for index in members:
+                if not batch[index][1].done():
+                    batch[index][1].set_result(result)
+
+    async def _async_write(self, unit, address, payload):
+        """Write, verify and refresh a range of holding registers.
+
+        Connection failures and missing responses are logged and take the
+        hub offline until the next refresh reconnects. A written range is
+        read back until it holds the payload, for up to the write verify
+        timeout, and then the polled blocks containing it are refreshed.
+        """
+        result = None
 
         if not self.is_socket_open():
             await self.connect()
 
         try:
-            result = await self._hass.async_add_executor_job(self._write_registers)
+            result = await self.write_holding_registers(unit, address, payload)
 
         except ConnectionException as e:
             _LOGGER.error(f"Write command failed: {e}")
@@ -489,7 +1088,7 @@ class SolarEdgeModbusMultiHub:
                         _LOGGER.error(
                             (
                                 "Write command failed: "
-                                f"Illegal address {hex(self._wr_address)}"
+                                f"Illegal address {hex(address)}"
                             ),
                         )
                         self.online = False
@@ -498,27 +1097,64 @@ class SolarEdgeModbusMultiHub:
                 else:
                     raise ModbusWriteError(result)
 
-        if self._sleep_after_write > 0:
-            _LOGGER.debug(f"Sleeping {self._sleep_after_write} seconds after write.")
-            await asyncio.sleep(self._sleep_after_write)
+            else:
+                if self._write_verify_timeout > 0 and not await self.verify_write(
+                    unit, address, payload
+                ):
+                    _LOGGER.warning(
+                        (
+                            f"Unit {unit}: registers at {hex(address)} don't read "
+                            f"back as written after {self._write_verify_timeout}s."
+                        ),
+                    )
+
+                for inverter in self.inverters:
+                    if inverter.inverter_unit_id == unit:
+                        await inverter.refresh_registers(address, len(payload))
+
+        return result
+
+    async def verify_write(self, unit, address, payload) -> bool:
+        """Read back written registers until they hold the payload.
+
+        The range is read every WRITE_VERIFY_INTERVAL seconds, and the
+        check gives up once the write verify timeout has passed.
+        """
+        deadline = time.monotonic() + self._write_verify_timeout
+
+        while True:
+            result = await self.read_holding_registers(unit, address, len(payload))
+
+            if not result.isError() and result.registers == list(payload):
+                _LOGGER.debug(f"Unit {unit}: write to {hex(address)} verified.")
+                return True
+
+            if time.monotonic() + WRITE_VERIFY_INTERVAL > deadline:
+                return False
+
+            await asyncio.sleep(WRITE_VERIFY_INTERVAL)
 
 
 class SolarEdgeInverter:
     def __init__(self, device_id: int, hub: SolarEdgeModbusMultiHub) -> None:
         self.inverter_unit_id = device_id
         self.hub = hub
+        self.health = DeviceHealth()
+        self._changes = ChangeTracker()
         self.decoded_common = []
-        self.decoded_model = []
+        self.decoded_model = DecodedValues(self._changes)
         self.decoded_mmppt = []
         self.decoded_storage = []
         self.has_parent = False
+        self.sleeping = False
         self.global_power_control = None
         self.advanced_power_control = None
         self._has_export_control = None
+        self._read_plan = None
 
-    def init_device(self) -> None:
-        inverter_data = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id, address=40000, count=4
+    async def init_device(self) -> None:
+        inverter_data = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *SUNSPEC_HEADER.span()
         )
         if inverter_data.isError():
             _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
@@ -536,17 +1172,7 @@ class SolarEdgeInverter:
 
             raise ModbusReadError(inverter_data)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            inverter_data.registers, byteorder=Endian.Big
-        )
-
-        decoded_ident = OrderedDict(
-            [
-                ("C_SunSpec_ID", decoder.decode_32bit_uint()),
-                ("C_SunSpec_DID", decoder.decode_16bit_uint()),
-                ("C_SunSpec_Length", decoder.decode_16bit_uint()),
-            ]
-        )
+        decoded_ident = OrderedDict(SUNSPEC_HEADER.decode(inverter_data.registers))
 
         for name, value in iter(decoded_ident.items()):
             _LOGGER.debug(
@@ -559,41 +1185,22 @@ class SolarEdgeInverter:
         if (
             decoded_ident["C_SunSpec_ID"] == SunSpecNotImpl.UINT32
             or decoded_ident["C_SunSpec_DID"] == SunSpecNotImpl.UINT16
-            or decoded_ident["C_SunSpec_ID"] != 0x53756E53
-            or decoded_ident["C_SunSpec_DID"] != 0x0001
-            or decoded_ident["C_SunSpec_Length"] != 65
+            or decoded_ident["C_SunSpec_ID"] != SUNSPEC_ID
+            or decoded_ident["C_SunSpec_DID"] != COMMON_DID
+            or decoded_ident["C_SunSpec_Length"] != COMMON_LENGTH
         ):
             raise DeviceInvalid(
                 f"ID {self.inverter_unit_id} is not a SunSpec inverter."
             )
 
-        inverter_data = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id, address=40004, count=65
+        inverter_data = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *INVERTER_COMMON.span()
         )
         if inverter_data.isError():
             _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
             raise ModbusReadError(inverter_data)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            inverter_data.registers, byteorder=Endian.Big
-        )
-
-        self.decoded_common = OrderedDict(
-            [
-                (
-                    "C_Manufacturer",
-                    parse_modbus_string(decoder.decode_string(32)),
-                ),
-                ("C_Model", parse_modbus_string(decoder.decode_string(32))),
-                ("C_Option", parse_modbus_string(decoder.decode_string(16))),
-                ("C_Version", parse_modbus_string(decoder.decode_string(16))),
-                (
-                    "C_SerialNumber",
-                    parse_modbus_string(decoder.decode_string(32)),
-                ),
-                ("C_Device_address", decoder.decode_16bit_uint()),
-            ]
-        )
+        self.decoded_common = self._decode_common(inverter_data.registers)
 
         for name, value in iter(self.decoded_common.items()):
             _LOGGER.debug(
@@ -605,8 +1212,8 @@ class SolarEdgeInverter:
 
         self.hub.inverter_common[self.inverter_unit_id] = self.decoded_common
 
-        mmppt_common = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id, address=40121, count=9
+        mmppt_common = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *MMPPT_COMMON.span()
         )
         if mmppt_common.isError():
             _LOGGER.debug(f"Inverter {self.inverter_unit_id} MMPPT: {mmppt_common}")
@@ -627,24 +1234,10 @@ class SolarEdgeInverter:
                 raise ModbusReadError(mmppt_common)
 
         else:
-            decoder = BinaryPayloadDecoder.fromRegisters(
-                mmppt_common.registers, byteorder=Endian.Big
-            )
-
             self.decoded_mmppt = OrderedDict(
-                [
-                    ("mmppt_DID", decoder.decode_16bit_uint()),
-                    ("mmppt_Length", decoder.decode_16bit_uint()),
-                    ("ignore", decoder.skip_bytes(12)),
-                    ("mmppt_Units", decoder.decode_16bit_uint()),
-                ]
+                MMPPT_COMMON.decode(mmppt_common.registers)
             )
 
-            try:
-                del self.decoded_mmppt["ignore"]
-            except KeyError:
-                pass
-
             for name, value in iter(self.decoded_mmppt.items()):
                 _LOGGER.debug(
                     (
@@ -656,8 +1249,8 @@ class SolarEdgeInverter:
             if (
                 self.decoded_mmppt["mmppt_DID"] == SunSpecNotImpl.UINT16
                 or self.decoded_mmppt["mmppt_Units"] == SunSpecNotImpl.UINT16
-                or self.decoded_mmppt["mmppt_DID"] not in [160]
-                or self.decoded_mmppt["mmppt_Units"] not in [2, 3]
+                or self.decoded_mmppt["mmppt_DID"] not in MMPPT_DIDS
+                or self.decoded_mmppt["mmppt_Units"] not in MMPPT_MODEL
             ):
                 _LOGGER.debug(f"Inverter {self.inverter_unit_id} is NOT Multiple MPPT")
                 self.decoded_mmppt = None
@@ -666,6 +1259,9 @@ class SolarEdgeInverter:
 
         self.hub.mmppt_common[self.inverter_unit_id] = self.decoded_mmppt
 
+        self._init_device_info()
+
+    def _init_device_info(self) -> None:
         self.manufacturer = self.decoded_common["C_Manufacturer"]
         self.model = self.decoded_common["C_Model"]
         self.option = self.decoded_common["C_Option"]
@@ -684,188 +1280,230 @@ class SolarEdgeInverter:
             "hw_version": self.option,
         }
 
-    def read_modbus_data(self) -> None:
-        inverter_data = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id, address=40069, count=2
+    @staticmethod
+    def _decode_common(registers) -> OrderedDict:
+        return OrderedDict(INVERTER_COMMON.decode(registers))
+
+    @property
+    def cache_data(self) -> dict:
+        """Discovery results to persist between restarts."""
+        return {
+            "unit_id": self.inverter_unit_id,
+            "decoded_common": dict(self.decoded_common),
+            "decoded_mmppt": (
+                None if self.decoded_mmppt is None else dict(self.decoded_mmppt)
+            ),
+            "global_power_control": self.global_power_control,
+            "advanced_power_control": self.advanced_power_control,
+            "has_export_control": self._has_export_control,
+        }
+
+    def restore_device(self, data: dict) -> None:
+        """Initialize from persisted discovery results instead of probing."""
+        self.decoded_common = OrderedDict(data["decoded_common"])
+
+        if data["decoded_mmppt"] is None:
+            self.decoded_mmppt = None
+        else:
+            self.decoded_mmppt = OrderedDict(data["decoded_mmppt"])
+
+        self.global_power_control = data["global_power_control"]
+        self.advanced_power_control = data["advanced_power_control"]
+        self._has_export_control = data["has_export_control"]
+
+        self.hub.inverter_common[self.inverter_unit_id] = self.decoded_common
+        self.hub.mmppt_common[self.inverter_unit_id] = self.decoded_mmppt
+
+        self._init_device_info()
+
+    async def validate_device(self) -> bool:
+        """Check that the serial number and firmware match this device."""
+        inverter_data = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *INVERTER_IDENTITY.span()
         )
         if inverter_data.isError():
             _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
+
+            if type(inverter_data) is ExceptionResponse:
+                if inverter_data.exception_code == ModbusExceptions.IllegalAddress:
+                    return False
+
             raise ModbusReadError(inverter_data)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            inverter_data.registers, byteorder=Endian.Big
+        decoded_common = dict(INVERTER_IDENTITY.decode(inverter_data.registers))
+
+        return (
+            decoded_common["C_SerialNumber"] == self.serial
+            and decoded_common["C_Version"] == self.fw_version
         )
 
-        decoded_ident = OrderedDict(
-            [
-                ("C_SunSpec_DID", decoder.decode_16bit_uint()),
-                ("C_SunSpec_Length", decoder.decode_16bit_uint()),
-            ]
+    @property
+    def _mmppt_model(self):
+        try:
+            return MMPPT_MODEL[self.decoded_mmppt["mmppt_Units"]]
+
+        except KeyError:
+            raise NotImplementedError()
+
+    @property
+    def _has_storage_control(self) -> bool:
+        return (
+            self.hub.option_storage_control is True
+            and self.decoded_storage is not False
+            and any(
+                battery.inverter_unit_id == self.inverter_unit_id
+                for battery in self.hub.batteries
+            )
         )
 
-        for name, value in iter(decoded_ident.items()):
+    def _polled_blocks(self) -> list:
+        blocks = [INVERTER_IDENT, INVERTER_MODEL]
+
+        if self.decoded_mmppt is not None:
+            blocks.append(self._mmppt_model)
+
+        if self.global_power_control is not False:
+            blocks.append(GLOBAL_POWER_CONTROL)
+
+        if self.advanced_power_control is not False:
+            blocks.append(ADVANCED_POWER_CONTROL)
+
+        if self._has_export_control is not False:
+            blocks.extend([EXPORT_CONTROL, EXTERNAL_PRODUCTION])
+
+        if self._has_storage_control:
+            blocks.append(STORAGE_CONTROL)
+
+        return blocks
+
+    @property
+    def polled_spans(self) -> list:
+        """Return the (address, count, tier) register blocks read by polling."""
+        return [(*block.span(), block.tier) for block in self._polled_blocks()]
+
+    def polls(self, tiers) -> bool:
+        return any(tier in tiers for *_, tier in self.polled_spans)
+
+    def _compile_read_plan(self) -> dict:
+        blocks = self._polled_blocks()
+        read_plan = {}
+
+        for tier in PollTier:
+            read_plan[tier] = self.hub.compile_read_plan(
+                [block.span() for block in blocks if block.tier == tier]
+            )
             _LOGGER.debug(
                 (
-                    f"Inverter {self.inverter_unit_id}: "
-                    f"{name} {hex(value) if isinstance(value, int) else value}"
+                    f"Inverter {self.inverter_unit_id} {tier} read plan: "
+                    f"{[(hex(addr), count) for addr, count, _ in read_plan[tier]]}"
                 ),
             )
 
-        if (
-            decoded_ident["C_SunSpec_DID"] == SunSpecNotImpl.UINT16
-            or decoded_ident["C_SunSpec_DID"] not in [101, 102, 103]
-            or decoded_ident["C_SunSpec_Length"] != 50
-        ):
-            raise DeviceInvalid(f"Inverter {self.inverter_unit_id} not usable.")
-
-        inverter_data = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id, address=40071, count=38
-        )
-        if inverter_data.isError():
-            _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
-            raise ModbusReadError(inverter_data)
+        return read_plan
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            inverter_data.registers, byteorder=Endian.Big
-        )
+    async def read_modbus_data(self, tiers=tuple(PollTier)) -> None:
+        if self._read_plan is None:
+            self._read_plan = self._compile_read_plan()
 
-        self.decoded_model = OrderedDict(
-            [
-                ("C_SunSpec_DID", decoded_ident["C_SunSpec_DID"]),
-                ("AC_Current", decoder.decode_16bit_uint()),
-                ("AC_Current_A", decoder.decode_16bit_uint()),
-                ("AC_Current_B", decoder.decode_16bit_uint()),
-                ("AC_Current_C", decoder.decode_16bit_uint()),
-                ("AC_Current_SF", decoder.decode_16bit_int()),
-                ("AC_Voltage_AB", decoder.decode_16bit_uint()),
-                ("AC_Voltage_BC", decoder.decode_16bit_uint()),
-                ("AC_Voltage_CA", decoder.decode_16bit_uint()),
-                ("AC_Voltage_AN", decoder.decode_16bit_uint()),
-                ("AC_Voltage_BN", decoder.decode_16bit_uint()),
-                ("AC_Voltage_CN", decoder.decode_16bit_uint()),
-                ("AC_Voltage_SF", decoder.decode_16bit_int()),
-                ("AC_Power", decoder.decode_16bit_int()),
-                ("AC_Power_SF", decoder.decode_16bit_int()),
-                ("AC_Frequency", decoder.decode_16bit_uint()),
-                ("AC_Frequency_SF", decoder.decode_16bit_int()),
-                ("AC_VA", decoder.decode_16bit_int()),
-                ("AC_VA_SF", decoder.decode_16bit_int()),
-                ("AC_var", decoder.decode_16bit_int()),
-                ("AC_var_SF", decoder.decode_16bit_int()),
-                ("AC_PF", decoder.decode_16bit_int()),
-                ("AC_PF_SF", decoder.decode_16bit_int()),
-                ("AC_Energy_WH", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_SF", decoder.decode_16bit_uint()),
-                ("I_DC_Current", decoder.decode_16bit_uint()),
-                ("I_DC_Current_SF", decoder.decode_16bit_int()),
-                ("I_DC_Voltage", decoder.decode_16bit_uint()),
-                ("I_DC_Voltage_SF", decoder.decode_16bit_int()),
-                ("I_DC_Power", decoder.decode_16bit_int()),
-                ("I_DC_Power_SF", decoder.decode_16bit_int()),
-                ("I_Temp_Cab", decoder.decode_16bit_int()),
-                ("I_Temp_Sink", decoder.decode_16bit_int()),
-                ("I_Temp_Trns", decoder.decode_16bit_int()),
-                ("I_Temp_Other", decoder.decode_16bit_int()),
-                ("I_Temp_SF", decoder.decode_16bit_int()),
-                ("I_Status", decoder.decode_16bit_int()),
-                ("I_Status_Vendor", decoder.decode_16bit_int()),
-            ]
-        )
+        responses = {}
 
-        """ Multiple MPPT Extension """
-        if self.decoded_mmppt is not None:
-            if self.decoded_mmppt["mmppt_Units"] == 2:
-                mmppt_registers = 48
+        if self.sleeping and PollTier.MEDIUM in tiers:
+            inverter_data = await self.hub.read_holding_registers(
+                self.inverter_unit_id, *INVERTER_STATUS.span()
+            )
+            if inverter_data.isError():
+                _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
+                raise ModbusReadError(inverter_data)
 
-            elif self.decoded_mmppt["mmppt_Units"] == 3:
-                mmppt_registers = 68
+            decoded_status = OrderedDict(
+                INVERTER_STATUS.decode(inverter_data.registers)
+            )
 
+            if decoded_status["I_Status"] in INVERTER_PRODUCTION_STATUS:
+                _LOGGER.debug(f"Inverter {self.inverter_unit_id} is awake.")
+                self.sleeping = False
             else:
-                raise NotImplementedError()
+                responses[INVERTER_STATUS.span()] = inverter_data
+
+        for tier in tiers:
+            if self.sleeping and tier in INVERTER_SLEEP_TIERS:
+                continue
 
-            inverter_data = self.hub.read_holding_registers(
-                unit=self.inverter_unit_id, address=40123, count=mmppt_registers
+            responses.update(
+                await self.hub.read_holding_plan(
+                    self.inverter_unit_id, self._read_plan[tier]
+                )
             )
+
+        self._decode_responses(responses)
+
+    def _decode_responses(self, responses: dict) -> None:
+        """Decode the blocks read by a refresh and record what changed."""
+        self._changes.begin()
+        decoded_before = self._decoded_values
+
+        if self._changes.blocks_changed(
+            responses, INVERTER_IDENT.span(), INVERTER_MODEL.span()
+        ):
+            inverter_data = responses[INVERTER_IDENT.span()]
             if inverter_data.isError():
                 _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
                 raise ModbusReadError(inverter_data)
 
-            decoder = BinaryPayloadDecoder.fromRegisters(
-                inverter_data.registers, byteorder=Endian.Big
-            )
+            decoded_ident = OrderedDict(INVERTER_IDENT.decode(inverter_data.registers))
 
-            if self.decoded_mmppt["mmppt_Units"] in [2, 3]:
-                self.decoded_model.update(
-                    OrderedDict(
-                        [
-                            ("mmppt_DCA_SF", decoder.decode_16bit_int()),
-                            ("mmppt_DCV_SF", decoder.decode_16bit_int()),
-                            ("mmppt_DCW_SF", decoder.decode_16bit_int()),
-                            ("mmppt_DCWH_SF", decoder.decode_16bit_int()),
-                            ("mmppt_Events", decoder.decode_32bit_uint()),
-                            ("ignore", decoder.skip_bytes(2)),
-                            ("mmppt_TmsPer", decoder.decode_16bit_uint()),
-                            ("mmppt_0_ID", decoder.decode_16bit_uint()),
-                            (
-                                "mmppt_0_IDStr",
-                                parse_modbus_string(decoder.decode_string(16)),
-                            ),
-                            ("mmppt_0_DCA", decoder.decode_16bit_uint()),
-                            ("mmppt_0_DCV", decoder.decode_16bit_uint()),
-                            ("mmppt_0_DCW", decoder.decode_16bit_uint()),
-                            ("mmppt_0_DCWH", decoder.decode_32bit_uint()),
-                            ("mmppt_0_Tms", decoder.decode_32bit_uint()),
-                            ("mmppt_0_Tmp", decoder.decode_16bit_int()),
-                            ("mmppt_0_DCSt", decoder.decode_16bit_uint()),
-                            ("mmppt_0_DCEvt", decoder.decode_32bit_uint()),
-                            ("mmppt_1_ID", decoder.decode_16bit_uint()),
-                            (
-                                "mmppt_1_IDStr",
-                                parse_modbus_string(decoder.decode_string(16)),
-                            ),
-                            ("mmppt_1_DCA", decoder.decode_16bit_uint()),
-                            ("mmppt_1_DCV", decoder.decode_16bit_uint()),
-                            ("mmppt_1_DCW", decoder.decode_16bit_uint()),
-                            ("mmppt_1_DCWH", decoder.decode_32bit_uint()),
-                            ("mmppt_1_Tms", decoder.decode_32bit_uint()),
-                            ("mmppt_1_Tmp", decoder.decode_16bit_int()),
-                            ("mmppt_1_DCSt", decoder.decode_16bit_uint()),
-                            ("mmppt_1_DCEvt", decoder.decode_32bit_uint()),
-                        ]
-                    )
+            for name, value in iter(decoded_ident.items()):
+                _LOGGER.debug(
+                    (
+                        f"Inverter {self.inverter_unit_id}: "
+                        f"{name} {hex(value) if isinstance(value, int) else value}"
+                    ),
                 )
 
-            if self.decoded_mmppt["mmppt_Units"] in [3]:
-                self.decoded_model.update(
-                    OrderedDict(
-                        [
-                            ("mmppt_2_ID", decoder.decode_16bit_uint()),
-                            (
-                                "mmppt_2_IDStr",
-                                parse_modbus_string(decoder.decode_string(16)),
-                            ),
-                            ("mmppt_2_DCA", decoder.decode_16bit_uint()),
-                            ("mmppt_2_DCV", decoder.decode_16bit_uint()),
-                            ("mmppt_2_DCW", decoder.decode_16bit_uint()),
-                            ("mmppt_2_DCWH", decoder.decode_32bit_uint()),
-                            ("mmppt_2_Tms", decoder.decode_32bit_uint()),
-                            ("mmppt_2_Tmp", decoder.decode_16bit_int()),
-                            ("mmppt_2_DCSt", decoder.decode_16bit_uint()),
-                            ("mmppt_2_DCEvt", decoder.decode_32bit_uint()),
-                        ]
-                    )
+            if (
+                decoded_ident["C_SunSpec_DID"] == SunSpecNotImpl.UINT16
+                or decoded_ident["C_SunSpec_DID"] not in INVERTER_DIDS
+                or decoded_ident["C_SunSpec_Length"] != INVERTER_LENGTH
+            ):
+                raise DeviceInvalid(f"Inverter {self.inverter_unit_id} not usable.")
+
+            inverter_data = responses[INVERTER_MODEL.span()]
+            if inverter_data.isError():
+                _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
+                raise ModbusReadError(inverter_data)
+
+            self.decoded_model.update(
+                [("C_SunSpec_DID", decoded_ident["C_SunSpec_DID"])]
+                + INVERTER_MODEL.decode(inverter_data.registers)
+            )
+
+            if self.decoded_model["I_Status"] in INVERTER_SLEEP_STATUS:
+                _LOGGER.debug(
+                    f"Inverter {self.inverter_unit_id} is asleep, polling status only."
                 )
+                self.sleeping = True
 
-            try:
-                del self.decoded_model["ignore"]
-            except KeyError:
-                pass
+        if self._changes.blocks_changed(responses, INVERTER_STATUS.span()):
+            self.decoded_model.update(
+                INVERTER_STATUS.decode(responses[INVERTER_STATUS.span()].registers)
+            )
+
+        """ Multiple MPPT Extension """
+        if self.decoded_mmppt is not None and self._changes.blocks_changed(
+            responses, self._mmppt_model.span()
+        ):
+            inverter_data = responses[self._mmppt_model.span()]
+            if inverter_data.isError():
+                _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
+                raise ModbusReadError(inverter_data)
+
+            self.decoded_model.update(self._mmppt_model.decode(inverter_data.registers))
 
         """ Global Dynamic Power Control and Status """
-        if self.global_power_control is True or self.global_power_control is None:
-            inverter_data = self.hub.read_holding_registers(
-                unit=self.inverter_unit_id, address=61440, count=4
-            )
+        if (
+            self.global_power_control is True or self.global_power_control is None
+        ) and self._changes.blocks_changed(responses, GLOBAL_POWER_CONTROL.span()):
+            inverter_data = responses[GLOBAL_POWER_CONTROL.span()]
             if inverter_data.isError():
                 _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
 
@@ -877,6 +1515,7 @@ class SolarEdgeInverter:
                 if type(inverter_data) is ExceptionResponse:
                     if inverter_data.exception_code == ModbusExceptions.IllegalAddress:
                         self.global_power_control = False
+                        self._read_plan = None
                         _LOGGER.debug(
                             (
                                 f"Inverter {self.inverter_unit_id}: "
@@ -888,28 +1527,16 @@ class SolarEdgeInverter:
                     raise ModbusReadError(inverter_data)
 
             else:
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    inverter_data.registers,
-                    byteorder=Endian.Big,
-                    wordorder=Endian.Little,
-                )
-
                 self.decoded_model.update(
-                    OrderedDict(
-                        [
-                            ("I_RRCR", decoder.decode_16bit_uint()),
-                            ("I_Power_Limit", decoder.decode_16bit_uint()),
-                            ("I_CosPhi", decoder.decode_32bit_float()),
-                        ]
-                    )
+                    GLOBAL_POWER_CONTROL.decode(inverter_data.registers)
                 )
                 self.global_power_control = True
 
         """ Power Control Options """
-        if self.advanced_power_control is True or self.advanced_power_control is None:
-            inverter_data = self.hub.read_holding_registers(
-                unit=self.inverter_unit_id, address=61762, count=2
-            )
+        if (
+            self.advanced_power_control is True or self.advanced_power_control is None
+        ) and self._changes.blocks_changed(responses, ADVANCED_POWER_CONTROL.span()):
+            inverter_data = responses[ADVANCED_POWER_CONTROL.span()]
             if inverter_data.isError():
                 _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
 
@@ -921,6 +1548,7 @@ class SolarEdgeInverter:
                 if type(inverter_data) is ExceptionResponse:
                     if inverter_data.exception_code == ModbusExceptions.IllegalAddress:
                         self.advanced_power_control = False
+                        self._read_plan = None
                         _LOGGER.debug(
                             (
                                 f"Inverter {self.inverter_unit_id}: "
@@ -932,24 +1560,18 @@ class SolarEdgeInverter:
                     raise ModbusReadError(inverter_data)
 
             else:
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    inverter_data.registers, byteorder=Endian.Big
-                )
-
                 self.decoded_model.update(
-                    OrderedDict(
-                        [
-                            ("I_AdvPwrCtrlEn", decoder.decode_32bit_int()),
-                        ]
-                    )
+                    ADVANCED_POWER_CONTROL.decode(inverter_data.registers)
                 )
                 self.advanced_power_control = True
 
         """ Site Limit Control """
-        if self._has_export_control is True or self._has_export_control is None:
-            inverter_data = self.hub.read_holding_registers(
-                unit=self.inverter_unit_id, address=57344, count=4
-            )
+        if (
+            self._has_export_control is True or self._has_export_control is None
+        ) and self._changes.blocks_changed(
+            responses, EXPORT_CONTROL.span(), EXTERNAL_PRODUCTION.span()
+        ):
+            inverter_data = responses[EXPORT_CONTROL.span()]
             if inverter_data.isError():
                 _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
 
@@ -961,6 +1583,7 @@ class SolarEdgeInverter:
                 if type(inverter_data) is ExceptionResponse:
                     if inverter_data.exception_code == ModbusExceptions.IllegalAddress:
                         self._has_export_control = False
+                        self._read_plan = None
                         _LOGGER.debug(
                             (
                                 f"Inverter {self.inverter_unit_id}: "
@@ -974,26 +1597,12 @@ class SolarEdgeInverter:
             else:
                 self._has_export_control = True
 
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    inverter_data.registers,
-                    byteorder=Endian.Big,
-                    wordorder=Endian.Little,
-                )
-
                 self.decoded_model.update(
-                    OrderedDict(
-                        [
-                            ("E_Lim_Ctl_Mode", decoder.decode_16bit_uint()),
-                            ("E_Lim_Ctl", decoder.decode_16bit_uint()),
-                            ("E_Site_Limit", decoder.decode_32bit_float()),
-                        ]
-                    )
+                    EXPORT_CONTROL.decode(inverter_data.registers)
                 )
 
             """ External Production Max Power """
-            inverter_data = self.hub.read_holding_registers(
-                unit=self.inverter_unit_id, address=57362, count=2
-            )
+            inverter_data = responses[EXTERNAL_PRODUCTION.span()]
             if inverter_data.isError():
                 _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
 
@@ -1020,18 +1629,8 @@ class SolarEdgeInverter:
                     raise ModbusReadError(inverter_data)
 
             else:
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    inverter_data.registers,
-                    byteorder=Endian.Big,
-                    wordorder=Endian.Little,
-                )
-
                 self.decoded_model.update(
-                    OrderedDict(
-                        [
-                            ("Ext_Prod_Max", decoder.decode_32bit_float()),
-                        ]
-                    )
+                    EXTERNAL_PRODUCTION.decode(inverter_data.registers)
                 )
 
         for name, value in iter(self.decoded_model.items()):
@@ -1042,56 +1641,40 @@ class SolarEdgeInverter:
             _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {name} {display_value}")
 
         """ Power Control Options: Storage Control """
-        if self.hub.option_storage_control is True and self.decoded_storage is not None:
-            for battery in self.hub.batteries:
-                if self.inverter_unit_id != battery.inverter_unit_id:
-                    continue
-
-                inverter_data = self.hub.read_holding_registers(
-                    unit=self.inverter_unit_id, address=57348, count=14
-                )
-                if inverter_data.isError():
-                    _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
+        if self._has_storage_control and self._changes.blocks_changed(
+            responses, STORAGE_CONTROL.span()
+        ):
+            inverter_data = responses[STORAGE_CONTROL.span()]
+            if inverter_data.isError():
+                _LOGGER.debug(f"Inverter {self.inverter_unit_id}: {inverter_data}")
 
-                    if type(inverter_data) is ModbusIOException:
-                        raise ModbusReadError(
-                            f"No response from inverter ID {self.inverter_unit_id}"
-                        )
+                if type(inverter_data) is ModbusIOException:
+                    raise ModbusReadError(
+                        f"No response from inverter ID {self.inverter_unit_id}"
+                    )
 
-                    if type(inverter_data) is ExceptionResponse:
-                        if (
-                            inverter_data.exception_code
-                            == ModbusExceptions.IllegalAddress
-                        ):
-                            self.decoded_storage = False
-                            _LOGGER.debug(
-                                (
-                                    f"Inverter {self.inverter_unit_id}: "
-                                    "storage control NOT available"
-                                )
+                if type(inverter_data) is ExceptionResponse:
+                    if inverter_data.exception_code == ModbusExceptions.IllegalAddress:
+                        self.decoded_storage = False
+                        self._read_plan = None
+                        _LOGGER.debug(
+                            (
+                                f"Inverter {self.inverter_unit_id}: "
+                                "storage control NOT available"
                             )
+                        )
 
-                    if self.decoded_storage is not None:
-                        raise ModbusReadError(inverter_data)
+                if self.decoded_storage is not False:
+                    raise ModbusReadError(inverter_data)
 
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    inverter_data.registers,
-                    byteorder=Endian.Big,
-                    wordorder=Endian.Little,
+            elif isinstance(self.decoded_storage, DecodedValues):
+                self.decoded_storage.update(
+                    STORAGE_CONTROL.decode(inverter_data.registers)
                 )
 
-                self.decoded_storage = OrderedDict(
-                    [
-                        ("control_mode", decoder.decode_16bit_uint()),
-                        ("ac_charge_policy", decoder.decode_16bit_uint()),
-                        ("ac_charge_limit", decoder.decode_32bit_float()),
-                        ("backup_reserve", decoder.decode_32bit_float()),
-                        ("default_mode", decoder.decode_16bit_uint()),
-                        ("command_timeout", decoder.decode_32bit_uint()),
-                        ("command_mode", decoder.decode_16bit_uint()),
-                        ("charge_limit", decoder.decode_32bit_float()),
-                        ("discharge_limit", decoder.decode_32bit_float()),
-                    ]
+            else:
+                self.decoded_storage = DecodedValues(
+                    self._changes, STORAGE_CONTROL.decode(inverter_data.registers)
                 )
 
                 for name, value in iter(self.decoded_storage.items()):
@@ -1103,14 +1686,143 @@ class SolarEdgeInverter:
                         f"Inverter {self.inverter_unit_id}: {name} {display_value}"
                     )
 
+        self._changes.commit(decoded_before, self._decoded_values)
+
+    @property
+    def _decoded_values(self) -> dict:
+        if isinstance(self.decoded_storage, dict):
+            return {**self.decoded_model, **self.decoded_storage}
+
+        return dict(self.decoded_model)
+
     async def write_registers(self, address, payload):
-        """Write inverter register."""
-        await self.hub.write_registers(self.inverter_unit_id, address, payload)
+        """Write inverter registers."""
+        return await self.hub.write_registers(self.inverter_unit_id, address, payload)
+
+    async def write_field(self, block, name, value, on_change=None):
+        """Write a field with an optimistic update of its decoded value.
+
+        The value is applied before the write is sent, and on_change is
+        called so the entity can show it at once. The block is decoded
+        again by the refresh after the write even if its registers didn't
+        change, so a write the inverter acknowledged but didn't apply shows
+        the value it reads back. A failed write restores the previous value.
+        """
+        previous = self.apply_field(block, name, value)
+
+        if on_change is not None:
+            on_change()
+
+        return await self.write_applied_field(block, name, value, previous, on_change)
+
+    def apply_field(self, block, name, value):
+        """Set the decoded value of a field, returning the value it replaces."""
+        decoded = (
+            self.decoded_storage if block is STORAGE_CONTROL else self.decoded_model
+        )
+        previous = decoded.get(name)
+        decoded[name] = value
+        return previous
+
+    async def write_applied_field(self, block, name, value, previous, on_change=None):
+        """Write a field whose value was already set with apply_field.
+
+        Like write_field, with previous the value to restore if the write
+        fails.
+        """
+        payload = block.encode(name, value)
+        decoded = (
+            self.decoded_storage if block is STORAGE_CONTROL else self.decoded_model
+        )
+        result = None
+
+        self._changes.invalidate(block.span())
+
+        try:
+            result = await self.write_registers(block.address_of(name), payload)
+
+        finally:
+            if result is None or result.isError():
+                _LOGGER.warning(
+                    (
+                        f"Inverter {self.inverter_unit_id}: write of {name} "
+                        f"failed, restoring {previous}."
+                    ),
+                )
+                if previous is None:
+                    decoded.pop(name, None)
+                else:
+                    decoded[name] = previous
+
+            elif block.encode(name, decoded.get(name, value)) != payload:
+                _LOGGER.warning(
+                    (
+                        f"Inverter {self.inverter_unit_id}: {name} reads back "
+                        f"as {decoded[name]} after writing {value}."
+                    ),
+                )
+
+            if on_change is not None:
+                on_change()
+
+        return result
+
+    async def write_storage_command(
+        self, command_mode, command_timeout, charge_limit, discharge_limit
+    ):
+        """Write a storage remote control command in a single request.
+
+        Command timeout, mode, charge and discharge limits are adjacent
+        registers, so the whole command takes effect at once.
+        """
+        payload = [
+            *STORAGE_CONTROL.encode("command_timeout", int(command_timeout)),
+            *STORAGE_CONTROL.encode("command_mode", int(command_mode)),
+            *STORAGE_CONTROL.encode("charge_limit", float(charge_limit)),
+            *STORAGE_CONTROL.encode("discharge_limit", float(discharge_limit)),
+        ]
+
+        return await self.write_registers(
+            STORAGE_CONTROL.address_of("command_timeout"), payload
+        )
+
+    async def refresh_registers(self, address: int, count: int) -> None:
+        """Read and decode only the polled blocks overlapping a register range.
+
+        Export control and external production are decoded together, so
+        both are read when either one is.
+        """
+        blocks = [
+            block
+            for block in self._polled_blocks()
+            if block.address < address + count and address < block.address + block.count
+        ]
+
+        if EXPORT_CONTROL in blocks or EXTERNAL_PRODUCTION in blocks:
+            blocks = list(dict.fromkeys(blocks + [EXPORT_CONTROL, EXTERNAL_PRODUCTION]))
+
+        if not blocks:
+            return
+
+        responses = await self.hub.read_holding_plan(
+            self.inverter_unit_id,
+            self.hub.compile_read_plan([block.span() for block in blocks]),
+        )
+
+        try:
+            self._decode_responses(responses)
+
+        except (ModbusReadError, DeviceInvalid) as e:
+            _LOGGER.debug(f"Inverter {self.inverter_unit_id}: refresh failed: {e}")
 
     @property
     def online(self) -> bool:
         """Device is online."""
-        return self.hub.online
+        return (
+            self.hub.online
+            and self.health.healthy
+            and self.hub.unit_online(self.inverter_unit_id)
+        )
 
     @property
     def device_info(self) -> Optional[Dict[str, Any]]:
@@ -1127,38 +1839,36 @@ class SolarEdgeMeter:
     ) -> None:
         self.inverter_unit_id = device_id
         self.hub = hub
+        self.health = DeviceHealth()
+        self._changes = ChangeTracker()
         self.decoded_common = []
         self.decoded_model = []
-        self.start_address = 40000
+        self.start_address = None
         self.meter_id = meter_id
         self.has_parent = True
+        self._read_plan = None
         self.inverter_common = self.hub.inverter_common[self.inverter_unit_id]
         self.mmppt_common = self.hub.mmppt_common[self.inverter_unit_id]
 
-        if self.meter_id == 1:
-            self.start_address = self.start_address + 121
-        elif self.meter_id == 2:
-            self.start_address = self.start_address + 295
-        elif self.meter_id == 3:
-            self.start_address = self.start_address + 469
-        else:
+        if self.meter_id not in METER_ADDRESSES:
             raise ValueError(f"Invalid meter_id {self.meter_id}")
 
-        if self.mmppt_common is not None:
-            if self.mmppt_common["mmppt_Units"] == 2:
-                self.start_address = self.start_address + 50
+        if self.mmppt_common is None:
+            self.start_address = meter_address(self.meter_id)
 
-            elif self.mmppt_common["mmppt_Units"] == 3:
-                self.start_address = self.start_address + 70
+        elif self.mmppt_common["mmppt_Units"] in MMPPT_MODEL:
+            self.start_address = meter_address(
+                self.meter_id, self.mmppt_common["mmppt_Units"]
+            )
 
-            else:
-                raise ValueError(
-                    f"Invalid mmppt_Units value {self.mmppt_common['mmppt_Units']}"
-                )
+        else:
+            raise ValueError(
+                f"Invalid mmppt_Units value {self.mmppt_common['mmppt_Units']}"
+            )
 
-    def init_device(self) -> None:
-        meter_info = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id, address=self.start_address, count=2
+    async def init_device(self) -> None:
+        meter_info = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *METER_COMMON_IDENT.span(self.start_address)
         )
         if meter_info.isError():
             _LOGGER.debug(
@@ -1179,15 +1889,7 @@ class SolarEdgeMeter:
 
             raise ModbusReadError(meter_info)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            meter_info.registers, byteorder=Endian.Big
-        )
-        decoded_ident = OrderedDict(
-            [
-                ("C_SunSpec_DID", decoder.decode_16bit_uint()),
-                ("C_SunSpec_Length", decoder.decode_16bit_uint()),
-            ]
-        )
+        decoded_ident = OrderedDict(METER_COMMON_IDENT.decode(meter_info.registers))
 
         for name, value in iter(decoded_ident.items()):
             _LOGGER.debug(
@@ -1199,39 +1901,19 @@ class SolarEdgeMeter:
 
         if (
             decoded_ident["C_SunSpec_DID"] == SunSpecNotImpl.UINT16
-            or decoded_ident["C_SunSpec_DID"] != 0x0001
-            or decoded_ident["C_SunSpec_Length"] != 65
+            or decoded_ident["C_SunSpec_DID"] != COMMON_DID
+            or decoded_ident["C_SunSpec_Length"] != COMMON_LENGTH
         ):
-            raise DeviceInvalid("Meter {self.meter_id} not usable.")
+            raise DeviceInvalid(f"Meter {self.meter_id} not usable.")
 
-        meter_info = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id,
-            address=self.start_address + 2,
-            count=65,
+        meter_info = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *METER_COMMON.span(self.start_address)
         )
         if meter_info.isError():
             _LOGGER.debug(meter_info)
             raise ModbusReadError(meter_info)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            meter_info.registers, byteorder=Endian.Big
-        )
-        self.decoded_common = OrderedDict(
-            [
-                (
-                    "C_Manufacturer",
-                    parse_modbus_string(decoder.decode_string(32)),
-                ),
-                ("C_Model", parse_modbus_string(decoder.decode_string(32))),
-                ("C_Option", parse_modbus_string(decoder.decode_string(16))),
-                ("C_Version", parse_modbus_string(decoder.decode_string(16))),
-                (
-                    "C_SerialNumber",
-                    parse_modbus_string(decoder.decode_string(32)),
-                ),
-                ("C_Device_address", decoder.decode_16bit_uint()),
-            ]
-        )
+        self.decoded_common = OrderedDict(METER_COMMON.decode(meter_info.registers))
 
         for name, value in iter(self.decoded_common.items()):
             _LOGGER.debug(
@@ -1241,6 +1923,9 @@ class SolarEdgeMeter:
                 ),
             )
 
+        self._init_device_info()
+
+    def _init_device_info(self) -> None:
         self.manufacturer = self.decoded_common["C_Manufacturer"]
         self.model = self.decoded_common["C_Model"]
         self.option = self.decoded_common["C_Option"]
@@ -1262,32 +1947,95 @@ class SolarEdgeMeter:
             "hw_version": self.option,
         }
 
-    def read_modbus_data(self) -> None:
-        meter_data = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id,
-            address=self.start_address + 67,
-            count=2,
+    @property
+    def cache_data(self) -> dict:
+        """Discovery results to persist between restarts."""
+        return {
+            "inverter_unit_id": self.inverter_unit_id,
+            "meter_id": self.meter_id,
+            "decoded_common": dict(self.decoded_common),
+        }
+
+    def restore_device(self, data: dict) -> None:
+        """Initialize from persisted discovery results instead of probing."""
+        self.decoded_common = OrderedDict(data["decoded_common"])
+        self._init_device_info()
+
+    async def validate_device(self) -> bool:
+        """Check that the serial number and firmware match this device."""
+        meter_info = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *METER_IDENTITY.span(self.start_address)
         )
-        if meter_data.isError():
+        if meter_info.isError():
             _LOGGER.debug(
                 (
                     f"Inverter {self.inverter_unit_id} "
-                    f"meter {self.meter_id}: {meter_data}"
+                    f"meter {self.meter_id}: {meter_info}"
                 ),
             )
-            raise ModbusReadError(f"Meter read error: {meter_data}")
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            meter_data.registers, byteorder=Endian.Big
+            if type(meter_info) is ExceptionResponse:
+                if meter_info.exception_code == ModbusExceptions.IllegalAddress:
+                    return False
+
+            raise ModbusReadError(meter_info)
+
+        decoded_common = dict(METER_IDENTITY.decode(meter_info.registers))
+
+        return (
+            decoded_common["C_SerialNumber"] == self.serial
+            and decoded_common["C_Version"] == self.fw_version
         )
 
-        decoded_ident = OrderedDict(
-            [
-                ("C_SunSpec_DID", decoder.decode_16bit_uint()),
-                ("C_SunSpec_Length", decoder.decode_16bit_uint()),
-            ]
+    @property
+    def polled_spans(self) -> list:
+        """Return the (address, count, tier) register blocks read by polling."""
+        return [
+            (*block.span(self.start_address), block.tier)
+            for block in (METER_IDENT, METER_MODEL)
+        ]
+
+    def polls(self, tiers) -> bool:
+        return PollTier.FAST in tiers
+
+    async def read_modbus_data(self, tiers=tuple(PollTier)) -> None:
+        if PollTier.FAST not in tiers:
+            return
+
+        if self._read_plan is None:
+            self._read_plan = self.hub.compile_read_plan(
+                [
+                    METER_IDENT.span(self.start_address),
+                    METER_MODEL.span(self.start_address),
+                ]
+            )
+
+        responses = await self.hub.read_holding_plan(
+            self.inverter_unit_id, self._read_plan
         )
 
+        self._changes.begin()
+        if not self._changes.blocks_changed(
+            responses,
+            METER_IDENT.span(self.start_address),
+            METER_MODEL.span(self.start_address),
+        ):
+            return
+
+        decoded_before = dict(self.decoded_model)
+
+        meter_data = responses[METER_IDENT.span(self.start_address)]
+        if meter_data.isError():
+            _LOGGER.debug(
+                (
+                    f"Inverter {self.inverter_unit_id} "
+                    f"meter {self.meter_id}: {meter_data}"
+                ),
+            )
+            raise ModbusReadError(meter_data)
+
+        decoded_ident = OrderedDict(METER_IDENT.decode(meter_data.registers))
+
         for name, value in iter(decoded_ident.items()):
             _LOGGER.debug(
                 (
@@ -1298,102 +2046,22 @@ class SolarEdgeMeter:
 
         if (
             decoded_ident["C_SunSpec_DID"] == SunSpecNotImpl.UINT16
-            or decoded_ident["C_SunSpec_DID"] not in [201, 202, 203, 204]
-            or decoded_ident["C_SunSpec_Length"] != 105
+            or decoded_ident["C_SunSpec_DID"] not in METER_DIDS
+            or decoded_ident["C_SunSpec_Length"] != METER_MODEL.count
         ):
             raise DeviceInvalid(
                 f"Meter on inverter {self.inverter_unit_id} not usable."
             )
 
-        meter_data = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id,
-            address=self.start_address + 69,
-            count=105,
-        )
+        meter_data = responses[METER_MODEL.span(self.start_address)]
         if meter_data.isError():
             _LOGGER.error(f"Meter read error: {meter_data}")
-            raise ModbusReadError(f"Meter read error: {meter_data}")
-
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            meter_data.registers, byteorder=Endian.Big
-        )
+            raise ModbusReadError(meter_data)
 
-        self.decoded_model = OrderedDict(
-            [
-                ("C_SunSpec_DID", decoded_ident["C_SunSpec_DID"]),
-                ("AC_Current", decoder.decode_16bit_int()),
-                ("AC_Current_A", decoder.decode_16bit_int()),
-                ("AC_Current_B", decoder.decode_16bit_int()),
-                ("AC_Current_C", decoder.decode_16bit_int()),
-                ("AC_Current_SF", decoder.decode_16bit_int()),
-                ("AC_Voltage_LN", decoder.decode_16bit_int()),
-                ("AC_Voltage_AN", decoder.decode_16bit_int()),
-                ("AC_Voltage_BN", decoder.decode_16bit_int()),
-                ("AC_Voltage_CN", decoder.decode_16bit_int()),
-                ("AC_Voltage_LL", decoder.decode_16bit_int()),
-                ("AC_Voltage_AB", decoder.decode_16bit_int()),
-                ("AC_Voltage_BC", decoder.decode_16bit_int()),
-                ("AC_Voltage_CA", decoder.decode_16bit_int()),
-                ("AC_Voltage_SF", decoder.decode_16bit_int()),
-                ("AC_Frequency", decoder.decode_16bit_int()),
-                ("AC_Frequency_SF", decoder.decode_16bit_int()),
-                ("AC_Power", decoder.decode_16bit_int()),
-                ("AC_Power_A", decoder.decode_16bit_int()),
-                ("AC_Power_B", decoder.decode_16bit_int()),
-                ("AC_Power_C", decoder.decode_16bit_int()),
-                ("AC_Power_SF", decoder.decode_16bit_int()),
-                ("AC_VA", decoder.decode_16bit_int()),
-                ("AC_VA_A", decoder.decode_16bit_int()),
-                ("AC_VA_B", decoder.decode_16bit_int()),
-                ("AC_VA_C", decoder.decode_16bit_int()),
-                ("AC_VA_SF", decoder.decode_16bit_int()),
-                ("AC_var", decoder.decode_16bit_int()),
-                ("AC_var_A", decoder.decode_16bit_int()),
-                ("AC_var_B", decoder.decode_16bit_int()),
-                ("AC_var_C", decoder.decode_16bit_int()),
-                ("AC_var_SF", decoder.decode_16bit_int()),
-                ("AC_PF", decoder.decode_16bit_int()),
-                ("AC_PF_A", decoder.decode_16bit_int()),
-                ("AC_PF_B", decoder.decode_16bit_int()),
-                ("AC_PF_C", decoder.decode_16bit_int()),
-                ("AC_PF_SF", decoder.decode_16bit_int()),
-                ("AC_Energy_WH_Exported", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_Exported_A", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_Exported_B", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_Exported_C", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_Imported", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_Imported_A", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_Imported_B", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_Imported_C", decoder.decode_32bit_uint()),
-                ("AC_Energy_WH_SF", decoder.decode_16bit_int()),
-                ("M_VAh_Exported", decoder.decode_32bit_uint()),
-                ("M_VAh_Exported_A", decoder.decode_32bit_uint()),
-                ("M_VAh_Exported_B", decoder.decode_32bit_uint()),
-                ("M_VAh_Exported_C", decoder.decode_32bit_uint()),
-                ("M_VAh_Imported", decoder.decode_32bit_uint()),
-                ("M_VAh_Imported_A", decoder.decode_32bit_uint()),
-                ("M_VAh_Imported_B", decoder.decode_32bit_uint()),
-                ("M_VAh_Imported_C", decoder.decode_32bit_uint()),
-                ("M_VAh_SF", decoder.decode_16bit_int()),
-                ("M_varh_Import_Q1", decoder.decode_32bit_uint()),
-                ("M_varh_Import_Q1_A", decoder.decode_32bit_uint()),
-                ("M_varh_Import_Q1_B", decoder.decode_32bit_uint()),
-                ("M_varh_Import_Q1_C", decoder.decode_32bit_uint()),
-                ("M_varh_Import_Q2", decoder.decode_32bit_uint()),
-                ("M_varh_Import_Q2_A", decoder.decode_32bit_uint()),
-                ("M_varh_Import_Q2_B", decoder.decode_32bit_uint()),
-                ("M_varh_Import_Q2_C", decoder.decode_32bit_uint()),
-                ("M_varh_Export_Q3", decoder.decode_32bit_uint()),
-                ("M_varh_Export_Q3_A", decoder.decode_32bit_uint()),
-                ("M_varh_Export_Q3_B", decoder.decode_32bit_uint()),
-                ("M_varh_Export_Q3_C", decoder.decode_32bit_uint()),
-                ("M_varh_Export_Q4", decoder.decode_32bit_uint()),
-                ("M_varh_Export_Q4_A", decoder.decode_32bit_uint()),
-                ("M_varh_Export_Q4_B", decoder.decode_32bit_uint()),
-                ("M_varh_Export_Q4_C", decoder.decode_32bit_uint()),
-                ("M_varh_SF", decoder.decode_16bit_int()),
-                ("M_Events", decoder.decode_32bit_uint()),
-            ]
+        self.decoded_model = DecodedValues(
+            self._changes,
+            [("C_SunSpec_DID", decoded_ident["C_SunSpec_DID"])]
+            + METER_MODEL.decode(meter_data.registers),
         )
 
         for name, value in iter(self.decoded_model.items()):
@@ -1404,10 +2072,16 @@ class SolarEdgeMeter:
                 ),
             )
 
+        self._changes.commit(decoded_before, self.decoded_model)
+
     @property
     def online(self) -> bool:
         """Device is online."""
-        return self.hub.online
+        return (
+            self.hub.online
+            and self.health.healthy
+            and self.hub.unit_online(self.inverter_unit_id)
+        )
 
     @property
     def device_info(self) -> Optional[Dict[str, Any]]:
@@ -1424,6 +2098,8 @@ class SolarEdgeBattery:
     ) -> None:
         self.inverter_unit_id = device_id
         self.hub = hub
+        self.health = DeviceHealth()
+        self._changes = ChangeTracker()
         self.decoded_common = []
         self.decoded_model = []
         self.start_address = None
@@ -1431,16 +2107,15 @@ class SolarEdgeBattery:
         self.has_parent = True
         self.inverter_common = self.hub.inverter_common[self.inverter_unit_id]
 
-        if self.battery_id == 1:
-            self.start_address = 57600
-        elif self.battery_id == 2:
-            self.start_address = 57856
-        else:
-            raise ValueError("Invalid battery_id {self.battery_id}")
+        try:
+            self.start_address = BATTERY_ADDRESSES[self.battery_id]
+
+        except KeyError:
+            raise ValueError(f"Invalid battery_id {self.battery_id}")
 
-    def init_device(self) -> None:
-        battery_info = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id, address=self.start_address, count=76
+    async def init_device(self) -> None:
+        battery_info = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *BATTERY_COMMON.span(self.start_address)
         )
         if battery_info.isError():
             _LOGGER.debug(
@@ -1461,32 +2136,7 @@ class SolarEdgeBattery:
 
             raise ModbusReadError(battery_info)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            battery_info.registers,
-            byteorder=Endian.Big,
-            wordorder=Endian.Little,
-        )
-        self.decoded_common = OrderedDict(
-            [
-                (
-                    "B_Manufacturer",
-                    parse_modbus_string(decoder.decode_string(32)),
-                ),
-                ("B_Model", parse_modbus_string(decoder.decode_string(32))),
-                ("B_Version", parse_modbus_string(decoder.decode_string(32))),
-                (
-                    "B_SerialNumber",
-                    parse_modbus_string(decoder.decode_string(32)),
-                ),
-                ("B_Device_Address", decoder.decode_16bit_uint()),
-                ("Reserved", decoder.decode_16bit_uint()),
-                ("B_RatedEnergy", decoder.decode_32bit_float()),
-                ("B_MaxChargePower", decoder.decode_32bit_float()),
-                ("B_MaxDischargePower", decoder.decode_32bit_float()),
-                ("B_MaxChargePeakPower", decoder.decode_32bit_float()),
-                ("B_MaxDischargePeakPower", decoder.decode_32bit_float()),
-            ]
-        )
+        self.decoded_common = self._decode_common(battery_info.registers)
 
         for name, value in iter(self.decoded_common.items()):
             if isinstance(value, float):
@@ -1517,8 +2167,15 @@ class SolarEdgeBattery:
             or len(self.decoded_common["B_Model"]) == 0
             or len(self.decoded_common["B_SerialNumber"]) == 0
         ):
-            raise DeviceInvalid("Battery {self.battery_id} not usable.")
+            raise DeviceInvalid(f"Battery {self.battery_id} not usable.")
 
+        self._init_device_info()
+
+    @staticmethod
+    def _decode_common(registers) -> OrderedDict:
+        return OrderedDict(BATTERY_COMMON.decode(registers))
+
+    def _init_device_info(self) -> None:
         self.manufacturer = self.decoded_common["B_Manufacturer"]
         self.model = self.decoded_common["B_Model"]
         self.option = ""
@@ -1539,54 +2196,76 @@ class SolarEdgeBattery:
             "sw_version": self.fw_version,
         }
 
-    def read_modbus_data(self) -> None:
-        battery_data = self.hub.read_holding_registers(
-            unit=self.inverter_unit_id,
-            address=self.start_address + 108,
-            count=46,
+    @property
+    def cache_data(self) -> dict:
+        """Discovery results to persist between restarts."""
+        return {
+            "inverter_unit_id": self.inverter_unit_id,
+            "battery_id": self.battery_id,
+            "decoded_common": dict(self.decoded_common),
+        }
+
+    def restore_device(self, data: dict) -> None:
+        """Initialize from persisted discovery results instead of probing."""
+        self.decoded_common = OrderedDict(data["decoded_common"])
+        self._init_device_info()
+
+    async def validate_device(self) -> bool:
+        """Check that the serial number and firmware match this device."""
+        battery_info = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *BATTERY_IDENTITY.span(self.start_address)
+        )
+        if battery_info.isError():
+            _LOGGER.debug(
+                (
+                    f"Inverter {self.inverter_unit_id} "
+                    f"battery {self.battery_id}: {battery_info}"
+                ),
+            )
+
+            if type(battery_info) is ExceptionResponse:
+                if battery_info.exception_code == ModbusExceptions.IllegalAddress:
+                    return False
+
+            raise ModbusReadError(battery_info)
+
+        decoded_common = dict(BATTERY_IDENTITY.decode(battery_info.registers))
+
+        return (
+            decoded_common["B_SerialNumber"] == self.serial
+            and decoded_common["B_Version"] == self.fw_version
+        )
+
+    @property
+    def polled_spans(self) -> list:
+        """Return the (address, count, tier) register blocks read by polling."""
+        return [(*BATTERY_MODEL.span(self.start_address), BATTERY_MODEL.tier)]
+
+    def polls(self, tiers) -> bool:
+        return PollTier.SLOW in tiers
+
+    async def read_modbus_data(self, tiers=tuple(PollTier)) -> None:
+        if PollTier.SLOW not in tiers:
+            return
+
+        battery_data = await self.hub.read_holding_registers(
+            self.inverter_unit_id, *BATTERY_MODEL.span(self.start_address)
         )
         if battery_data.isError():
             _LOGGER.error(f"Battery read error: {battery_data}")
-            raise ModbusReadError(f"Battery read error: {battery_data}")
+            raise ModbusReadError(battery_data)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            battery_data.registers,
-            byteorder=Endian.Big,
-            wordorder=Endian.Little,
-        )
+        self._changes.begin()
+        if not self._changes.blocks_changed(
+            {BATTERY_MODEL.span(self.start_address): battery_data},
+            BATTERY_MODEL.span(self.start_address),
+        ):
+            return
+
+        decoded_before = dict(self.decoded_model)
 
-        self.decoded_model = OrderedDict(
-            [
-                ("B_Temp_Average", decoder.decode_32bit_float()),
-                ("B_Temp_Max", decoder.decode_32bit_float()),
-                ("B_DC_Voltage", decoder.decode_32bit_float()),
-                ("B_DC_Current", decoder.decode_32bit_float()),
-                ("B_DC_Power", decoder.decode_32bit_float()),
-                ("B_Export_Energy_WH", decoder.decode_64bit_uint()),
-                ("B_Import_Energy_WH", decoder.decode_64bit_uint()),
-                ("B_Energy_Max", decoder.decode_32bit_float()),
-                ("B_Energy_Available", decoder.decode_32bit_float()),
-                ("B_SOH", decoder.decode_32bit_float()),
-                ("B_SOE", decoder.decode_32bit_float()),
-                ("B_Status", decoder.decode_32bit_uint()),
-                ("B_Status_Vendor", decoder.decode_32bit_uint()),
-                ("B_Event_Log1", decoder.decode_16bit_uint()),
-                ("B_Event_Log2", decoder.decode_16bit_uint()),
-                ("B_Event_Log3", decoder.decode_16bit_uint()),
-                ("B_Event_Log4", decoder.decode_16bit_uint()),
-                ("B_Event_Log5", decoder.decode_16bit_uint()),
-                ("B_Event_Log6", decoder.decode_16bit_uint()),
-                ("B_Event_Log7", decoder.decode_16bit_uint()),
-                ("B_Event_Log8", decoder.decode_16bit_uint()),
-                ("B_Event_Log_Vendor1", decoder.decode_16bit_uint()),
-                ("B_Event_Log_Vendor2", decoder.decode_16bit_uint()),
-                ("B_Event_Log_Vendor3", decoder.decode_16bit_uint()),
-                ("B_Event_Log_Vendor4", decoder.decode_16bit_uint()),
-                ("B_Event_Log_Vendor5", decoder.decode_16bit_uint()),
-                ("B_Event_Log_Vendor6", decoder.decode_16bit_uint()),
-                ("B_Event_Log_Vendor7", decoder.decode_16bit_uint()),
-                ("B_Event_Log_Vendor8", decoder.decode_16bit_uint()),
-            ]
+        self.decoded_model = DecodedValues(
+            self._changes, BATTERY_MODEL.decode(battery_data.registers)
         )
 
         for name, value in iter(self.decoded_model.items()):
@@ -1606,10 +2285,16 @@ class SolarEdgeBattery:
                     ),
                 )
 
+        self._changes.commit(decoded_before, self.decoded_model)
+
     @property
     def online(self) -> bool:
         """Device is online."""
-        return self.hub.online
+        return (
+            self.hub.online
+            and self.health.healthy
+            and self.hub.unit_online(self.inverter_unit_id)
+        )
 
     @property
     def device_info(self) -> Optional[Dict[str, Any]]:
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from homeassistant.components.number import NumberEntity
@@ -12,11 +13,10 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from pymodbus.constants import Endian
-from pymodbus.payload import BinaryPayloadBuilder
 
-from .const import DOMAIN, SunSpecNotImpl
-from .helpers import float_to_hex
+from .const import DOMAIN, NUMBER_DEBOUNCE_WINDOW
+from .helpers import float_to_hex, reads_changed, record_reads
+from .sunspec import EXPORT_CONTROL, EXTERNAL_PRODUCTION, STORAGE_CONTROL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,12 +28,13 @@ async def async_setup_entry(
 ) -> None:
 
     hub = hass.data[DOMAIN][config_entry.entry_id]["hub"]
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    coordinators = hass.data[DOMAIN][config_entry.entry_id]["coordinators"]
 
     entities = []
 
     """ Power Control Options: Storage Control """
     if hub.option_storage_control is True:
+        coordinator = coordinators[STORAGE_CONTROL.tier]
         for battery in hub.batteries:
             for inverter in hub.inverters:
                 if inverter.inverter_unit_id != battery.inverter_unit_id:
@@ -56,6 +57,7 @@ async def async_setup_entry(
 
     """ Power Control Options: Site Limit Control """
     if hub.option_export_control is True:
+        coordinator = coordinators[EXPORT_CONTROL.tier]
         for inverter in hub.inverters:
             entities.append(SolarEdgeSiteLimit(inverter, config_entry, coordinator))
             entities.append(
@@ -76,6 +78,11 @@ def get_key(d, search):
 class SolarEdgeNumberBase(CoordinatorEntity, NumberEntity):
     should_poll = False
     _attr_has_entity_name = True
+    _reads = None
+    _written_available = None
+    _pending_write = None
+    _previous = None
+    _debounce = None
     entity_category = EntityCategory.CONFIG
 
     def __init__(self, platform, config_entry, coordinator):
@@ -103,8 +110,41 @@ class SolarEdgeNumberBase(CoordinatorEntity, NumberEntity):
 
     @callback
     def _handle_coordinator_update(self) -> None:
+        if self.available is self._written_available and not reads_changed(self._reads):
+            return
+
+        self._written_available = self.available
+        self._reads = record_reads(self.async_write_ha_state)
+
+    async def _async_write_debounced(self, block, name, value) -> None:
+        """Write only the last value set within NUMBER_DEBOUNCE_WINDOW seconds.
+
+        Dragging a slider sets a burst of values; each is shown at once, the
+        ones replaced while waiting are never written, and every caller
+        waits for the write of the final value. A failed write restores the
+        value from before the burst.
+        """
+        self._pending_write = (block, name, value)
+        previous = self._platform.apply_field(block, name, value)
         self.async_write_ha_state()
 
+        if self._debounce is None:
+            self._previous = previous
+            self._debounce = self.hass.async_create_task(self._async_debounced_write())
+
+        await asyncio.shield(self._debounce)
+
+    async def _async_debounced_write(self) -> None:
+        await asyncio.sleep(NUMBER_DEBOUNCE_WINDOW)
+
+        block, name, value = self._pending_write
+        self._debounce = None
+
+        await self._platform.write_applied_field(
+            block, name, value, self._previous, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
+
 
 class StorageACChargeLimit(SolarEdgeNumberBase):
     icon = "mdi:lightning-bolt"
@@ -156,7 +196,7 @@ class StorageACChargeLimit(SolarEdgeNumberBase):
         if (
             self._platform.decoded_storage is False
             or float_to_hex(self._platform.decoded_storage["ac_charge_limit"])
-            == hex(SunSpecNotImpl.FLOAT32)
+            == hex(STORAGE_CONTROL.not_implemented("ac_charge_limit"))
             or self._platform.decoded_storage["ac_charge_limit"] < 0
         ):
             return None
@@ -165,12 +205,10 @@ class StorageACChargeLimit(SolarEdgeNumberBase):
 
     async def async_set_native_value(self, value: float) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {value}")
-        builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        builder.add_32bit_float(float(value))
-        await self._platform.write_registers(
-            address=57350, payload=builder.to_registers()
+        await self._platform.write_field(
+            STORAGE_CONTROL, "ac_charge_limit", float(value), self.async_write_ha_state
         )
-        await self.async_update()
+        self.coordinator.async_update_listeners()
 
 
 class StorageBackupReserve(SolarEdgeNumberBase):
@@ -195,7 +233,7 @@ class StorageBackupReserve(SolarEdgeNumberBase):
         if (
             self._platform.decoded_storage is False
             or float_to_hex(self._platform.decoded_storage["backup_reserve"])
-            == hex(SunSpecNotImpl.FLOAT32)
+            == hex(STORAGE_CONTROL.not_implemented("backup_reserve"))
             or self._platform.decoded_storage["backup_reserve"] < 0
             or self._platform.decoded_storage["backup_reserve"] > 100
         ):
@@ -205,12 +243,10 @@ class StorageBackupReserve(SolarEdgeNumberBase):
 
     async def async_set_native_value(self, value: float) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {value}")
-        builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        builder.add_32bit_float(float(value))
-        await self._platform.write_registers(
-            address=57352, payload=builder.to_registers()
+        await self._platform.write_field(
+            STORAGE_CONTROL, "backup_reserve", float(value), self.async_write_ha_state
         )
-        await self.async_update()
+        self.coordinator.async_update_listeners()
 
 
 class StorageCommandTimeout(SolarEdgeNumberBase):
@@ -243,7 +279,7 @@ class StorageCommandTimeout(SolarEdgeNumberBase):
         if (
             self._platform.decoded_storage is False
             or self._platform.decoded_storage["command_timeout"]
-            == SunSpecNotImpl.UINT32
+            == STORAGE_CONTROL.not_implemented("command_timeout")
             or self._platform.decoded_storage["command_timeout"] > 86400
         ):
             return None
@@ -252,12 +288,10 @@ class StorageCommandTimeout(SolarEdgeNumberBase):
 
     async def async_set_native_value(self, value: int) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {value}")
-        builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        builder.add_32bit_uint(int(value))
-        await self._platform.write_registers(
-            address=57355, payload=builder.to_registers()
+        await self._platform.write_field(
+            STORAGE_CONTROL, "command_timeout", int(value), self.async_write_ha_state
         )
-        await self.async_update()
+        self.coordinator.async_update_listeners()
 
 
 class StorageChargeLimit(SolarEdgeNumberBase):
@@ -295,7 +329,7 @@ class StorageChargeLimit(SolarEdgeNumberBase):
         if (
             self._platform.decoded_storage is False
             or float_to_hex(self._platform.decoded_storage["charge_limit"])
-            == hex(SunSpecNotImpl.FLOAT32)
+            == hex(STORAGE_CONTROL.not_implemented("charge_limit"))
             or self._platform.decoded_storage["charge_limit"] < 0
         ):
             return None
@@ -304,12 +338,7 @@ class StorageChargeLimit(SolarEdgeNumberBase):
 
     async def async_set_native_value(self, value: float) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {value}")
-        builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        builder.add_32bit_float(float(value))
-        await self._platform.write_registers(
-            address=57358, payload=builder.to_registers()
-        )
-        await self.async_update()
+        await self._async_write_debounced(STORAGE_CONTROL, "charge_limit", float(value))
 
 
 class StorageDischargeLimit(SolarEdgeNumberBase):
@@ -347,7 +376,7 @@ class StorageDischargeLimit(SolarEdgeNumberBase):
         if (
             self._platform.decoded_storage is False
             or float_to_hex(self._platform.decoded_storage["discharge_limit"])
-            == hex(SunSpecNotImpl.FLOAT32)
+            == hex(STORAGE_CONTROL.not_implemented("discharge_limit"))
             or self._platform.decoded_storage["discharge_limit"] < 0
         ):
             return None
@@ -356,12 +385,9 @@ class StorageDischargeLimit(SolarEdgeNumberBase):
 
     async def async_set_native_value(self, value: float) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {value}")
-        builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        builder.add_32bit_float(float(value))
-        await self._platform.write_registers(
-            address=57360, payload=builder.to_registers()
+        await self._async_write_debounced(
+            STORAGE_CONTROL, "discharge_limit", float(value)
         )
-        await self.async_update()
 
 
 class SolarEdgeSiteLimit(SolarEdgeNumberBase):
@@ -398,7 +424,7 @@ class SolarEdgeSiteLimit(SolarEdgeNumberBase):
         try:
             if (
                 float_to_hex(self._platform.decoded_model["E_Site_Limit"])
-                == hex(SunSpecNotImpl.FLOAT32)
+                == hex(EXPORT_CONTROL.not_implemented("E_Site_Limit"))
                 or self._platform.decoded_model["E_Site_Limit"] < 0
             ):
                 return None
@@ -410,12 +436,7 @@ class SolarEdgeSiteLimit(SolarEdgeNumberBase):
 
     async def async_set_native_value(self, value: float) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {value}")
-        builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        builder.add_32bit_float(float(value))
-        await self._platform.write_registers(
-            address=57346, payload=builder.to_registers()
-        )
-        await self.async_update()
+        await self._async_write_debounced(EXPORT_CONTROL, "E_Site_Limit", float(value))
 
 
 class SolarEdgeExternalProductionMax(SolarEdgeNumberBase):
@@ -455,7 +476,7 @@ class SolarEdgeExternalProductionMax(SolarEdgeNumberBase):
         try:
             if (
                 float_to_hex(self._platform.decoded_model["Ext_Prod_Max"])
-                == hex(SunSpecNotImpl.FLOAT32)
+                == hex(EXTERNAL_PRODUCTION.not_implemented("Ext_Prod_Max"))
                 or self._platform.decoded_model["Ext_Prod_Max"] < 0
             ):
                 return None
@@ -467,9 +488,7 @@ class SolarEdgeExternalProductionMax(SolarEdgeNumberBase):
 
     async def async_set_native_value(self, value: float) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {value}")
-        builder = BinaryPayloadBuilder(byteorder=Endian.Big, wordorder=Endian.Little)
-        builder.add_32bit_float(float(value))
-        await self._platform.write_registers(
-            address=57362, payload=builder.to_registers()
+        await self._platform.write_field(
+            EXTERNAL_PRODUCTION, "Ext_Prod_Max", float(value), self.async_write_ha_state
         )
-        await self.async_update()
+        self.coordinator.async_update_listeners()
@@ -0,0 +1,263 @@
+"""Caching Modbus/TCP proxy for the hub connection.
+
+SolarEdge inverters only serve a single Modbus/TCP client, so other local
+clients can't poll them while the integration is connected. The proxy
+answers their holding register reads from the registers the hub has read
+most recently, and forwards cache misses and writes through the hub's
+connection, where they share the request slots with the polls. Writes are
+only forwarded to the registers the enabled power control options allow
+the integration itself to write.
+"""
+import asyncio
+import logging
+import time
+
+from pymodbus.datastore import ModbusServerContext, ModbusSlaveContext
+from pymodbus.exceptions import ConnectionException
+from pymodbus.pdu import ExceptionResponse, ModbusExceptions
+from pymodbus.register_read_message import (
+    ReadHoldingRegistersRequest,
+    ReadHoldingRegistersResponse,
+)
+from pymodbus.register_write_message import (
+    WriteMultipleRegistersRequest,
+    WriteSingleRegisterRequest,
+    WriteSingleRegisterResponse,
+)
+from pymodbus.server.async_io import ModbusConnectedRequestHandler, ModbusTcpServer
+
+from .const import DEFAULT_PROXY_HOST
+from .sunspec import EXPORT_CONTROL, EXTERNAL_PRODUCTION, STORAGE_CONTROL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RegisterCache:
+    """Holding registers by unit and address, each with an expiry time.
+
+    A register read as part of a polled block stays fresh for the TTL of
+    that block, which is the poll interval of its tier. Registers outside
+    the polled blocks use the default TTL.
+    """
+
+    def __init__(self, default_ttl: float) -> None:
+        self.default_ttl = default_ttl
+        self._ttls = {}
+        self._registers = {}
+
+    def set_block_ttls(self, blocks) -> None:
+        """Set TTLs from (unit, address, count, ttl) blocks."""
+        self._ttls = {}
+
+        for unit, address, count, ttl in blocks:
+            for register in range(address, address + count):
+                self._ttls[(unit, register)] = min(
+                    ttl, self._ttls.get((unit, register), ttl)
+                )
+
+    def update(self, unit: int, address: int, registers) -> None:
+        now = time.monotonic()
+
+        for register, value in enumerate(registers, address):
+            ttl = self._ttls.get((unit, register), self.default_ttl)
+            self._registers[(unit, register)] = (value, now + ttl)
+
+    def get(self, unit: int, address: int, count: int):
+        """Return the registers if all of them are fresh, otherwise None."""
+        now = time.monotonic()
+        registers = []
+
+        for register in range(address, address + count):
+            entry = self._registers.get((unit, register))
+
+            if entry is None or entry[1] < now:
+                return None
+
+            registers.append(entry[0])
+
+        return registers
+
+    def invalidate(self, unit: int, address: int, count: int) -> None:
+        for register in range(address, address + count):
+            self._registers.pop((unit, register), None)
+
+
+class ProxyRequestHandler(ModbusConnectedRequestHandler):
+    """Connection handler that serves requests through the proxy."""
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        self._pending = set()
+
+    def connection_lost(self, call_exc):
+        super().connection_lost(call_exc)
+
+        for task in self._pending:
+            task.cancel()
+
+    def execute(self, request, *addr):
+        task = asyncio.create_task(self._execute(request, *addr))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _execute(self, request, *addr):
+        try:
+            response = await self.server.proxy.handle_request(request)
+
+        except Exception as e:
+            _LOGGER.warning(f"Modbus proxy request failed: {e!r}")
+            response = request.doException(ModbusExceptions.GatewayNoResponse)
+
+        response.transaction_id = request.transaction_id
+        response.unit_id = request.unit_id
+        self.send(response, *addr)
+
+
+class SolarEdgeModbusProxy:
+    """Modbus/TCP server sharing the hub connection with local clients.
+
+    Reads are answered from the register cache when every requested
+    register is fresh, and forwarded to the inverter otherwise. Writes to
+    the storage or site limit control registers are forwarded when the
+    matching power control option is enabled, and rejected otherwise. Only
+    holding register reads and writes are supported.
+    """
+
+    def __init__(
+        self,
+        hub,
+        port: int,
+        host: str = DEFAULT_PROXY_HOST,
+        default_ttl: float = 60,
+    ) -> None:
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self.cache = RegisterCache(default_ttl)
+        self.hits = 0
+        self.misses = 0
+        self._server = None
+        self._task = None
+
+    async def start(self, block_ttls=()) -> None:
+        self.cache.set_block_ttls(block_ttls)
+
+        self._server = ModbusTcpServer(
+            ModbusServerContext(slaves=ModbusSlaveContext(), single=True),
+            address=(self.host, self.port),
+            handler=ProxyRequestHandler,
+            allow_reuse_address=True,
+        )
+        self._server.proxy = self
+        self._task = asyncio.create_task(self._server.serve_forever())
+        await asyncio.wait(
+            [self._task, self._server.serving], return_when=asyncio.FIRST_COMPLETED
+        )
+
+        if self._task.done():
+            # raises the error that kept the server from listening
+            self._task.result()
+
+        self.hub.register_cache = self.cache
+        self.port = self._server.server.sockets[0].getsockname()[1]
+        _LOGGER.info(
+            f"Modbus proxy for {self.hub.name} listening on {self.host}:{self.port}"
+        )
+
+    async def stop(self) -> None:
+        if self.hub.register_cache is self.cache:
+            self.hub.register_cache = None
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self._server is not None:
+            await self._server.server_close()
+            self._server = None
+
+    async def handle_request(self, request):
+        """Return the response to a client request."""
+        if isinstance(request, ReadHoldingRegistersRequest):
+            registers = self.cache.get(request.unit_id, request.address, request.count)
+
+            if registers is not None:
+                self.hits += 1
+                return ReadHoldingRegistersResponse(registers)
+
+            self.misses += 1
+            return await self._forward(
+                request,
+                self.hub.read_holding_registers,
+                request.address,
+                request.count,
+            )
+
+        if isinstance(
+            request, (WriteMultipleRegistersRequest, WriteSingleRegisterRequest)
+        ):
+            if isinstance(request, WriteSingleRegisterRequest):
+                count = 1
+            else:
+                count = request.count
+
+            if not self.writable(request.address, count):
+                _LOGGER.debug(
+                    f"Modbus proxy rejected write to unit {request.unit_id} "
+                    f"at {hex(request.address)}"
+                )
+                return request.doException(ModbusExceptions.IllegalAddress)
+
+        if isinstance(request, WriteMultipleRegistersRequest):
+            return await self._forward(
+                request,
+                self.hub.write_holding_registers,
+                request.address,
+                request.values,
+            )
+
+        if isinstance(request, WriteSingleRegisterRequest):
+            result = await self._forward(
+                request,
+                self.hub.write_holding_registers,
+                request.address,
+                [request.value],
+            )
+            if result.isError():
+                return result
+
+            return WriteSingleRegisterResponse(request.address, request.value)
+
+        return request.doException(ModbusExceptions.IllegalFunction)
+
+    def writable(self, address: int, count: int) -> bool:
+        """Check if the registers are in a block the power control options allow."""
+        blocks = []
+
+        if self.hub.option_storage_control:
+            blocks.append(STORAGE_CONTROL)
+
+        if self.hub.option_export_control:
+            blocks.extend([EXPORT_CONTROL, EXTERNAL_PRODUCTION])
+
+        return any(
+            block.address <= address and address + count <= block.address + block.count
+            for block in blocks
+        )
+
+    async def _forward(self, request, method, *args):
+        try:
+            if not self.hub.is_socket_open():
+                await self.hub.connect()
+
+            result = await method(request.unit_id, *args)
+
+        except ConnectionException as e:
+            _LOGGER.debug(f"Modbus proxy forward failed: {e}")
+            return request.doException(ModbusExceptions.GatewayPathUnavailable)
+
+        if not result.isError() or type(result) is ExceptionResponse:
+            return result
+
+        return request.doException(ModbusExceptions.GatewayNoResponse)
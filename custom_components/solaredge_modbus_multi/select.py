@@ -15,8 +15,9 @@ from .const import (
     STORAGE_AC_CHARGE_POLICY,
     STORAGE_CONTROL_MODE,
     STORAGE_MODE,
-    SunSpecNotImpl,
 )
+from .helpers import reads_changed, record_reads
+from .sunspec import EXPORT_CONTROL, STORAGE_CONTROL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,12 +29,13 @@ async def async_setup_entry(
 ) -> None:
 
     hub = hass.data[DOMAIN][config_entry.entry_id]["hub"]
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    coordinators = hass.data[DOMAIN][config_entry.entry_id]["coordinators"]
 
     entities = []
 
     """ Power Control Options: Storage Control """
     if hub.option_storage_control is True:
+        coordinator = coordinators[STORAGE_CONTROL.tier]
         for battery in hub.batteries:
             for inverter in hub.inverters:
                 if inverter.inverter_unit_id != battery.inverter_unit_id:
@@ -47,6 +49,7 @@ async def async_setup_entry(
 
     """ Power Control Options: Site Limit Control """
     if hub.option_export_control is True:
+        coordinator = coordinators[EXPORT_CONTROL.tier]
         for inverter in hub.inverters:
             entities.append(
                 SolaredgeLimitControlMode(inverter, config_entry, coordinator)
@@ -67,6 +70,8 @@ def get_key(d, search):
 class SolarEdgeSelectBase(CoordinatorEntity, SelectEntity):
     should_poll = False
     _attr_has_entity_name = True
+    _reads = None
+    _written_available = None
     entity_category = EntityCategory.CONFIG
 
     def __init__(self, platform, config_entry, coordinator):
@@ -94,7 +99,11 @@ class SolarEdgeSelectBase(CoordinatorEntity, SelectEntity):
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        self.async_write_ha_state()
+        if self.available is self._written_available and not reads_changed(self._reads):
+            return
+
+        self._written_available = self.available
+        self._reads = record_reads(self.async_write_ha_state)
 
 
 class StorageControlMode(SolarEdgeSelectBase):
@@ -118,8 +127,10 @@ class StorageControlMode(SolarEdgeSelectBase):
     async def async_select_option(self, option: str) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {option}")
         new_mode = get_key(self._options, option)
-        await self._platform.write_registers(address=57348, payload=new_mode)
-        await self.async_update()
+        await self._platform.write_field(
+            STORAGE_CONTROL, "control_mode", new_mode, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
 
 
 class StorageACChargePolicy(SolarEdgeSelectBase):
@@ -141,7 +152,7 @@ class StorageACChargePolicy(SolarEdgeSelectBase):
         if (
             self._platform.decoded_storage is False
             or self._platform.decoded_storage["ac_charge_policy"]
-            == SunSpecNotImpl.UINT16
+            == STORAGE_CONTROL.not_implemented("ac_charge_policy")
             or self._platform.decoded_storage["ac_charge_policy"] not in self._options
         ):
             return None
@@ -151,8 +162,10 @@ class StorageACChargePolicy(SolarEdgeSelectBase):
     async def async_select_option(self, option: str) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {option}")
         new_mode = get_key(self._options, option)
-        await self._platform.write_registers(address=57349, payload=new_mode)
-        await self.async_update()
+        await self._platform.write_field(
+            STORAGE_CONTROL, "ac_charge_policy", new_mode, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
 
 
 class StorageDefaultMode(SolarEdgeSelectBase):
@@ -181,7 +194,8 @@ class StorageDefaultMode(SolarEdgeSelectBase):
     def current_option(self) -> str | None:
         if (
             self._platform.decoded_storage is False
-            or self._platform.decoded_storage["default_mode"] == SunSpecNotImpl.UINT16
+            or self._platform.decoded_storage["default_mode"]
+            == STORAGE_CONTROL.not_implemented("default_mode")
             or self._platform.decoded_storage["default_mode"] not in self._options
         ):
             return None
@@ -191,8 +205,10 @@ class StorageDefaultMode(SolarEdgeSelectBase):
     async def async_select_option(self, option: str) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {option}")
         new_mode = get_key(self._options, option)
-        await self._platform.write_registers(address=57354, payload=new_mode)
-        await self.async_update()
+        await self._platform.write_field(
+            STORAGE_CONTROL, "default_mode", new_mode, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
 
 
 class StorageCommandMode(SolarEdgeSelectBase):
@@ -221,7 +237,8 @@ class StorageCommandMode(SolarEdgeSelectBase):
     def current_option(self) -> str:
         if (
             self._platform.decoded_storage is False
-            or self._platform.decoded_storage["command_mode"] == SunSpecNotImpl.UINT16
+            or self._platform.decoded_storage["command_mode"]
+            == STORAGE_CONTROL.not_implemented("command_mode")
             or self._platform.decoded_storage["command_mode"] not in self._options
         ):
             return None
@@ -234,8 +251,10 @@ class StorageCommandMode(SolarEdgeSelectBase):
     async def async_select_option(self, option: str) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {option}")
         new_mode = get_key(self._options, option)
-        await self._platform.write_registers(address=57357, payload=new_mode)
-        await self.async_update()
+        await self._platform.write_field(
+            STORAGE_CONTROL, "command_mode", new_mode, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
 
 
 class SolaredgeLimitControlMode(SolarEdgeSelectBase):
@@ -255,7 +274,9 @@ class SolaredgeLimitControlMode(SolarEdgeSelectBase):
     @property
     def current_option(self) -> str | None:
         try:
-            if self._platform.decoded_model["E_Lim_Ctl_Mode"] == SunSpecNotImpl.UINT16:
+            if self._platform.decoded_model[
+                "E_Lim_Ctl_Mode"
+            ] == EXPORT_CONTROL.not_implemented("E_Lim_Ctl_Mode"):
                 return None
 
             if (int(self._platform.decoded_model["E_Lim_Ctl_Mode"]) >> 0) & 1:
@@ -285,8 +306,10 @@ class SolaredgeLimitControlMode(SolarEdgeSelectBase):
             set_bits = set_bits | (1 << int(new_mode))
 
         _LOGGER.debug(f"set {self.unique_id} bits {set_bits:016b}")
-        await self._platform.write_registers(address=57344, payload=set_bits)
-        await self.async_update()
+        await self._platform.write_field(
+            EXPORT_CONTROL, "E_Lim_Ctl_Mode", set_bits, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
 
 
 class SolaredgeLimitControl(SolarEdgeSelectBase):
@@ -306,7 +329,9 @@ class SolaredgeLimitControl(SolarEdgeSelectBase):
     @property
     def current_option(self) -> str | None:
         try:
-            if self._platform.decoded_model["E_Lim_Ctl"] == SunSpecNotImpl.UINT16:
+            if self._platform.decoded_model[
+                "E_Lim_Ctl"
+            ] == EXPORT_CONTROL.not_implemented("E_Lim_Ctl"):
                 return None
 
             return self._options[self._platform.decoded_model["E_Lim_Ctl"]]
@@ -317,5 +342,7 @@ class SolaredgeLimitControl(SolarEdgeSelectBase):
     async def async_select_option(self, option: str) -> None:
         _LOGGER.debug(f"set {self.unique_id} to {option}")
         new_mode = get_key(self._options, option)
-        await self._platform.write_registers(address=57345, payload=new_mode)
-        await self.async_update()
+        await self._platform.write_field(
+            EXPORT_CONTROL, "E_Lim_Ctl", new_mode, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
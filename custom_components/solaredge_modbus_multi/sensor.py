@@ -37,10 +37,19 @@ from .const import (
     SUNSPEC_SF_RANGE,
     VENDOR_STATUS,
     BatteryLimit,
+    PollTier,
     SunSpecAccum,
     SunSpecNotImpl,
 )
-from .helpers import float_to_hex, scale_factor, update_accum, watts_to_kilowatts
+from .helpers import (
+    float_to_hex,
+    reads_changed,
+    record_reads,
+    scale_factor,
+    update_accum,
+    watts_to_kilowatts,
+)
+from .sunspec import BATTERY_MODEL, GLOBAL_POWER_CONTROL, INVERTER_MODEL, METER_MODEL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -52,11 +61,12 @@ async def async_setup_entry(
 ) -> None:
 
     hub = hass.data[DOMAIN][config_entry.entry_id]["hub"]
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    coordinators = hass.data[DOMAIN][config_entry.entry_id]["coordinators"]
 
     entities = []
 
     for inverter in hub.inverters:
+        coordinator = coordinators[INVERTER_MODEL.tier]
         if inverter.single_device_entity:
             entities.append(SolarEdgeDevice(inverter, config_entry, coordinator))
         else:
@@ -89,12 +99,25 @@ async def async_setup_entry(
         entities.append(DCVoltage(inverter, config_entry, coordinator))
         entities.append(DCPower(inverter, config_entry, coordinator))
         entities.append(HeatSinkTemperature(inverter, config_entry, coordinator))
-        entities.append(SolarEdgeRRCR(inverter, config_entry, coordinator))
-        entities.append(SolarEdgeActivePowerLimit(inverter, config_entry, coordinator))
-        entities.append(SolarEdgeCosPhi(inverter, config_entry, coordinator))
+        entities.append(
+            SolarEdgeRRCR(
+                inverter, config_entry, coordinators[GLOBAL_POWER_CONTROL.tier]
+            )
+        )
+        entities.append(
+            SolarEdgeActivePowerLimit(
+                inverter, config_entry, coordinators[GLOBAL_POWER_CONTROL.tier]
+            )
+        )
+        entities.append(
+            SolarEdgeCosPhi(
+                inverter, config_entry, coordinators[GLOBAL_POWER_CONTROL.tier]
+            )
+        )
         entities.append(SolarEdgeMMPPTEvents(inverter, config_entry, coordinator))
 
     for meter in hub.meters:
+        coordinator = coordinators[METER_MODEL.tier]
         if meter.single_device_entity:
             entities.append(SolarEdgeDevice(meter, config_entry, coordinator))
         else:
@@ -171,6 +194,7 @@ async def async_setup_entry(
         entities.append(MetervarhIE(meter, config_entry, coordinator, "Export_Q4_C"))
 
     for battery in hub.batteries:
+        coordinator = coordinators[BATTERY_MODEL.tier]
         if battery.single_device_entity:
             entities.append(SolarEdgeDevice(battery, config_entry, coordinator))
         else:
@@ -200,6 +224,13 @@ async def async_setup_entry(
         entities.append(SolarEdgeBatterySOE(battery, config_entry, coordinator))
         entities.append(SolarEdgeBatteryStatus(battery, config_entry, coordinator))
 
+    """ Polling diagnostics, on the first inverter as the hub has no device """
+    if hub.inverters:
+        for tier in PollTier:
+            entities.append(
+                PollingOverruns(hub.inverters[0], config_entry, coordinators[tier])
+            )
+
     if entities:
         async_add_entities(entities)
 
@@ -207,6 +238,8 @@ async def async_setup_entry(
 class SolarEdgeSensorBase(CoordinatorEntity, SensorEntity):
     should_poll = False
     _attr_has_entity_name = True
+    _reads = None
+    _written_available = None
 
     def __init__(self, platform, config_entry, coordinator):
         """Pass coordinator to CoordinatorEntity."""
@@ -233,7 +266,11 @@ class SolarEdgeSensorBase(CoordinatorEntity, SensorEntity):
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        self.async_write_ha_state()
+        if self.available is self._written_available and not reads_changed(self._reads):
+            return
+
+        self._written_available = self.available
+        self._reads = record_reads(self.async_write_ha_state)
 
 
 class SolarEdgeDevice(SolarEdgeSensorBase):
@@ -2186,3 +2223,47 @@ class SolarEdgeBatteryStatus(Status):
             pass
 
         return attrs
+
+
+class PollingOverruns(SolarEdgeSensorBase):
+    """Share of recent refreshes of a poll tier that overran its interval."""
+
+    entity_category = EntityCategory.DIAGNOSTIC
+    state_class = SensorStateClass.MEASUREMENT
+    native_unit_of_measurement = PERCENTAGE
+    icon = "mdi:timer-alert-outline"
+
+    def __init__(self, platform, config_entry, coordinator):
+        super().__init__(platform, config_entry, coordinator)
+        """Initialize the sensor."""
+        self._tier = coordinator.tier
+
+    @property
+    def unique_id(self) -> str:
+        return f"{self._platform.uid_base}_{self._tier}_polling_overruns"
+
+    @property
+    def name(self) -> str:
+        return f"{self._tier.title()} Polling Overruns"
+
+    @property
+    def available(self) -> bool:
+        return self._platform.hub.online
+
+    @property
+    def native_value(self):
+        return round(self.coordinator.overrun_ratio * 100)
+
+    @property
+    def extra_state_attributes(self):
+        attrs = {"degraded_devices": self._platform.hub.degraded_devices(self._tier)}
+
+        if self.coordinator.cycle_time is not None:
+            attrs["cycle_time"] = round(self.coordinator.cycle_time, 3)
+
+        return attrs
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # not derived from decoded values, so written on every refresh
+        self.async_write_ha_state()
@@ -0,0 +1,369 @@
+"""SunSpec and SolarEdge register map.
+
+Every register block read or written by the integration is described here
+once: its address, word order, poll tier and field formats. Decoders, read
+plans, write addresses and not implemented values are derived from it.
+
+Meter and battery block addresses are relative to the device base address.
+"""
+from .const import PollTier
+from .helpers import RegisterBlock
+
+SUNSPEC_ID = 0x53756E53  # "SunS"
+
+COMMON_DID = 1
+COMMON_LENGTH = 65
+INVERTER_DIDS = [101, 102, 103]
+INVERTER_LENGTH = 50
+MMPPT_DIDS = [160]
+METER_DIDS = [201, 202, 203, 204]
+
+IDENT_FIELDS = [
+    ("C_SunSpec_DID", "H"),
+    ("C_SunSpec_Length", "H"),
+]
+
+COMMON_FIELDS = [
+    ("C_Manufacturer", "32s"),
+    ("C_Model", "32s"),
+    ("C_Option", "16s"),
+    ("C_Version", "16s"),
+    ("C_SerialNumber", "32s"),
+    ("C_Device_address", "H"),
+]
+
+SUNSPEC_HEADER = RegisterBlock(
+    [("C_SunSpec_ID", "I")] + IDENT_FIELDS,
+    address=40000,
+)
+
+INVERTER_COMMON = RegisterBlock(COMMON_FIELDS, address=40004)
+
+# Firmware version and serial number, read to check a cached device identity.
+IDENTITY_FIELDS = [("C_Version", "16s"), ("C_SerialNumber", "32s")]
+
+INVERTER_IDENTITY = RegisterBlock(
+    IDENTITY_FIELDS, address=INVERTER_COMMON.address_of("C_Version")
+)
+
+INVERTER_IDENT = RegisterBlock(IDENT_FIELDS, address=40069, tier=PollTier.MEDIUM)
+
+INVERTER_MODEL = RegisterBlock(
+    [
+        ("AC_Current", "H"),
+        ("AC_Current_A", "H"),
+        ("AC_Current_B", "H"),
+        ("AC_Current_C", "H"),
+        ("AC_Current_SF", "h"),
+        ("AC_Voltage_AB", "H"),
+        ("AC_Voltage_BC", "H"),
+        ("AC_Voltage_CA", "H"),
+        ("AC_Voltage_AN", "H"),
+        ("AC_Voltage_BN", "H"),
+        ("AC_Voltage_CN", "H"),
+        ("AC_Voltage_SF", "h"),
+        ("AC_Power", "h"),
+        ("AC_Power_SF", "h"),
+        ("AC_Frequency", "H"),
+        ("AC_Frequency_SF", "h"),
+        ("AC_VA", "h"),
+        ("AC_VA_SF", "h"),
+        ("AC_var", "h"),
+        ("AC_var_SF", "h"),
+        ("AC_PF", "h"),
+        ("AC_PF_SF", "h"),
+        ("AC_Energy_WH", "I"),
+        ("AC_Energy_WH_SF", "H"),
+        ("I_DC_Current", "H"),
+        ("I_DC_Current_SF", "h"),
+        ("I_DC_Voltage", "H"),
+        ("I_DC_Voltage_SF", "h"),
+        ("I_DC_Power", "h"),
+        ("I_DC_Power_SF", "h"),
+        ("I_Temp_Cab", "h"),
+        ("I_Temp_Sink", "h"),
+        ("I_Temp_Trns", "h"),
+        ("I_Temp_Other", "h"),
+        ("I_Temp_SF", "h"),
+        ("I_Status", "h"),
+        ("I_Status_Vendor", "h"),
+    ],
+    address=40071,
+    tier=PollTier.MEDIUM,
+)
+
+# polled instead of INVERTER_MODEL while the inverter is asleep
+INVERTER_STATUS = RegisterBlock(
+    [
+        ("I_Status", "h"),
+        ("I_Status_Vendor", "h"),
+    ],
+    address=INVERTER_MODEL.address_of("I_Status"),
+    tier=PollTier.MEDIUM,
+)
+
+MMPPT_COMMON = RegisterBlock(
+    [
+        ("mmppt_DID", "H"),
+        ("mmppt_Length", "H"),
+        (None, "12x"),
+        ("mmppt_Units", "H"),
+    ],
+    address=40121,
+)
+
+MMPPT_HEADER = [
+    ("mmppt_DCA_SF", "h"),
+    ("mmppt_DCV_SF", "h"),
+    ("mmppt_DCW_SF", "h"),
+    ("mmppt_DCWH_SF", "h"),
+    ("mmppt_Events", "I"),
+    (None, "2x"),
+    ("mmppt_TmsPer", "H"),
+]
+
+
+def mmppt_unit(unit: int) -> list:
+    """Fields of one unit of the SunSpec 160 Multiple MPPT model."""
+    return [
+        (f"mmppt_{unit}_ID", "H"),
+        (f"mmppt_{unit}_IDStr", "16s"),
+        (f"mmppt_{unit}_DCA", "H"),
+        (f"mmppt_{unit}_DCV", "H"),
+        (f"mmppt_{unit}_DCW", "H"),
+        (f"mmppt_{unit}_DCWH", "I"),
+        (f"mmppt_{unit}_Tms", "I"),
+        (f"mmppt_{unit}_Tmp", "h"),
+        (f"mmppt_{unit}_DCSt", "H"),
+        (f"mmppt_{unit}_DCEvt", "I"),
+    ]
+
+
+MMPPT_MODEL = {
+    units: RegisterBlock(
+        MMPPT_HEADER + [field for unit in range(units) for field in mmppt_unit(unit)],
+        address=40123,
+        tier=PollTier.MEDIUM,
+    )
+    for units in (2, 3)
+}
+
+GLOBAL_POWER_CONTROL = RegisterBlock(
+    [
+        ("I_RRCR", "H"),
+        ("I_Power_Limit", "H"),
+        ("I_CosPhi", "f"),
+    ],
+    word_swap=True,
+    address=61440,
+    tier=PollTier.SLOW,
+)
+
+ADVANCED_POWER_CONTROL = RegisterBlock(
+    [
+        ("I_AdvPwrCtrlEn", "i"),
+    ],
+    address=61762,
+    tier=PollTier.CONFIG,
+)
+
+EXPORT_CONTROL = RegisterBlock(
+    [
+        ("E_Lim_Ctl_Mode", "H"),
+        ("E_Lim_Ctl", "H"),
+        ("E_Site_Limit", "f"),
+    ],
+    word_swap=True,
+    address=57344,
+    tier=PollTier.CONFIG,
+)
+
+EXTERNAL_PRODUCTION = RegisterBlock(
+    [
+        ("Ext_Prod_Max", "f"),
+    ],
+    word_swap=True,
+    address=57362,
+    tier=PollTier.CONFIG,
+)
+
+STORAGE_CONTROL = RegisterBlock(
+    [
+        ("control_mode", "H"),
+        ("ac_charge_policy", "H"),
+        ("ac_charge_limit", "f"),
+        ("backup_reserve", "f"),
+        ("default_mode", "H"),
+        ("command_timeout", "I"),
+        ("command_mode", "H"),
+        ("charge_limit", "f"),
+        ("discharge_limit", "f"),
+    ],
+    word_swap=True,
+    address=57348,
+    tier=PollTier.CONFIG,
+)
+
+METER_ADDRESSES = {1: 40121, 2: 40295, 3: 40469}
+
+
+def meter_address(meter_id: int, mmppt_units: int = None) -> int:
+    """Base address of a meter, which follows the MMPPT model if present."""
+    address = METER_ADDRESSES[meter_id]
+
+    if mmppt_units is not None:
+        address += MMPPT_MODEL[mmppt_units].address - MMPPT_COMMON.address
+        address += MMPPT_MODEL[mmppt_units].count
+
+    return address
+
+
+METER_COMMON_IDENT = RegisterBlock(IDENT_FIELDS)
+
+METER_COMMON = RegisterBlock(COMMON_FIELDS, address=2)
+
+METER_IDENTITY = RegisterBlock(
+    IDENTITY_FIELDS, address=METER_COMMON.address_of("C_Version")
+)
+
+METER_IDENT = RegisterBlock(IDENT_FIELDS, address=67, tier=PollTier.FAST)
+
+METER_MODEL = RegisterBlock(
+    [
+        ("AC_Current", "h"),
+        ("AC_Current_A", "h"),
+        ("AC_Current_B", "h"),
+        ("AC_Current_C", "h"),
+        ("AC_Current_SF", "h"),
+        ("AC_Voltage_LN", "h"),
+        ("AC_Voltage_AN", "h"),
+        ("AC_Voltage_BN", "h"),
+        ("AC_Voltage_CN", "h"),
+        ("AC_Voltage_LL", "h"),
+        ("AC_Voltage_AB", "h"),
+        ("AC_Voltage_BC", "h"),
+        ("AC_Voltage_CA", "h"),
+        ("AC_Voltage_SF", "h"),
+        ("AC_Frequency", "h"),
+        ("AC_Frequency_SF", "h"),
+        ("AC_Power", "h"),
+        ("AC_Power_A", "h"),
+        ("AC_Power_B", "h"),
+        ("AC_Power_C", "h"),
+        ("AC_Power_SF", "h"),
+        ("AC_VA", "h"),
+        ("AC_VA_A", "h"),
+        ("AC_VA_B", "h"),
+        ("AC_VA_C", "h"),
+        ("AC_VA_SF", "h"),
+        ("AC_var", "h"),
+        ("AC_var_A", "h"),
+        ("AC_var_B", "h"),
+        ("AC_var_C", "h"),
+        ("AC_var_SF", "h"),
+        ("AC_PF", "h"),
+        ("AC_PF_A", "h"),
+        ("AC_PF_B", "h"),
+        ("AC_PF_C", "h"),
+        ("AC_PF_SF", "h"),
+        ("AC_Energy_WH_Exported", "I"),
+        ("AC_Energy_WH_Exported_A", "I"),
+        ("AC_Energy_WH_Exported_B", "I"),
+        ("AC_Energy_WH_Exported_C", "I"),
+        ("AC_Energy_WH_Imported", "I"),
+        ("AC_Energy_WH_Imported_A", "I"),
+        ("AC_Energy_WH_Imported_B", "I"),
+        ("AC_Energy_WH_Imported_C", "I"),
+        ("AC_Energy_WH_SF", "h"),
+        ("M_VAh_Exported", "I"),
+        ("M_VAh_Exported_A", "I"),
+        ("M_VAh_Exported_B", "I"),
+        ("M_VAh_Exported_C", "I"),
+        ("M_VAh_Imported", "I"),
+        ("M_VAh_Imported_A", "I"),
+        ("M_VAh_Imported_B", "I"),
+        ("M_VAh_Imported_C", "I"),
+        ("M_VAh_SF", "h"),
+        ("M_varh_Import_Q1", "I"),
+        ("M_varh_Import_Q1_A", "I"),
+        ("M_varh_Import_Q1_B", "I"),
+        ("M_varh_Import_Q1_C", "I"),
+        ("M_varh_Import_Q2", "I"),
+        ("M_varh_Import_Q2_A", "I"),
+        ("M_varh_Import_Q2_B", "I"),
+        ("M_varh_Import_Q2_C", "I"),
+        ("M_varh_Export_Q3", "I"),
+        ("M_varh_Export_Q3_A", "I"),
+        ("M_varh_Export_Q3_B", "I"),
+        ("M_varh_Export_Q3_C", "I"),
+        ("M_varh_Export_Q4", "I"),
+        ("M_varh_Export_Q4_A", "I"),
+        ("M_varh_Export_Q4_B", "I"),
+        ("M_varh_Export_Q4_C", "I"),
+        ("M_varh_SF", "h"),
+        ("M_Events", "I"),
+    ],
+    address=69,
+    tier=PollTier.FAST,
+)
+
+BATTERY_ADDRESSES = {1: 57600, 2: 57856}
+
+BATTERY_COMMON = RegisterBlock(
+    [
+        ("B_Manufacturer", "32s"),
+        ("B_Model", "32s"),
+        ("B_Version", "32s"),
+        ("B_SerialNumber", "32s"),
+        ("B_Device_Address", "H"),
+        ("Reserved", "H"),
+        ("B_RatedEnergy", "f"),
+        ("B_MaxChargePower", "f"),
+        ("B_MaxDischargePower", "f"),
+        ("B_MaxChargePeakPower", "f"),
+        ("B_MaxDischargePeakPower", "f"),
+    ],
+    word_swap=True,
+)
+
+BATTERY_IDENTITY = RegisterBlock(
+    [("B_Version", "32s"), ("B_SerialNumber", "32s")],
+    address=BATTERY_COMMON.address_of("B_Version"),
+)
+
+BATTERY_MODEL = RegisterBlock(
+    [
+        ("B_Temp_Average", "f"),
+        ("B_Temp_Max", "f"),
+        ("B_DC_Voltage", "f"),
+        ("B_DC_Current", "f"),
+        ("B_DC_Power", "f"),
+        ("B_Export_Energy_WH", "Q"),
+        ("B_Import_Energy_WH", "Q"),
+        ("B_Energy_Max", "f"),
+        ("B_Energy_Available", "f"),
+        ("B_SOH", "f"),
+        ("B_SOE", "f"),
+        ("B_Status", "I"),
+        ("B_Status_Vendor", "I"),
+        ("B_Event_Log1", "H"),
+        ("B_Event_Log2", "H"),
+        ("B_Event_Log3", "H"),
+        ("B_Event_Log4", "H"),
+        ("B_Event_Log5", "H"),
+        ("B_Event_Log6", "H"),
+        ("B_Event_Log7", "H"),
+        ("B_Event_Log8", "H"),
+        ("B_Event_Log_Vendor1", "H"),
+        ("B_Event_Log_Vendor2", "H"),
+        ("B_Event_Log_Vendor3", "H"),
+        ("B_Event_Log_Vendor4", "H"),
+        ("B_Event_Log_Vendor5", "H"),
+        ("B_Event_Log_Vendor6", "H"),
+        ("B_Event_Log_Vendor7", "H"),
+        ("B_Event_Log_Vendor8", "H"),
+    ],
+    word_swap=True,
+    address=108,
+    tier=PollTier.SLOW,
+)
@@ -7,7 +7,9 @@ from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, SunSpecNotImpl
+from .const import DOMAIN
+from .helpers import reads_changed, record_reads
+from .sunspec import EXPORT_CONTROL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,7 +21,8 @@ async def async_setup_entry(
 ) -> None:
 
     hub = hass.data[DOMAIN][config_entry.entry_id]["hub"]
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    coordinators = hass.data[DOMAIN][config_entry.entry_id]["coordinators"]
+    coordinator = coordinators[EXPORT_CONTROL.tier]
 
     entities = []
 
@@ -41,6 +44,8 @@ async def async_setup_entry(
 class SolarEdgeSwitchBase(CoordinatorEntity, SwitchEntity):
     should_poll = False
     _attr_has_entity_name = True
+    _reads = None
+    _written_available = None
 
     def __init__(self, platform, config_entry, coordinator):
         """Pass coordinator to CoordinatorEntity."""
@@ -67,7 +72,11 @@ class SolarEdgeSwitchBase(CoordinatorEntity, SwitchEntity):
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        self.async_write_ha_state()
+        if self.available is self._written_available and not reads_changed(self._reads):
+            return
+
+        self._written_available = self.available
+        self._reads = record_reads(self.async_write_ha_state)
 
 
 class SolarEdgeExternalProduction(SolarEdgeSwitchBase):
@@ -92,7 +101,9 @@ class SolarEdgeExternalProduction(SolarEdgeSwitchBase):
     @property
     def is_on(self) -> bool | None:
         try:
-            if self._platform.decoded_model["E_Lim_Ctl_Mode"] == SunSpecNotImpl.UINT16:
+            if self._platform.decoded_model[
+                "E_Lim_Ctl_Mode"
+            ] == EXPORT_CONTROL.not_implemented("E_Lim_Ctl_Mode"):
                 return None
 
             return (int(self._platform.decoded_model["E_Lim_Ctl_Mode"]) >> 10) & 1
@@ -106,8 +117,10 @@ class SolarEdgeExternalProduction(SolarEdgeSwitchBase):
         set_bits = set_bits | (1 << 10)
 
         _LOGGER.debug(f"set {self.unique_id} bits {set_bits:016b}")
-        await self._platform.write_registers(address=57344, payload=set_bits)
-        await self.async_update()
+        await self._platform.write_field(
+            EXPORT_CONTROL, "E_Lim_Ctl_Mode", set_bits, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
 
     async def async_turn_off(self, **kwargs):
         """Turn the entity off."""
@@ -115,8 +128,10 @@ class SolarEdgeExternalProduction(SolarEdgeSwitchBase):
         set_bits = set_bits & ~(1 << 10)
 
         _LOGGER.debug(f"set {self.unique_id} bits {set_bits:016b}")
-        await self._platform.write_registers(address=57344, payload=set_bits)
-        await self.async_update()
+        await self._platform.write_field(
+            EXPORT_CONTROL, "E_Lim_Ctl_Mode", set_bits, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
 
 
 class SolarEdgeNegativeSiteLimit(SolarEdgeSwitchBase):
@@ -137,7 +152,9 @@ class SolarEdgeNegativeSiteLimit(SolarEdgeSwitchBase):
     @property
     def is_on(self) -> bool | None:
         try:
-            if self._platform.decoded_model["E_Lim_Ctl_Mode"] == SunSpecNotImpl.UINT16:
+            if self._platform.decoded_model[
+                "E_Lim_Ctl_Mode"
+            ] == EXPORT_CONTROL.not_implemented("E_Lim_Ctl_Mode"):
                 return None
 
             return (int(self._platform.decoded_model["E_Lim_Ctl_Mode"]) >> 11) & 1
@@ -151,8 +168,10 @@ class SolarEdgeNegativeSiteLimit(SolarEdgeSwitchBase):
         set_bits = set_bits | (1 << 11)
 
         _LOGGER.debug(f"set {self.unique_id} bits {set_bits:016b}")
-        await self._platform.write_registers(address=57344, payload=set_bits)
-        await self.async_update()
+        await self._platform.write_field(
+            EXPORT_CONTROL, "E_Lim_Ctl_Mode", set_bits, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
 
     async def async_turn_off(self, **kwargs):
         """Turn the entity off."""
@@ -160,5 +179,7 @@ class SolarEdgeNegativeSiteLimit(SolarEdgeSwitchBase):
         set_bits = set_bits & ~(1 << 11)
 
         _LOGGER.debug(f"set {self.unique_id} bits {set_bits:016b}")
-        await self._platform.write_registers(address=57344, payload=set_bits)
-        await self.async_update()
+        await self._platform.write_field(
+            EXPORT_CONTROL, "E_Lim_Ctl_Mode", set_bits, self.async_write_ha_state
+        )
+        self.coordinator.async_update_listeners()
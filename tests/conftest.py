@@ -0,0 +1,24 @@
+"""Shared test setup.
+
+Coroutine tests are run in a fresh event loop, so no asyncio plugin is
+needed. Importing tools registers the integration package, which lets the
+helper tests run without Home Assistant installed.
+"""
+import asyncio
+import inspect
+
+import pytest
+
+import tools  # noqa: F401
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    kwargs = {
+        name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames
+    }
+    asyncio.run(asyncio.wait_for(pyfuncitem.obj(**kwargs), 30))
+    return True
@@ -0,0 +1,187 @@
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+from custom_components.solaredge_modbus_multi.helpers import (
+    ChangeTracker,
+    CircuitBreaker,
+    CycleMonitor,
+    DecodedValues,
+    RequestSlots,
+    RoundTripTimer,
+    WriteRequest,
+    coalesce_writes,
+    compile_read_plan,
+    format_device_list,
+    parse_device_list,
+    reads_changed,
+    record_reads,
+)
+
+
+def test_compile_read_plan_merges_within_gap():
+    plan = compile_read_plan([(100, 10), (112, 4), (200, 2), (100, 10)], max_gap=2)
+
+    assert plan == [
+        (100, 16, [(100, 10), (112, 4)]),
+        (200, 2, [(200, 2)]),
+    ]
+
+
+def test_compile_read_plan_respects_max_count():
+    plan = compile_read_plan([(0, 100), (100, 100)], max_count=125)
+
+    assert [(address, count) for address, count, _ in plan] == [(0, 100), (100, 100)]
+
+
+def test_coalesce_writes_later_requests_win():
+    runs = coalesce_writes(
+        [
+            WriteRequest(1, 10, (1, 2)),
+            WriteRequest(1, 12, (3,)),
+            WriteRequest(1, 20, (4,)),
+            WriteRequest(1, 11, (9,)),
+        ]
+    )
+
+    assert runs == [(10, [1, 9, 3], [0, 1, 3]), (20, [4], [2])]
+
+
+def test_coalesce_writes_splits_at_max_count():
+    runs = coalesce_writes([WriteRequest(1, 0, tuple(range(5)))], max_count=2)
+
+    assert [(address, len(payload)) for address, payload, _ in runs] == [
+        (0, 2),
+        (2, 2),
+        (4, 1),
+    ]
+    assert all(members == [0] for *_, members in runs)
+
+
+def test_parse_device_list():
+    units = parse_device_list("1:m1b1, 3-4, 7:-")
+
+    assert units == OrderedDict(
+        [
+            (1, {"meters": [1], "batteries": [1]}),
+            (3, None),
+            (4, None),
+            (7, {"meters": [], "batteries": []}),
+        ]
+    )
+    assert format_device_list(units) == "1:m1b1, 3-4, 7:-"
+
+
+@pytest.mark.parametrize("text", ["", "0", "248", "3-1", "1,1", "1:m4", "1:b3", "x"])
+def test_parse_device_list_rejects(text):
+    with pytest.raises(ValueError):
+        parse_device_list(text)
+
+
+async def test_request_slots_admit_writes_first():
+    slots = RequestSlots(1)
+    order = []
+
+    async def request(name, write):
+        async with slots.slot(write):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await slots.acquire()
+    tasks = [
+        asyncio.create_task(request("read", False)),
+        asyncio.create_task(request("write", True)),
+    ]
+    await asyncio.sleep(0)
+    slots.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["write", "read"]
+
+
+async def test_request_slots_cancelled_waiter_frees_nothing():
+    slots = RequestSlots(1)
+    await slots.acquire()
+
+    waiter = asyncio.create_task(slots.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    slots.release()
+    await asyncio.wait_for(slots.acquire(), 1)
+
+
+def test_reads_changed_tracks_values_read():
+    tracker = ChangeTracker()
+    values = DecodedValues(tracker, {"a": 1, "b": 2})
+    other = DecodedValues(ChangeTracker(), {"c": 3})
+
+    reads = record_reads(lambda: values["a"] + other.get("c"))
+
+    assert reads_changed(None)
+    assert not reads_changed(reads)
+
+    tracker.commit(dict(values), {"a": 1, "b": 5})
+    assert not reads_changed(reads)
+
+    tracker.commit({"a": 1, "b": 5}, {"a": 4, "b": 5})
+    assert reads_changed(reads)
+
+    # reads outside record_reads are not captured
+    values["b"]
+    assert "b" not in record_reads(lambda: values["a"])[tracker][1]
+
+
+def test_circuit_breaker_opens_and_probes(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, backoff=10, max_backoff=15)
+
+    assert breaker.failed() is False
+    assert breaker.failed() is True
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.failed() is True
+    assert breaker.retry_at == 25
+
+    now[0] = 25
+    assert breaker.allow()
+    breaker.succeeded()
+    assert breaker.closed
+
+
+def test_round_trip_timer():
+    timer = RoundTripTimer(max_timeout=3, min_timeout=0.3)
+    assert timer.timeout == 3
+
+    for _ in range(10):
+        timer.sample(0.02)
+    assert timer.timeout == 0.3
+
+    timer.sample(1.0)
+    assert 0.3 < timer.timeout <= 3
+
+    timer.timed_out()
+    timer.timed_out()
+    timer.timed_out()
+    assert timer.timeout == 3
+
+
+def test_cycle_monitor():
+    cycles = CycleMonitor(1.0, window=4)
+
+    assert cycles.record(0.5) == 0
+    assert cycles.record(2.5) == 2
+    assert cycles.overrun_ratio == 0.5
+    assert cycles.skipped == 2
+
+    for _ in range(4):
+        cycles.record(0.2)
+    assert cycles.overrun_ratio == 0
+    assert cycles.cycle_time < 1
@@ -0,0 +1,449 @@
+"""Hub tests against the Modbus/TCP simulator."""
+import asyncio
+import contextlib
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from pymodbus.client import AsyncModbusTcpClient  # noqa: E402
+from pymodbus.pdu import ModbusExceptions  # noqa: E402
+
+from custom_components.solaredge_modbus_multi import connection  # noqa: E402
+from custom_components.solaredge_modbus_multi.const import PollTier  # noqa: E402
+from custom_components.solaredge_modbus_multi.hub import (  # noqa: E402
+    DataUpdateFailed,
+    SolarEdgeModbusMultiHub,
+)
+from custom_components.solaredge_modbus_multi.number import (  # noqa: E402
+    StorageChargeLimit,
+)
+from custom_components.solaredge_modbus_multi.proxy import (  # noqa: E402
+    SolarEdgeModbusProxy,
+)
+from custom_components.solaredge_modbus_multi.sensor import (  # noqa: E402
+    PollingOverruns,
+)
+from custom_components.solaredge_modbus_multi.sunspec import (  # noqa: E402
+    BATTERY_ADDRESSES,
+    BATTERY_MODEL,
+    GLOBAL_POWER_CONTROL,
+    STORAGE_CONTROL,
+)
+from tools.simulator import (  # noqa: E402
+    SimulatedFault,
+    SimulatedInverter,
+    SolarEdgeSimulator,
+)
+
+
+def make_hub(sim, device_list="1", **kwargs):
+    return SolarEdgeModbusMultiHub(
+        None, "SE", sim.host, sim.port, device_list=device_list, **kwargs
+    )
+
+
+def storage_inverter():
+    return SimulatedInverter(1, meters=[], batteries=[1])
+
+
+def make_storage_hub(sim, **kwargs):
+    return make_hub(
+        sim,
+        detect_batteries=True,
+        adv_storage_control=True,
+        write_verify_timeout=0,
+        **kwargs,
+    )
+
+
+async def test_discovery_and_refresh():
+    inverters = [
+        SimulatedInverter(1, meters=[1], batteries=[1]),
+        SimulatedInverter(2, mmppt_units=2, meters=[]),
+    ]
+    async with SolarEdgeSimulator(inverters, port=0) as sim:
+        hub = make_hub(sim, "1-2", detect_batteries=True)
+        try:
+            assert await hub.async_refresh_modbus_data()
+
+            assert [inverter.inverter_unit_id for inverter in hub.inverters] == [1, 2]
+            assert [meter.meter_id for meter in hub.meters] == [1]
+            assert [battery.battery_id for battery in hub.batteries] == [1]
+            assert hub.inverters[1].decoded_mmppt["mmppt_Units"] == 2
+            assert hub.inverters[0].decoded_model["AC_Power"] is not None
+
+        finally:
+            await hub.shutdown()
+
+
+async def test_dead_follower_fails_fast():
+    inverters = [SimulatedInverter(1, meters=[]), SimulatedInverter(2, meters=[])]
+    async with SolarEdgeSimulator(inverters, port=0, latency=0.01) as sim:
+        hub = make_hub(sim, "1-2")
+        try:
+            for _ in range(3):
+                await hub.async_refresh_modbus_data()
+
+            sim.faults.append(SimulatedFault(0, 65535, unit=2, timeout=True))
+            start = time.monotonic()
+            await hub.async_refresh_modbus_data(tiers=[PollTier.MEDIUM])
+
+            assert time.monotonic() - start < 1
+            assert hub.inverters[0].online
+            assert not hub.inverters[1].health.healthy
+
+        finally:
+            await hub.shutdown()
+
+
+async def test_failed_battery_keeps_hub_online():
+    inverters = [SimulatedInverter(1, meters=[], batteries=[1])]
+    async with SolarEdgeSimulator(inverters, port=0) as sim:
+        # without global power control, the battery is all the slow tier reads
+        sim.faults.append(
+            SimulatedFault(*GLOBAL_POWER_CONTROL.span(), illegal_address=True)
+        )
+        hub = make_hub(sim, detect_batteries=True)
+        try:
+            await hub.async_refresh_modbus_data()
+            battery = hub.batteries[0]
+            assert not hub.inverters[0].polls([BATTERY_MODEL.tier])
+
+            sim.faults.append(
+                SimulatedFault(
+                    BATTERY_MODEL.address_of("B_Temp_Average", BATTERY_ADDRESSES[1]),
+                    BATTERY_MODEL.count,
+                    illegal_address=True,
+                )
+            )
+            await hub.async_refresh_modbus_data(tiers=[BATTERY_MODEL.tier])
+
+            assert hub.online
+            assert hub.inverters[0].online
+            assert not battery.online
+            assert not battery.health.retry_due()
+
+        finally:
+            await hub.shutdown()
+
+
+@pytest.mark.parametrize("tier, meters", [(PollTier.MEDIUM, []), (PollTier.FAST, [1])])
+async def test_all_units_timing_out_fails_refresh(tier, meters):
+    inverters = [SimulatedInverter(1, meters=meters), SimulatedInverter(2, meters=[])]
+    async with SolarEdgeSimulator(inverters, port=0) as sim:
+        hub = make_hub(sim, "1-2", request_timeout=0.1)
+        try:
+            await hub.async_refresh_modbus_data()
+
+            sim.faults.append(SimulatedFault(0, 65535, timeout=True))
+            with pytest.raises(DataUpdateFailed):
+                await hub.async_refresh_modbus_data(tiers=[tier])
+
+            assert not hub.online
+            devices = [*hub.inverters, *hub.meters]
+            assert not any(device.online for device in devices if device.polls([tier]))
+
+            # every device is backed off now, which is no success either
+            for _ in range(2):
+                with pytest.raises(DataUpdateFailed):
+                    await hub.async_refresh_modbus_data(tiers=[tier])
+
+                assert not hub.online
+
+            sim.faults.clear()
+            for device in devices:
+                device.health.retry_at = 0
+            for unit in (1, 2):
+                hub.breaker(unit).succeeded()
+
+            assert await hub.async_refresh_modbus_data(tiers=[tier])
+            assert hub.online
+
+        finally:
+            await hub.shutdown()
+
+
+async def test_concurrent_writes_are_coalesced():
+    async with SolarEdgeSimulator([storage_inverter()], port=0) as sim:
+        hub = make_storage_hub(sim)
+        try:
+            await hub.async_refresh_modbus_data()
+            inverter = hub.inverters[0]
+            sim.requests = 0
+
+            await asyncio.gather(
+                *[
+                    inverter.write_registers(
+                        STORAGE_CONTROL.address_of(name),
+                        STORAGE_CONTROL.encode(name, value),
+                    )
+                    for name, value in (
+                        ("command_timeout", 600),
+                        ("command_mode", 2),
+                        ("charge_limit", 1500.0),
+                        ("discharge_limit", 2500.0),
+                    )
+                ]
+            )
+
+            assert inverter.decoded_storage["command_mode"] == 2
+            assert inverter.decoded_storage["discharge_limit"] == 2500.0
+            # one write and the read back of the written blocks
+            assert sim.requests <= 3
+
+        finally:
+            await hub.shutdown()
+
+
+async def test_write_field_rolls_back_rejected_write():
+    async with SolarEdgeSimulator([storage_inverter()], port=0) as sim:
+        hub = make_storage_hub(sim)
+        try:
+            await hub.async_refresh_modbus_data()
+            inverter = hub.inverters[0]
+            before = inverter.decoded_storage["charge_limit"]
+
+            sim.faults.append(
+                SimulatedFault(
+                    STORAGE_CONTROL.address_of("charge_limit"),
+                    2,
+                    illegal_address=True,
+                )
+            )
+            await inverter.write_field(STORAGE_CONTROL, "charge_limit", 999.0)
+
+            assert inverter.decoded_storage["charge_limit"] == before
+
+        finally:
+            await hub.shutdown()
+
+
+class MemoryStore:
+    def __init__(self):
+        self.data = None
+
+    async def async_load(self):
+        return self.data
+
+    async def async_save(self, data):
+        self.data = data
+
+    async def async_remove(self):
+        self.data = None
+
+
+async def test_restored_topology_is_validated_and_saved():
+    async with SolarEdgeSimulator([SimulatedInverter(1)], port=0) as sim:
+        store = MemoryStore()
+        hub = make_hub(sim)
+        hub._store = store
+        try:
+            await hub.async_refresh_modbus_data()
+        finally:
+            await hub.shutdown()
+
+        cached = store.data["inverters"][0]
+        assert cached["has_export_control"] is not None
+        cached["has_export_control"] = None
+
+        hub = make_hub(sim)
+        hub._store = store
+        try:
+            await hub.async_refresh_modbus_data(tiers=[PollTier.MEDIUM])
+            await hub.async_refresh_modbus_data(tiers=[PollTier.MEDIUM])
+            await hub._validate_task
+
+            assert hub._topology_validated
+            assert store.data["inverters"][0]["has_export_control"] is not None
+
+        finally:
+            await hub.shutdown()
+
+
+def track_in_flight(hub):
+    peak = [0, 0]
+    request = hub._connection.request
+
+    @contextlib.asynccontextmanager
+    async def counted():
+        peak[0] += 1
+        peak[1] = max(peak)
+        try:
+            async with request() as client:
+                yield client
+        finally:
+            peak[0] -= 1
+
+    hub._connection.request = counted
+    return peak
+
+
+@pytest.mark.parametrize("pending_requests", [1, 4])
+async def test_requests_in_flight(pending_requests):
+    inverters = [SimulatedInverter(unit, meters=[1]) for unit in (1, 2, 3)]
+    async with SolarEdgeSimulator(
+        inverters, port=0, latency=0.005, serialize=False
+    ) as sim:
+        hub = make_hub(sim, "1-3", pending_requests=pending_requests)
+        peak = track_in_flight(hub)
+        try:
+            await hub.async_refresh_modbus_data()
+            await hub.async_refresh_modbus_data()
+
+            if pending_requests == 1:
+                assert peak[1] == 1
+            else:
+                assert 1 < peak[1] <= pending_requests
+
+        finally:
+            await hub.shutdown()
+
+
+async def test_liveness_probe_takes_a_request_slot(monkeypatch):
+    monkeypatch.setattr(connection, "CONNECTION_LIVENESS_INTERVAL", 0.05)
+    async with SolarEdgeSimulator([SimulatedInverter(1, meters=[])], port=0) as sim:
+        hub = make_hub(sim)
+        try:
+            await hub.async_refresh_modbus_data()
+            round_trip = hub.round_trip(1)
+            round_trip.srtt = None
+
+            async with hub._request_slots.slot():
+                requests = sim.requests
+                await asyncio.sleep(0.2)
+                assert sim.requests == requests
+
+            await asyncio.sleep(0.2)
+            assert sim.requests > requests
+            assert round_trip.srtt is not None
+            assert hub.is_socket_open()
+
+        finally:
+            await hub.shutdown()
+
+
+async def test_proxy_gates_writes_and_maps_errors():
+    async with SolarEdgeSimulator([storage_inverter()], port=0) as sim:
+        hub = make_hub(sim, detect_batteries=True)
+        proxy = SolarEdgeModbusProxy(hub, 0)
+        client = None
+        try:
+            await hub.async_refresh_modbus_data()
+            await proxy.start()
+            assert proxy.host == "127.0.0.1"
+
+            client = AsyncModbusTcpClient("127.0.0.1", proxy.port)
+            await client.connect()
+
+            result = await client.read_holding_registers(40000, 2, slave=1)
+            assert not result.isError()
+
+            address = STORAGE_CONTROL.address_of("command_mode")
+            result = await client.write_registers(address, [2], slave=1)
+            assert result.exception_code == ModbusExceptions.IllegalAddress
+
+            hub._adv_storage_control = True
+            result = await client.write_registers(address, [2], slave=1)
+            assert not result.isError()
+
+            async def broken(*args):
+                raise RuntimeError("broken")
+
+            hub.read_holding_registers = broken
+            result = await client.read_holding_registers(40100, 2, slave=1)
+            assert result.exception_code == ModbusExceptions.GatewayNoResponse
+
+        finally:
+            if client is not None:
+                await client.close()
+            await proxy.stop()
+            await hub.shutdown()
+
+
+async def test_write_field_shows_ignored_write(caplog):
+    async with SolarEdgeSimulator([storage_inverter()], port=0) as sim:
+        hub = make_storage_hub(sim)
+        try:
+            await hub.async_refresh_modbus_data()
+            inverter = hub.inverters[0]
+            before = inverter.decoded_storage["charge_limit"]
+
+            sim.faults.append(
+                SimulatedFault(
+                    STORAGE_CONTROL.address_of("charge_limit"), 2, ignore_write=True
+                )
+            )
+            result = await inverter.write_field(STORAGE_CONTROL, "charge_limit", 999.0)
+
+            assert not result.isError()
+            assert inverter.decoded_storage["charge_limit"] == before
+            assert "reads back" in caplog.text
+
+        finally:
+            await hub.shutdown()
+
+
+async def test_number_shows_values_before_debounced_write():
+    async with SolarEdgeSimulator([storage_inverter()], port=0) as sim:
+        hub = make_storage_hub(sim)
+        try:
+            await hub.async_refresh_modbus_data()
+            inverter = hub.inverters[0]
+            entity = StorageChargeLimit(
+                inverter,
+                hub.batteries[0],
+                SimpleNamespace(entry_id="test", data={"name": "SE"}),
+                SimpleNamespace(async_update_listeners=lambda: None),
+            )
+            entity.hass = SimpleNamespace(async_create_task=asyncio.create_task)
+            shown = []
+            entity.async_write_ha_state = lambda: shown.append(entity.native_value)
+
+            writes = []
+            for value in (100.0, 200.0, 300.0):
+                writes.append(asyncio.create_task(entity.async_set_native_value(value)))
+                await asyncio.sleep(0)
+                assert shown[-1] == value
+
+            sim.requests = 0
+            await asyncio.gather(*writes)
+
+            assert inverter.decoded_storage["charge_limit"] == 300.0
+            # one write and the read back of the written block
+            assert sim.requests <= 2
+
+        finally:
+            await hub.shutdown()
+
+
+async def test_polling_overruns_sensor():
+    inverters = [SimulatedInverter(1, meters=[]), SimulatedInverter(2, meters=[])]
+    async with SolarEdgeSimulator(inverters, port=0) as sim:
+        hub = make_hub(sim, "1-2")
+        try:
+            await hub.async_refresh_modbus_data()
+            coordinator = SimpleNamespace(
+                tier=PollTier.MEDIUM, overrun_ratio=0.25, cycle_time=1.23456
+            )
+            entity = PollingOverruns(
+                hub.inverters[0],
+                SimpleNamespace(entry_id="test", data={"name": "SE"}),
+                coordinator,
+            )
+
+            assert entity.native_value == 25
+            assert entity.extra_state_attributes == {
+                "degraded_devices": [],
+                "cycle_time": 1.235,
+            }
+
+            device = hub.degrade_polling(PollTier.MEDIUM, 2)
+            assert device == hub.inverters[1].name
+            assert entity.extra_state_attributes["degraded_devices"] == [device]
+            assert hub.degraded_devices(PollTier.SLOW) == []
+
+        finally:
+            await hub.shutdown()
@@ -0,0 +1,46 @@
+"""Development tools for the SolarEdge Modbus Multi integration.
+
+Run them from the repository root, for example:
+
+    python -m tools.simulator --help
+    python -m tools.benchmark --help
+
+The simulator only needs pymodbus. The integration package imports Home
+Assistant in its __init__, so unless Home Assistant is installed, the
+package is registered without running it, which lets the register map
+modules (const, helpers and sunspec) be imported on their own.
+"""
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+INTEGRATION = "custom_components.solaredge_modbus_multi"
+INTEGRATION_PATH = (
+    Path(__file__).parents[1] / "custom_components/solaredge_modbus_multi"
+)
+
+
+def _register_integration() -> None:
+    if INTEGRATION in sys.modules:
+        return
+
+    try:
+        importlib.import_module(INTEGRATION)
+
+    except ModuleNotFoundError as e:
+        if e.name is None or e.name.split(".")[0] != "homeassistant":
+            raise
+
+        for name in (INTEGRATION, "custom_components"):
+            sys.modules.pop(name, None)
+
+        spec = importlib.util.spec_from_file_location(
+            INTEGRATION,
+            INTEGRATION_PATH / "__init__.py",
+            submodule_search_locations=[str(INTEGRATION_PATH)],
+        )
+        sys.modules[INTEGRATION] = importlib.util.module_from_spec(spec)
+
+
+_register_integration()
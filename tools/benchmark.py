@@ -0,0 +1,397 @@
+"""Poll cycle benchmark against the simulator.
+
+Runs SolarEdgeModbusMultiHub.async_refresh_modbus_data and the entity
+updates of all platforms for a grid of inverter, meter and battery counts,
+and reports the cycle wall time split into connect, request, decode,
+dispatch and state write stages, along with CPU time and peak allocations.
+Results are written as JSON and can be compared against a baseline file.
+Unlike the simulator, it needs Home Assistant installed.
+
+    python -m tools.benchmark --help
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import pymodbus
+
+from custom_components.solaredge_modbus_multi import (
+    binary_sensor,
+    number,
+    select,
+    sensor,
+    switch,
+)
+from custom_components.solaredge_modbus_multi.const import DOMAIN, PollTier
+from custom_components.solaredge_modbus_multi.helpers import CycleMonitor
+from custom_components.solaredge_modbus_multi.hub import SolarEdgeModbusMultiHub
+
+PLATFORMS = [binary_sensor, number, select, sensor, switch]
+STAGES = ["connect", "request", "decode", "dispatch", "state_write"]
+METRICS = ["wall", "cpu", "alloc_peak"]
+
+
+class StageTimer:
+    """Accumulate time spent in each poll cycle stage."""
+
+    def __init__(self) -> None:
+        self.totals = dict.fromkeys(STAGES, 0.0)
+
+    def reset(self) -> None:
+        self.totals = dict.fromkeys(STAGES, 0.0)
+
+    def wrap_async(self, stage: str, func):
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - start
+
+        return timed
+
+    def wrap_read(self, func):
+        """Time a device read, counting the time outside requests as decode."""
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            requests = self.totals["request"]
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.totals["decode"] += elapsed - (self.totals["request"] - requests)
+
+        return timed
+
+    def wrap_sync(self, stage: str, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - start
+
+        return timed
+
+
+def _write_state(entity) -> None:
+    """Compute what async_write_ha_state would read from the entity."""
+    entity.available
+
+    for name in (
+        "native_value",
+        "is_on",
+        "current_option",
+        "options",
+        "extra_state_attributes",
+    ):
+        getattr(entity, name, None)
+
+
+async def _setup_entities(hub, timer: StageTimer) -> list:
+    coordinators = {
+        tier: SimpleNamespace(tier=tier, overrun_ratio=0.0, cycle_time=None)
+        for tier in PollTier
+    }
+    config_entry = SimpleNamespace(
+        entry_id="benchmark", data={"name": hub.name}, options={}
+    )
+    hass = SimpleNamespace(
+        data={DOMAIN: {"benchmark": {"hub": hub, "coordinators": coordinators}}}
+    )
+    entities = []
+
+    for platform_module in PLATFORMS:
+        await platform_module.async_setup_entry(hass, config_entry, entities.extend)
+
+    for entity in entities:
+        entity.async_write_ha_state = timer.wrap_sync(
+            "state_write", lambda entity=entity: _write_state(entity)
+        )
+
+    return entities
+
+
+def _dispatch(entities, timer: StageTimer) -> None:
+    start = time.perf_counter()
+    state_write = timer.totals["state_write"]
+
+    for entity in entities:
+        entity._handle_coordinator_update()
+
+    elapsed = time.perf_counter() - start
+    timer.totals["dispatch"] += elapsed - (timer.totals["state_write"] - state_write)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _start_simulator(port: int, scenario: dict, args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(Path(__file__).parents[1]), env.get("PYTHONPATH", "")]
+    )
+    command = [
+        sys.executable,
+        "-m",
+        "tools.simulator",
+        "--port",
+        str(port),
+        "--inverters",
+        str(scenario["inverters"]),
+        "--meters",
+        str(scenario["meters"]),
+        "--batteries",
+        str(scenario["batteries"]),
+        "--latency",
+        str(args.latency),
+        "--update-interval",
+        str(args.interval or 1.0),
+    ]
+    if args.mmppt:
+        command += ["--mmppt", str(args.mmppt)]
+    if args.pending_requests > 1:
+        command += ["--pipelined"]
+
+    process = await asyncio.create_subprocess_exec(
+        *command, env=env, stderr=asyncio.subprocess.DEVNULL
+    )
+
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            await writer.wait_closed()
+            return process
+
+        except OSError:
+            await asyncio.sleep(0.1)
+
+    process.kill()
+    raise RuntimeError("Simulator did not start")
+
+
+def _summary(values: list) -> dict:
+    values = sorted(values)
+    return {
+        "mean": statistics.fmean(values),
+        "p50": values[len(values) // 2],
+        "p95": values[min(len(values) - 1, round(0.95 * (len(values) - 1)))],
+        "max": values[-1],
+    }
+
+
+async def run_scenario(scenario: dict, args) -> dict:
+    """Run warmup and measured poll cycles for one scenario."""
+    port = _free_port()
+    process = await _start_simulator(port, scenario, args)
+
+    try:
+        hub = SolarEdgeModbusMultiHub(
+            None,
+            "benchmark",
+            "127.0.0.1",
+            port,
+            device_list=f"1-{scenario['inverters']}",
+            detect_meters=scenario["meters"] > 0,
+            detect_batteries=scenario["batteries"] > 0,
+            idle_timeout=args.idle_timeout,
+            advanced_power_control=True,
+            adv_storage_control=True,
+            adv_site_limit_control=True,
+            write_verify_timeout=0,
+            pending_requests=args.pending_requests,
+        )
+        timer = StageTimer()
+
+        start = time.perf_counter()
+        await hub.async_refresh_modbus_data()
+        discovery = time.perf_counter() - start
+
+        hub.connect = timer.wrap_async("connect", hub.connect)
+        hub.read_holding_registers = timer.wrap_async(
+            "request", hub.read_holding_registers
+        )
+        for device in hub.inverters + hub.meters + hub.batteries:
+            device.read_modbus_data = timer.wrap_read(device.read_modbus_data)
+
+        entities = await _setup_entities(hub, timer)
+        tiers = tuple(PollTier) if args.tier == "all" else (PollTier(args.tier),)
+        polled = [entity for entity in entities if entity.coordinator.tier in tiers]
+
+        async def cycle() -> None:
+            await hub.async_refresh_modbus_data(tiers=tiers)
+            _dispatch(polled, timer)
+
+        for _ in range(args.warmup):
+            await cycle()
+            await asyncio.sleep(args.interval)
+
+        samples = {name: [] for name in STAGES + METRICS}
+        cycles = CycleMonitor(args.interval, window=args.cycles)
+
+        for _ in range(args.cycles):
+            timer.reset()
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            await cycle()
+            samples["cpu"].append(time.process_time() - cpu)
+            samples["wall"].append(time.perf_counter() - wall)
+            cycles.record(samples["wall"][-1])
+
+            for stage in STAGES:
+                samples[stage].append(timer.totals[stage])
+
+            await asyncio.sleep(args.interval)
+
+        tracemalloc.start()
+        for _ in range(args.alloc_cycles):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            await cycle()
+            samples["alloc_peak"].append(tracemalloc.get_traced_memory()[1] - current)
+            await asyncio.sleep(args.interval)
+        tracemalloc.stop()
+
+        await hub.shutdown()
+
+    finally:
+        process.terminate()
+        await process.wait()
+
+    return {
+        **scenario,
+        "devices": len(hub.inverters) + len(hub.meters) + len(hub.batteries),
+        "entities": len(entities),
+        "polled_entities": len(polled),
+        "discovery": discovery,
+        "overrun_ratio": cycles.overrun_ratio,
+        **{name: _summary(values) for name, values in samples.items() if values},
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return the mean metrics that regressed beyond threshold."""
+    regressions = []
+    previous = {scenario["name"]: scenario for scenario in baseline["scenarios"]}
+
+    for scenario in results["scenarios"]:
+        if scenario["name"] not in previous:
+            continue
+
+        for metric in METRICS:
+            old = previous[scenario["name"]].get(metric, {}).get("mean")
+            new = scenario.get(metric, {}).get("mean")
+
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append(
+                    f"{scenario['name']} {metric}: {old:.6g} -> {new:.6g} "
+                    f"(+{100 * (new / old - 1):.0f}%)"
+                )
+
+    return regressions
+
+
+async def run(args) -> dict:
+    results = {
+        "python": platform.python_version(),
+        "pymodbus": pymodbus.__version__,
+        "tier": args.tier,
+        "cycles": args.cycles,
+        "latency": args.latency,
+        "pending_requests": args.pending_requests,
+        "scenarios": [],
+    }
+
+    for inverters, meters, batteries in itertools.product(
+        args.inverters, args.meters, args.batteries
+    ):
+        scenario = {
+            "name": f"{args.tier}-{inverters}i-{meters}m-{batteries}b",
+            "inverters": inverters,
+            "meters": meters,
+            "batteries": batteries,
+        }
+        result = await run_scenario(scenario, args)
+        results["scenarios"].append(result)
+
+        print(
+            f"{result['name']:>20} "
+            f"wall {1000 * result['wall']['mean']:8.2f} ms  "
+            f"cpu {1000 * result['cpu']['mean']:8.2f} ms  "
+            f"overruns {result['overrun_ratio']:4.0%}  "
+            + "  ".join(
+                f"{stage} {1000 * result[stage]['mean']:.2f}" for stage in STAGES
+            )
+        )
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inverters", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--meters", type=int, nargs="+", default=[0, 1, 3])
+    parser.add_argument("--batteries", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--mmppt", type=int, choices=[2, 3])
+    parser.add_argument(
+        "--tier", choices=["all"] + [tier.value for tier in PollTier], default="all"
+    )
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--alloc-cycles", type=int, default=3)
+    parser.add_argument(
+        "--interval", type=float, default=0.1, help="seconds between cycles"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="simulated response latency"
+    )
+    parser.add_argument("--idle-timeout", type=float, default=10)
+    parser.add_argument(
+        "--pending-requests", type=int, default=1, help="requests in flight"
+    )
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed relative increase of mean wall, cpu and alloc_peak",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.threshold
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
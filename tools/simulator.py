@@ -0,0 +1,678 @@
+"""Modbus/TCP simulator serving SolarEdge register images.
+
+Serves the register blocks of sunspec.py for inverters with optional MMPPT
+units, meters and batteries, so the hub can be run and measured without
+hardware. Latency, jitter, timeouts, IllegalAddress responses and ignored
+writes can be injected per register range with SimulatedFault.
+
+    python -m tools.simulator --help
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import random
+
+from pymodbus.datastore import (
+    ModbusServerContext,
+    ModbusSlaveContext,
+    ModbusSparseDataBlock,
+)
+from pymodbus.pdu import ModbusExceptions
+from pymodbus.register_write_message import (
+    WriteMultipleRegistersRequest,
+    WriteMultipleRegistersResponse,
+    WriteSingleRegisterRequest,
+    WriteSingleRegisterResponse,
+)
+from pymodbus.server.async_io import ModbusConnectedRequestHandler, ModbusTcpServer
+
+from custom_components.solaredge_modbus_multi.sunspec import (
+    ADVANCED_POWER_CONTROL,
+    BATTERY_ADDRESSES,
+    BATTERY_COMMON,
+    BATTERY_MODEL,
+    COMMON_DID,
+    COMMON_LENGTH,
+    EXPORT_CONTROL,
+    EXTERNAL_PRODUCTION,
+    GLOBAL_POWER_CONTROL,
+    INVERTER_COMMON,
+    INVERTER_IDENT,
+    INVERTER_LENGTH,
+    INVERTER_MODEL,
+    METER_COMMON,
+    METER_COMMON_IDENT,
+    METER_IDENT,
+    METER_MODEL,
+    MMPPT_COMMON,
+    MMPPT_MODEL,
+    STORAGE_CONTROL,
+    SUNSPEC_HEADER,
+    SUNSPEC_ID,
+    meter_address,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+READ_HOLDING_REGISTERS = 3
+
+
+class SimulatedFault:
+    """Fault injected into requests that touch a register range.
+
+    Matching requests are delayed by latency plus up to jitter seconds, and
+    then either answered normally, answered with IllegalAddress, or not
+    answered at all to make the client time out. With ignore_write, writes
+    are acknowledged without changing the registers, like an inverter that
+    doesn't apply a setting. With probability below 1 the fault only
+    applies to that fraction of matching requests.
+    """
+
+    def __init__(
+        self,
+        address: int,
+        count: int = 1,
+        unit: int = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        timeout: bool = False,
+        illegal_address: bool = False,
+        ignore_write: bool = False,
+        probability: float = 1.0,
+    ) -> None:
+        self.address = address
+        self.count = count
+        self.unit = unit
+        self.latency = latency
+        self.jitter = jitter
+        self.timeout = timeout
+        self.illegal_address = illegal_address
+        self.ignore_write = ignore_write
+        self.probability = probability
+
+    def applies(self, unit: int, address: int, count: int) -> bool:
+        return (
+            (self.unit is None or self.unit == unit)
+            and address < self.address + self.count
+            and self.address < address + count
+            and random.random() < self.probability
+        )
+
+
+class SimulatedInverter:
+    """Register image of an inverter and the meters and batteries behind it."""
+
+    def __init__(
+        self,
+        unit_id: int = 1,
+        phases: int = 3,
+        mmppt_units: int = None,
+        meters=(1,),
+        batteries=(),
+    ) -> None:
+        self.unit_id = unit_id
+        self.phases = phases
+        self.mmppt_units = mmppt_units
+        self.meters = tuple(meters)
+        self.batteries = tuple(batteries)
+        self.rated_power = 10000 if phases == 3 else 5000
+        self._blocks = []
+
+        serial = f"7E{unit_id:06X}"
+
+        self._add_block(
+            SUNSPEC_HEADER,
+            {
+                "C_SunSpec_ID": SUNSPEC_ID,
+                "C_SunSpec_DID": COMMON_DID,
+                "C_SunSpec_Length": COMMON_LENGTH,
+            },
+        )
+        self._add_block(
+            INVERTER_COMMON,
+            {
+                "C_Manufacturer": b"SolarEdge",
+                "C_Model": b"SE10K" if phases == 3 else b"SE5000H",
+                "C_Version": b"0004.0018.0036",
+                "C_SerialNumber": serial.encode(),
+                "C_Device_address": unit_id,
+            },
+        )
+        self._add_block(
+            INVERTER_IDENT,
+            {"C_SunSpec_DID": 100 + phases, "C_SunSpec_Length": INVERTER_LENGTH},
+        )
+        self.inverter = self._add_block(
+            INVERTER_MODEL,
+            {
+                "AC_Current": 1450,
+                "AC_Current_A": 1450,
+                "AC_Current_B": 1450 if phases == 3 else 0,
+                "AC_Current_C": 1450 if phases == 3 else 0,
+                "AC_Current_SF": -2,
+                "AC_Voltage_AB": 4000,
+                "AC_Voltage_BC": 4000,
+                "AC_Voltage_CA": 4000,
+                "AC_Voltage_AN": 2300,
+                "AC_Voltage_BN": 2300,
+                "AC_Voltage_CN": 2300,
+                "AC_Voltage_SF": -1,
+                "AC_Power": self.rated_power // 2,
+                "AC_Frequency": 5000,
+                "AC_Frequency_SF": -2,
+                "AC_VA": self.rated_power // 2,
+                "AC_PF": 10000,
+                "AC_PF_SF": -2,
+                "AC_Energy_WH": 12345678,
+                "I_DC_Current": 1400,
+                "I_DC_Current_SF": -2,
+                "I_DC_Voltage": 7500,
+                "I_DC_Voltage_SF": -1,
+                "I_DC_Power": self.rated_power // 2 + 100,
+                "I_Temp_Sink": 4500,
+                "I_Temp_SF": -2,
+                "I_Status": 4,
+            },
+            registers=INVERTER_LENGTH,
+            dynamic=True,
+        )
+
+        if mmppt_units is not None:
+            self._add_block(
+                MMPPT_COMMON,
+                {
+                    "mmppt_DID": 160,
+                    "mmppt_Length": MMPPT_MODEL[mmppt_units].count,
+                    "mmppt_Units": mmppt_units,
+                },
+            )
+            values = {"mmppt_DCA_SF": -2, "mmppt_DCV_SF": -1, "mmppt_DCW_SF": 0}
+
+            for unit in range(mmppt_units):
+                values.update(
+                    {
+                        f"mmppt_{unit}_ID": unit + 1,
+                        f"mmppt_{unit}_IDStr": f"String {unit + 1}".encode(),
+                        f"mmppt_{unit}_DCA": 700,
+                        f"mmppt_{unit}_DCV": 7500,
+                        f"mmppt_{unit}_DCW": 500,
+                        f"mmppt_{unit}_DCWH": 1000000,
+                        f"mmppt_{unit}_Tmp": 45,
+                        f"mmppt_{unit}_DCSt": 4,
+                    }
+                )
+
+            self.mmppt = self._add_block(MMPPT_MODEL[mmppt_units], values, dynamic=True)
+
+        self._add_block(
+            GLOBAL_POWER_CONTROL,
+            {"I_RRCR": 0, "I_Power_Limit": 100, "I_CosPhi": 1.0},
+        )
+        self._add_block(ADVANCED_POWER_CONTROL, {"I_AdvPwrCtrlEn": 1})
+        self._add_block(
+            EXPORT_CONTROL,
+            {"E_Lim_Ctl_Mode": 0, "E_Lim_Ctl": 0, "E_Site_Limit": 5000.0},
+        )
+        self._add_block(EXTERNAL_PRODUCTION, {"Ext_Prod_Max": 0.0})
+        self._add_block(
+            STORAGE_CONTROL,
+            {
+                "control_mode": 1,
+                "ac_charge_policy": 0,
+                "ac_charge_limit": 0.0,
+                "backup_reserve": 10.0,
+                "default_mode": 7,
+                "command_timeout": 3600,
+                "command_mode": 7,
+                "charge_limit": 5000.0,
+                "discharge_limit": 5000.0,
+            },
+        )
+
+        self.meter_models = []
+
+        for meter_id in self.meters:
+            base = meter_address(meter_id, mmppt_units)
+            self._add_block(
+                METER_COMMON_IDENT,
+                {"C_SunSpec_DID": COMMON_DID, "C_SunSpec_Length": COMMON_LENGTH},
+                base,
+            )
+            self._add_block(
+                METER_COMMON,
+                {
+                    "C_Manufacturer": b"WattNode",
+                    "C_Model": b"WNC-3Y-400-MB",
+                    "C_Option": b"Export+Import",
+                    "C_Version": b"0031",
+                    "C_SerialNumber": f"{serial}{meter_id}".encode(),
+                    "C_Device_address": unit_id,
+                },
+                base,
+            )
+            self._add_block(
+                METER_IDENT,
+                {"C_SunSpec_DID": 203, "C_SunSpec_Length": METER_MODEL.count},
+                base,
+            )
+            self.meter_models.append(
+                self._add_block(
+                    METER_MODEL,
+                    {
+                        "AC_Current": 900,
+                        "AC_Current_A": 300,
+                        "AC_Current_B": 300,
+                        "AC_Current_C": 300,
+                        "AC_Current_SF": -2,
+                        "AC_Voltage_LN": 2300,
+                        "AC_Voltage_AN": 2300,
+                        "AC_Voltage_BN": 2300,
+                        "AC_Voltage_CN": 2300,
+                        "AC_Voltage_LL": 4000,
+                        "AC_Voltage_AB": 4000,
+                        "AC_Voltage_BC": 4000,
+                        "AC_Voltage_CA": 4000,
+                        "AC_Voltage_SF": -1,
+                        "AC_Frequency": 5000,
+                        "AC_Frequency_SF": -2,
+                        "AC_Power": 2000,
+                        "AC_PF": 100,
+                        "AC_Energy_WH_Exported": 2000000,
+                        "AC_Energy_WH_Imported": 1000000,
+                    },
+                    base,
+                    dynamic=True,
+                )
+            )
+
+        self.battery_models = []
+
+        for battery_id in self.batteries:
+            base = BATTERY_ADDRESSES[battery_id]
+            self._add_block(
+                BATTERY_COMMON,
+                {
+                    "B_Manufacturer": b"LGES",
+                    "B_Model": b"RESU10H",
+                    "B_Version": b"3.0",
+                    "B_SerialNumber": f"{serial}B{battery_id}".encode(),
+                    "B_Device_Address": 15,
+                    "B_RatedEnergy": 9800.0,
+                    "B_MaxChargePower": 5000.0,
+                    "B_MaxDischargePower": 5000.0,
+                    "B_MaxChargePeakPower": 7000.0,
+                    "B_MaxDischargePeakPower": 7000.0,
+                },
+                base,
+            )
+            self.battery_models.append(
+                self._add_block(
+                    BATTERY_MODEL,
+                    {
+                        "B_Temp_Average": 25.0,
+                        "B_Temp_Max": 27.0,
+                        "B_DC_Voltage": 400.0,
+                        "B_DC_Current": 2.5,
+                        "B_DC_Power": 1000.0,
+                        "B_Export_Energy_WH": 500000,
+                        "B_Import_Energy_WH": 600000,
+                        "B_Energy_Max": 9800.0,
+                        "B_Energy_Available": 4900.0,
+                        "B_SOH": 100.0,
+                        "B_SOE": 50.0,
+                        "B_Status": 3,
+                    },
+                    base,
+                    dynamic=True,
+                )
+            )
+
+    def _add_block(self, block, values, base=0, registers=None, dynamic=False) -> dict:
+        self._blocks.append((block, base, values, registers or block.count, dynamic))
+        return values
+
+    def registers(self, dynamic_only: bool = False) -> dict:
+        """Return {address: value} for the simulated register blocks.
+
+        Registers of a block without a field value are zero, unless another
+        block overlapping it has a field there. Only field registers are
+        returned with dynamic_only.
+        """
+        registers = {}
+
+        for block, base, values, count, dynamic in self._blocks:
+            if dynamic_only and not dynamic:
+                continue
+
+            if not dynamic_only:
+                for address in range(
+                    base + block.address, base + block.address + count
+                ):
+                    registers.setdefault(address, 0)
+
+            for name, value in values.items():
+                address = block.address_of(name, base)
+
+                for offset, register in enumerate(block.encode(name, value)):
+                    registers[address + offset] = register
+
+        return registers
+
+    def step(self, seconds: float) -> None:
+        """Advance power readings and energy counters by a random walk."""
+        power = self.inverter["AC_Power"] + random.randint(-100, 100)
+        power = max(0, min(self.rated_power, power))
+        self.inverter["AC_Power"] = power
+        self.inverter["AC_VA"] = power
+        self.inverter["I_DC_Power"] = power + 100
+        self.inverter["AC_Energy_WH"] += round(power * seconds / 3600)
+
+        if self.mmppt_units is not None:
+            for unit in range(self.mmppt_units):
+                self.mmppt[f"mmppt_{unit}_DCW"] = (power + 100) // self.mmppt_units
+                self.mmppt[f"mmppt_{unit}_DCWH"] += round(
+                    power * seconds / 3600 / self.mmppt_units
+                )
+
+        for meter in self.meter_models:
+            power = max(-15000, min(15000, meter["AC_Power"] + random.randint(-50, 50)))
+            meter["AC_Power"] = power
+
+            if power > 0:
+                meter["AC_Energy_WH_Exported"] += round(power * seconds / 3600)
+            else:
+                meter["AC_Energy_WH_Imported"] -= round(power * seconds / 3600)
+
+        for battery in self.battery_models:
+            power = max(
+                -5000.0, min(5000.0, battery["B_DC_Power"] + random.uniform(-50, 50))
+            )
+            battery["B_DC_Power"] = power
+            battery["B_DC_Current"] = power / battery["B_DC_Voltage"]
+            available = battery["B_Energy_Available"] - power * seconds / 3600
+            available = max(0.0, min(battery["B_Energy_Max"], available))
+            battery["B_Energy_Available"] = available
+            battery["B_SOE"] = 100 * available / battery["B_Energy_Max"]
+
+            if power > 0:
+                battery["B_Export_Energy_WH"] += round(power * seconds / 3600)
+            else:
+                battery["B_Import_Energy_WH"] -= round(power * seconds / 3600)
+
+
+class SimulatorServerContext(ModbusServerContext):
+    """Server context that lets the framer accept every unit ID.
+
+    The pymodbus framer drops its whole receive buffer on a request for an
+    unknown unit ID, losing the requests pipelined behind it. Requests for
+    unit IDs without an inverter are dropped by the handler instead.
+    """
+
+    def slaves(self):
+        return list(range(248))
+
+
+class SimulatorRequestHandler(ModbusConnectedRequestHandler):
+    """Connection handler that applies the simulator latency and faults."""
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        self._busy = asyncio.Lock()
+        self._pending = set()
+
+    def connection_lost(self, call_exc):
+        super().connection_lost(call_exc)
+
+        for task in self._pending:
+            task.cancel()
+
+    def execute(self, request, *addr):
+        task = asyncio.create_task(self._execute(request, *addr))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _execute(self, request, *addr):
+        simulator = self.server.simulator
+
+        if simulator.serialize:
+            busy = self._busy
+        else:
+            busy = contextlib.nullcontext()
+
+        async with busy:
+            simulator.requests += 1
+
+            faults = [
+                fault
+                for fault in simulator.faults
+                if fault.applies(
+                    request.unit_id,
+                    getattr(request, "address", 0),
+                    getattr(request, "count", 1),
+                )
+            ]
+
+            delay = simulator.latency + random.uniform(0, simulator.jitter)
+            delay += sum(
+                fault.latency + random.uniform(0, fault.jitter) for fault in faults
+            )
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if any(fault.timeout for fault in faults):
+                simulator.timeouts += 1
+                return
+
+            response = None
+
+            if any(fault.illegal_address for fault in faults):
+                response = request.doException(ModbusExceptions.IllegalAddress)
+
+            elif any(fault.ignore_write for fault in faults):
+                if isinstance(request, WriteSingleRegisterRequest):
+                    response = WriteSingleRegisterResponse(
+                        request.address, request.value
+                    )
+                elif isinstance(request, WriteMultipleRegistersRequest):
+                    response = WriteMultipleRegistersResponse(
+                        request.address, request.count
+                    )
+
+            if response is not None:
+                response.transaction_id = request.transaction_id
+                response.unit_id = request.unit_id
+                self.send(response, *addr)
+                return
+
+            super().execute(request, *addr)
+
+
+class SolarEdgeSimulator:
+    """Modbus/TCP server for a set of simulated inverters.
+
+    Requests on a connection are answered one at a time in order, like an
+    inverter does, unless serialize is False. Unit IDs without an inverter
+    don't respond, and registers outside the simulated blocks return
+    IllegalAddress. With update_interval, readings change every interval.
+    """
+
+    def __init__(
+        self,
+        inverters=None,
+        host: str = "127.0.0.1",
+        port: int = 5020,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        faults=(),
+        serialize: bool = True,
+        update_interval: float = None,
+    ) -> None:
+        if inverters is None:
+            inverters = [SimulatedInverter()]
+
+        self.inverters = {inverter.unit_id: inverter for inverter in inverters}
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.faults = list(faults)
+        self.serialize = serialize
+        self.update_interval = update_interval
+        self.requests = 0
+        self.timeouts = 0
+        self._context = None
+        self._server = None
+        self._tasks = []
+
+    async def start(self) -> None:
+        self._context = SimulatorServerContext(
+            slaves={
+                unit_id: ModbusSlaveContext(
+                    hr=ModbusSparseDataBlock(inverter.registers()), zero_mode=True
+                )
+                for unit_id, inverter in self.inverters.items()
+            },
+            single=False,
+        )
+
+        self._server = ModbusTcpServer(
+            self._context,
+            address=(self.host, self.port),
+            handler=SimulatorRequestHandler,
+            allow_reuse_address=True,
+            ignore_missing_slaves=True,
+        )
+        self._server.simulator = self
+        self._tasks.append(asyncio.create_task(self._server.serve_forever()))
+        await self._server.serving
+
+        self.port = self._server.server.sockets[0].getsockname()[1]
+        _LOGGER.info(f"Simulator serving {list(self.inverters)} on port {self.port}")
+
+        if self.update_interval:
+            self._tasks.append(asyncio.create_task(self._update_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._server is not None:
+            await self._server.server_close()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    def step(self, seconds: float) -> None:
+        """Advance all inverters and update the served registers."""
+        for unit_id, inverter in self.inverters.items():
+            inverter.step(seconds)
+
+            for address, value in inverter.registers(dynamic_only=True).items():
+                self._context[unit_id].setValues(
+                    READ_HOLDING_REGISTERS, address, [value]
+                )
+
+    async def _update_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.update_interval)
+            self.step(self.update_interval)
+
+
+def _parse_fault(spec: str) -> SimulatedFault:
+    """Parse ADDRESS[:COUNT]=KIND[:VALUE] as used by --fault."""
+    location, _, kind = spec.partition("=")
+    address, _, count = location.partition(":")
+    kind, _, value = kind.partition(":")
+    fault = SimulatedFault(int(address, 0), int(count or 1, 0))
+
+    if kind == "timeout":
+        fault.timeout = True
+    elif kind == "illegal":
+        fault.illegal_address = True
+    elif kind == "ignore":
+        fault.ignore_write = True
+    elif kind == "latency":
+        fault.latency = float(value)
+    else:
+        raise argparse.ArgumentTypeError(f"Unknown fault {kind}")
+
+    if kind != "latency" and value:
+        fault.probability = float(value)
+
+    return fault
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--inverters", type=int, default=1)
+    parser.add_argument("--phases", type=int, choices=[1, 2, 3], default=3)
+    parser.add_argument("--mmppt", type=int, choices=sorted(MMPPT_MODEL))
+    parser.add_argument("--meters", type=int, choices=[0, 1, 2, 3], default=1)
+    parser.add_argument("--batteries", type=int, choices=[0, 1, 2], default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--update-interval", type=float, default=1.0)
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="answer requests on a connection concurrently",
+    )
+    parser.add_argument(
+        "--fault",
+        type=_parse_fault,
+        action="append",
+        default=[],
+        metavar="ADDRESS[:COUNT]=KIND[:VALUE]",
+        help=(
+            "timeout[:probability], illegal[:probability], ignore[:probability] "
+            "or latency:seconds for requests touching the range"
+        ),
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    simulator = SolarEdgeSimulator(
+        [
+            SimulatedInverter(
+                unit_id,
+                args.phases,
+                args.mmppt,
+                range(1, args.meters + 1),
+                range(1, args.batteries + 1),
+            )
+            for unit_id in range(1, args.inverters + 1)
+        ],
+        args.host,
+        args.port,
+        args.latency,
+        args.jitter,
+        args.fault,
+        not args.pipelined,
+        args.update_interval,
+    )
+
+    async def serve():
+        async with simulator:
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()